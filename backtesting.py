@@ -1,11 +1,12 @@
 import os
 import dotenv
-import threading
-import indicators
 import numpy as np
 import pandas as pd
 import datetime as dt
-from binance.client import Client
+from historicalStore import HistoricalStore
+from klinesDownloader import KlinesDownloader
+from restScheduler import ScheduledClient
+from strategies import SMADivergenceStrategy
 
 
 # Loading environmental variables
@@ -23,6 +24,12 @@ sell_fees = 0.00075
 fetch_symbols_data = False
 symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "XRPUSDT", "LUNAUSDT", "SOLUSDT", "ADAUSDT", "AVAXUSDT", "DOTUSDT", "DOGEUSDT", "ATOMUSDT"]
 
+# Columnar store of the historical data
+store = HistoricalStore(root='historical_data')
+
+# Buying strategy, shared with the live bot
+strategy = SMADivergenceStrategy(window=200, threshold=1.01)
+
 
 # Function to convert a timestamp into the hh:mm format
 def parseTime(time) -> str:
@@ -30,28 +37,7 @@ def parseTime(time) -> str:
     return result
 
 
-# Function to fetch the historical data for a give symbol
-def fetchSymbolData(symbol, interval, start, end) -> None:
-    # Fetching the historical data from the Binance API
-    historical_data = client.get_historical_klines(symbol, interval, start_str=start, end_str=end)
-    historical_data = [[data[i] for i in range(6)] for data in historical_data]
-
-    # Saving the historical data of the given symbol into a local CSV file
-    file_path = os.path.join('historical_data', f'{symbol}.csv')
-    open(file_path, 'w').close()
-
-    with open(file_path, 'a') as f:
-        for data in historical_data:
-            data_string = ""
-            for i in range(len(data)):
-                data_string += f'{data[i]};' if i < (len(data) -1) else data[i]
-
-            f.write(f'{data_string}\n')
-
-    print(f'Historical data loaded for symbol : {symbol}')
-
-
-# Function to fetch the historical data of a given list of symbols
+# Function to fetch the missing historical data of a given list of symbols
 def fetchSymbolsData(symbols, interval, lookback_months, lookback_days, lookback_hours=24) -> None:
     # Defining the end timestamp
     end = dt.datetime.now().timestamp()
@@ -61,43 +47,47 @@ def fetchSymbolsData(symbols, interval, lookback_months, lookback_days, lookback
     start = dt.datetime.now().timestamp()
     start = int(start * 1000) - (lookback_months * lookback_days * lookback_hours * 60 * 60 * 1000)
 
-    # Fetching the historical data for each symbol in the list
-    threads = []
+    # Downloading the missing data of the symbols with a bounded number of concurrent requests, paced by the client's scheduler
+    downloader = KlinesDownloader(client=client, store=store, interval=interval)
+    downloaded = downloader.download(symbols, start, end)
+
     for symbol in symbols:
-        symbol_thread = threading.Thread(target=fetchSymbolData, args=[symbol, interval, start, end])
-        threads.append(symbol_thread)
-        symbol_thread.start()
-        
-    for thread in threads:
-        thread.join()
+        print(f'Historical data loaded for symbol : {symbol} ({downloaded[symbol]} new candles)')
 
 
-# Function to compute the indicators from the historical data of a given symbol
-def applyIndicators(df) -> None:
-    # Computing the SMA 200 on the close price values
-    df["SMA_200"] = indicators.SMA(df["close"], window=200)
+# Function to compute the indicators required by the strategy from the historical data of a given symbol
+def applyIndicators(df, strategy=strategy) -> None:
+    # Computing the strategy's indicators (i.e. the SMA 200) on the close price values
+    strategy.applyIndicators(df)
 
     # Removing Null values
     df = df.dropna()
 
 
-# Function to load the historical data of the given symbols from the local files
-def loadData() -> list:
+# Function to load the historical data of the given symbols from the local files, optionally within a time range [start, end)
+def loadData(start=None, end=None, strategy=strategy) -> list:
     # Loading the historical data into a list of dataframes
     dataframes = []
     for symbol in symbols:
         file_path = os.path.join('historical_data', f'{symbol}.csv')
 
-        if not os.path.exists(file_path):
-            raise Exception(f'No historical data available for symbol {symbol}')
+        # Loading the historical data of the selected symbol from the columnar store
+        if store.exists(symbol, interval):
+            df = store.loadDataFrame(symbol, interval, start=start, end=end)
 
-        # Loading the historical data of the selected symbol into a Pandas Dataframe
-        df = pd.read_csv(file_path, sep=";")
-        df.columns = ['time','open', 'high', 'low', 'close', 'volume']
-        df = df.astype({"time": 'int64', "open": 'float64', "high": 'float64', "low": 'float64', "close": 'float64', "volume": 'float64'})
+        # Falling back to the CSV files written by the previous versions of the backtester
+        elif os.path.exists(file_path):
+            df = pd.read_csv(file_path, sep=";", header=None)
+            df.columns = ['time','open', 'high', 'low', 'close', 'volume']
+            df = df.astype({"time": 'int64', "open": 'float64', "high": 'float64', "low": 'float64', "close": 'float64', "volume": 'float64'})
+            df = df.loc[(df["time"] >= start) if start is not None else slice(None)]
+            df = df.loc[(df["time"] < end) if end is not None else slice(None)].reset_index(drop=True)
+
+        else:
+            raise Exception(f'No historical data available for symbol {symbol}')
 
         # Computing the required indicators for the current symbol
-        applyIndicators(df)
+        applyIndicators(df, strategy)
 
         dataframes.append({"symbol": symbol, "historical_data": df})
 
@@ -105,27 +95,28 @@ def loadData() -> list:
 
 
 # Function to test the trading strategy over a selected period
-def testStrategy(symbols_data, periods) -> pd.DataFrame:
+def testStrategy(symbols_data, periods, strategy=strategy) -> pd.DataFrame:
     transactions = pd.DataFrame()
     
-    divergence_threshold = 1.01
     minimum_profit = 0.003
     
     open_position = False
     # Iterating over the selected number of periods
     for i in range(periods):
         if not open_position:
-            # Sorting the symbols by SMA 200 - price ratio in reverse order
-            symbols_data.sort(key=lambda symbol_data: ((symbol_data["historical_data"].iloc[i].SMA_200 / symbol_data["historical_data"].iloc[i].close)), reverse=True)
-            symbol = symbols_data[0]
+            # Scoring the symbols on their features of the current period
+            features = np.array([[symbol_data["historical_data"].iloc[i][feature] for feature in strategy.features] for symbol_data in symbols_data])
+            selected_symbol, score = strategy.select(features)
+
+            # If a symbol is eligible according to the strategy (i.e. its SMA 200 - price ratio is over the threshold): BUY
+            if selected_symbol is not None:
+                symbol = symbols_data[selected_symbol]
 
-            # If the SMA 200 - price ratio is over the selected threshold: BUY
-            if symbol["historical_data"].iloc[i].SMA_200 / symbol["historical_data"].iloc[i].close > divergence_threshold:
                 # Getting the current balance
                 balance = transactions.iloc[-1].balance if len(transactions) > 0 else investment
 
                 # Computing the buying price
-                buy_price = symbol["historical_data"].iloc[i].SMA_200 / divergence_threshold
+                buy_price = strategy.buyPrice(features)[selected_symbol]
 
                 # Appending the transaction into a Pandas Dataframe
                 df = pd.DataFrame([[symbol["symbol"], symbol["historical_data"].iloc[i].time, buy_price, -1, -1, -1, -1, balance]])
@@ -182,10 +173,161 @@ def testStrategy(symbols_data, periods) -> pd.DataFrame:
     return transactions
 
 
+# Function to align the historical data of the symbols by timestamp into 2-D arrays (symbols x periods),
+# and the strategy's features into a 3-D array (symbols x features x periods)
+def alignSymbolsData(symbols_data, features=strategy.features) -> dict:
+    # Keeping only the timestamps available for every symbol
+    times = symbols_data[0]["historical_data"]["time"].to_numpy(dtype='int64')
+    for symbol_data in symbols_data[1:]:
+        times = np.intersect1d(times, symbol_data["historical_data"]["time"].to_numpy(dtype='int64'))
+
+    # Preallocating the arrays of the prices and of the indicators
+    aligned = {
+        "symbols": [symbol_data["symbol"] for symbol_data in symbols_data],
+        "time": times,
+        "close": np.empty((len(symbols_data), len(times)), dtype='float64'),
+        "high": np.empty((len(symbols_data), len(times)), dtype='float64')
+    }
+
+    if features is not None:
+        aligned["features"] = np.empty((len(symbols_data), len(features), len(times)), dtype='float64')
+
+    # Filling a row of each array for every symbol
+    for i, symbol_data in enumerate(symbols_data):
+        df = symbol_data["historical_data"]
+        rows = np.searchsorted(df["time"].to_numpy(dtype='int64'), times)
+        aligned["close"][i] = df["close"].to_numpy(dtype='float64')[rows]
+        aligned["high"][i] = df["high"].to_numpy(dtype='float64')[rows]
+        if features is not None:
+            for j, feature in enumerate(features):
+                aligned["features"][i, j] = df[feature].to_numpy(dtype='float64')[rows]
+
+    return aligned
+
+
+# Function to find the first period, starting from a given one, in which the high price reaches the target ratio
+def findSellPeriod(high_prices, buy_price, start, target_ratio) -> int:
+    # Scanning the prices in chunks of increasing size, so that both short and long holding times are cheap
+    chunk = 256
+    while start < len(high_prices):
+        end = min(start + chunk, len(high_prices))
+        hits = np.flatnonzero(high_prices[start:end] / buy_price > target_ratio)
+        if len(hits) > 0:
+            return start + int(hits[0])
+
+        start = end
+        chunk *= 2
+
+    return -1
+
+
+# Function to simulate the trading strategy over the aligned arrays of the symbols
+def simulateStrategy(aligned, periods, strategy=strategy, minimum_profit=0.003, buy_fees=buy_fees, sell_fees=sell_fees, investment=investment) -> pd.DataFrame:
+    times = aligned["time"]
+    high = aligned["high"]
+    features = aligned["features"][:, :, :periods]
+
+    # Scoring every symbol in every period at once and selecting the best symbol of each period
+    best_symbols, best_scores = strategy.rank(features)
+
+    # Extracting the periods in which a symbol is eligible (i.e. its SMA 200 - price ratio is over the threshold)
+    buy_periods = np.flatnonzero(best_scores > -np.inf)
+
+    # Preallocating the transactions' arrays
+    max_transactions = len(buy_periods)
+    symbols = np.empty(max_transactions, dtype='int64')
+    buy_timestamps = np.empty(max_transactions, dtype='int64')
+    buy_prices = np.empty(max_transactions, dtype='float64')
+    sell_timestamps = np.full(max_transactions, -1, dtype='int64')
+    sell_prices = np.full(max_transactions, -1, dtype='float64')
+    times_to_sell = np.full(max_transactions, -1, dtype='float64')
+    transactions_profits = np.full(max_transactions, -1, dtype='float64')
+    balances = np.empty(max_transactions, dtype='float64')
+
+    # Jumping from one position state transition to the next one
+    n = 0
+    period = 0
+    balance = investment
+    while True:
+        # Looking for the next buying period: BUY
+        k = np.searchsorted(buy_periods, period)
+        if k == len(buy_periods):
+            break
+
+        buy_period = buy_periods[k]
+        symbol = best_symbols[buy_period]
+        buy_price = strategy.buyPrice(features[:, :, buy_period])[symbol]
+
+        symbols[n] = symbol
+        buy_timestamps[n] = times[buy_period]
+        buy_prices[n] = buy_price
+        balances[n] = balance
+        n += 1
+
+        # Looking for the first period in which the price guarantees the minimum defined profit: SELL
+        sell_period = findSellPeriod(high[symbol, :periods], buy_price, buy_period + 1, 1 + minimum_profit)
+        if sell_period == -1:
+            break
+
+        # Computing the selling price and the net profit of the transaction according to the exchange fees
+        sell_price = (1 + minimum_profit) * buy_price
+
+        transaction_profit = (1 - buy_fees) * balance / buy_price
+        transaction_profit *= (1 - sell_fees) * sell_price
+        transaction_profit -= balance
+
+        # Updating the latest transaction with the selling information
+        sell_timestamps[n - 1] = times[sell_period]
+        sell_prices[n - 1] = sell_price
+        times_to_sell[n - 1] = (times[sell_period] - buy_timestamps[n - 1]) / (60 * 60 * 1000)
+        transactions_profits[n - 1] = transaction_profit
+        balance += transaction_profit
+        balances[n - 1] = balance
+
+        period = sell_period + 1
+
+    # If the latest transaction is incomplete, it is assumed to sell during the latest interval
+    if n > 0 and sell_timestamps[n - 1] == -1:
+        symbol = symbols[n - 1]
+        sell_price = aligned["close"][symbol, -1]
+
+        transaction_profit = (1 - buy_fees) * balances[n - 1] / buy_prices[n - 1]
+        transaction_profit *= (1 - sell_fees) * sell_price
+        transaction_profit -= balances[n - 1]
+
+        sell_timestamps[n - 1] = times[-1]
+        sell_prices[n - 1] = sell_price
+        times_to_sell[n - 1] = (times[-1] - buy_timestamps[n - 1]) / (60 * 60 * 1000)
+        transactions_profits[n - 1] = transaction_profit
+        balances[n - 1] += transaction_profit
+
+    # Building the transactions table
+    transactions = pd.DataFrame({
+        'symbol': np.array(aligned["symbols"], dtype=object)[symbols[:n]],
+        'buy_timestamp': buy_timestamps[:n],
+        'buy_price': buy_prices[:n],
+        'sell_timestamp': sell_timestamps[:n],
+        'sell_price': sell_prices[:n],
+        'time_to_sell': times_to_sell[:n],
+        'transaction_profit': transactions_profits[:n],
+        'balance': balances[:n]
+    })
+
+    return transactions
+
+
+# Function to test the trading strategy over a selected period with the vectorized engine
+def testStrategyVectorized(symbols_data, periods, strategy=strategy, minimum_profit=0.003) -> pd.DataFrame:
+    aligned = alignSymbolsData(symbols_data, features=strategy.features)
+    transactions = simulateStrategy(aligned, min(periods, len(aligned["time"])), strategy, minimum_profit)
+
+    return transactions
+
+
 if __name__ == "__main__":
     # Fetching the symbols' historical data from the Binance API
     if fetch_symbols_data:
-        client = Client(api_key=api_key, api_secret=api_secret)
+        client = ScheduledClient(api_key=api_key, api_secret=api_secret)
         fetchSymbolsData(symbols=symbols, interval=interval, lookback_months=12, lookback_days=30)
 
     # Loading the historical data from the local files
@@ -193,7 +335,7 @@ if __name__ == "__main__":
 
     # Backtesting the strategy on the available histaorical data
     periods = len(dataframes[0]["historical_data"])
-    transactions = testStrategy(dataframes, periods)
+    transactions = testStrategyVectorized(dataframes, periods)
 
     # Computing the winnig rate
     winning_rate = len(transactions.loc[transactions["transaction_profit"] > 0]) / len(transactions)
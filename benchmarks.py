@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import time
+import platform
+import contextlib
+import subprocess
+import indicators
+import backtesting
+import numpy as np
+import pandas as pd
+import datetime as dt
+from cryptoBot import CryptoBot
+from marketRecorder import readMessages
+from replayEngine import SimulatedClock
+from simulatedExchange import SimulatedExchange
+
+
+# Open time of the first synthetic candle
+start_time = 1_600_000_000_000
+
+
+# Function to generate a random walk of klines in the REST API format
+def syntheticKlines(candles, seed=0, interval_ms=60000, first_time=start_time) -> list:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, candles)))
+    open = np.r_[close[0], close[:-1]]
+    high = np.maximum(open, close) * (1 + np.abs(rng.normal(0, 0.001, candles)))
+    low = np.minimum(open, close) * (1 - np.abs(rng.normal(0, 0.001, candles)))
+    volume = rng.random(candles)
+
+    return [[first_time + i * interval_ms, str(open[i]), str(high[i]), str(low[i]), str(close[i]), str(volume[i])] for i in range(candles)]
+
+
+# Function to generate the kline websocket events of a symbol: either updates of the same candle, or a new candle each
+def syntheticKlineEvents(symbol, first_time, events, new_candles, seed=0) -> list:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, events)))
+
+    return [{
+        "e": "kline",
+        "E": first_time + i,
+        "s": symbol,
+        "k": {"t": first_time + (i * 60000 if new_candles else 0), "i": "1m", "o": "100", "h": str(max(close[i], 100)), "l": str(min(close[i], 100)), "c": str(close[i]), "v": "1", "x": False}
+    } for i in range(events)]
+
+
+# Function to load the kline events of a recording
+def recordedKlineEvents(path) -> list:
+    return [message["data"] for message in readMessages(path) if message["data"].get("e") == "kline"]
+
+
+# Function to time a function, returning the best time of a call in seconds over a number of repetitions
+def timeIt(function, repeat=5, number=1) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+
+    return best
+
+
+# Function to create a bot, and its DataCollector, working offline on a simulated exchange loaded with synthetic history ending at a given time
+def createBot(symbols, candles=360, end_time=start_time + 360 * 60000, worker_mode="inline") -> CryptoBot:
+    clock = SimulatedClock(start=end_time / 1000)
+    history = {symbol: syntheticKlines(candles, seed=i, first_time=end_time - candles * 60000) for i, symbol in enumerate(symbols)}
+    exchange = SimulatedExchange(clock=clock, history=history)
+
+    bot = CryptoBot(api_key=None, api_secret=None, symbols=symbols, minumum_profit=1.003, client=exchange, offline=True, clock=clock, worker_mode=worker_mode)
+    bot.data_collector.start()
+
+    return bot
+
+
+# Function to benchmark the kline callback of the DataCollector
+def benchmarkUpdateSymbolsData(events=20000, recording=None) -> dict:
+    results = {}
+    if recording is not None:
+        scenarios = {"recorded": recordedKlineEvents(recording)}
+        bot = createBot(sorted(set(event["s"] for event in scenarios["recorded"])), end_time=min(event["k"]["t"] for event in scenarios["recorded"]))
+    else:
+        bot = createBot(["BTCUSDT"])
+        last_time = bot.data_collector.getSymbolStore("BTCUSDT").lastTime()
+        scenarios = {
+            "same_candle": syntheticKlineEvents("BTCUSDT", last_time, events, new_candles=False),
+            "new_candle": syntheticKlineEvents("BTCUSDT", last_time + 60000, events, new_candles=True)
+        }
+
+    update = bot.data_collector._DataCollector__updateSymbolsData
+    for scenario, messages in scenarios.items():
+        start = time.perf_counter()
+        for message in messages:
+            update(message)
+        elapsed_time = time.perf_counter() - start
+
+        results[f'dataCollector.updateSymbolsData.{scenario}'] = {"messages": len(messages), "messages_per_second": len(messages) / elapsed_time}
+
+    return results
+
+
+# Function to benchmark the batch indicators across windows and series lengths
+def benchmarkIndicators(lengths=[1000, 10000, 100000], windows=[14, 50, 200]) -> dict:
+    results = {}
+    functions = {
+        "SMA": lambda close, window: indicators.SMA(close, window=window),
+        "EMA": lambda close, window: indicators.EMA(close, window=window),
+        "RSI": lambda close, window: indicators.RSI(close, window=window),
+        "MACD": lambda close, window: indicators.MACD(close, windows=[window, 2 * window, 9]),
+        "BOLL": lambda close, window: indicators.BOLL(close, window=window)
+    }
+
+    for length in lengths:
+        close = pd.Series([float(kline[4]) for kline in syntheticKlines(length)])
+        for name, function in functions.items():
+            for window in windows:
+                seconds = timeIt(lambda: function(close, window))
+                results[f'indicators.{name}.window={window}.length={length}'] = {"seconds": seconds}
+
+    return results
+
+
+# Function to benchmark the strategy evaluation of the bot across symbol counts and worker pool modes
+def benchmarkBuyingStrategy(symbols_counts=[1, 10, 50, 100], worker_modes=["inline", "threads", "processes"]) -> dict:
+    results = {}
+    for worker_mode in worker_modes:
+        for symbols_count in symbols_counts:
+            bot = createBot([f'SYM{i}USDT' for i in range(symbols_count)], worker_mode=worker_mode)
+            seconds = timeIt(lambda: bot._CryptoBot__buyingStrategy(), repeat=5, number=20)
+            bot.worker_pool.close()
+
+            suffix = f'.mode={worker_mode}' if worker_mode != "inline" else ''
+            results[f'cryptoBot.buyingStrategy.symbols={symbols_count}{suffix}'] = {"seconds": seconds}
+
+    return results
+
+
+# Function to benchmark the reference and the vectorized backtesting engines
+def benchmarkBacktesting(reference_periods=2000, vectorized_periods=200000, symbols_count=10) -> dict:
+    results = {}
+    for engine, periods, function in [("testStrategy", reference_periods, backtesting.testStrategy), ("testStrategyVectorized", vectorized_periods, backtesting.testStrategyVectorized)]:
+        symbols_data = []
+        for i in range(symbols_count):
+            df = pd.DataFrame(syntheticKlines(periods, seed=i), columns=["time", "open", "high", "low", "close", "volume"]).astype("float64").astype({"time": "int64"})
+            backtesting.applyIndicators(df)
+            symbols_data.append({"symbol": f'SYM{i}USDT', "historical_data": df})
+
+        # The reference engine reports its progress on the standard output
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull if engine == "testStrategy" else sys.stdout):
+            seconds = timeIt(lambda: function(symbols_data, periods), repeat=1 if engine == "testStrategy" else 3)
+
+        results[f'backtesting.{engine}.symbols={symbols_count}'] = {"periods": periods, "periods_per_second": periods / seconds}
+
+    return results
+
+
+# Function to get the information identifying the environment of a run
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except Exception:
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": dt.datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor()
+    }
+
+
+# Function to compare the results with a baseline, returning the metrics which changed by more than a tolerance
+def compare(results, baseline, tolerance=0.1) -> list:
+    changes = []
+    for name, metrics in results["results"].items():
+        for metric, value in metrics.items():
+            baseline_value = baseline["results"].get(name, {}).get(metric)
+            if baseline_value is None or metric in ("messages", "periods") or baseline_value == 0:
+                continue
+
+            # The lower the better for times, the higher the better for throughputs
+            ratio = value / baseline_value
+            regression = ratio > 1 + tolerance if metric == "seconds" else ratio < 1 - tolerance
+            improvement = ratio < 1 - tolerance if metric == "seconds" else ratio > 1 + tolerance
+            if regression or improvement:
+                changes.append({"benchmark": name, "metric": metric, "baseline": baseline_value, "value": value, "ratio": ratio, "regression": regression})
+
+    return changes
+
+
+# Function to run all the benchmarks
+def run(quick=False, recording=None) -> dict:
+    results = {}
+    results.update(benchmarkUpdateSymbolsData(events=5000 if quick else 50000, recording=recording))
+    results.update(benchmarkIndicators(lengths=[1000, 10000] if quick else [1000, 10000, 100000]))
+    results.update(benchmarkBuyingStrategy(symbols_counts=[1, 10] if quick else [1, 10, 50, 100]))
+    results.update(benchmarkBacktesting(reference_periods=300 if quick else 2000, vectorized_periods=20000 if quick else 200000))
+
+    return {"environment": environment(), "results": results}
+
+
+if __name__ == "__main__":
+    # Usage: python benchmarks.py [output JSON file | -] [baseline JSON file] [recordings] [--quick]
+    quick = "--quick" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--quick"]
+    output = args[0] if len(args) > 0 and args[0] != "-" else None
+    baseline = args[1] if len(args) > 1 and args[1] != "-" else None
+    recording = args[2] if len(args) > 2 and args[2] != "-" else None
+
+    results = run(quick=quick, recording=recording)
+
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=4)
+    else:
+        print(json.dumps(results, indent=4))
+
+    # Comparing the results with the baseline and failing on regressions
+    if baseline is not None:
+        with open(baseline, 'r') as f:
+            changes = compare(results, json.load(f))
+
+        for change in changes:
+            print(f'{"REGRESSION" if change["regression"] else "Improvement"} - {change["benchmark"]} | {change["metric"]}: {change["baseline"]:.6g} --> {change["value"]:.6g} ({change["ratio"]:.2f}x)')
+
+        if any(change["regression"] for change in changes):
+            sys.exit(1)
@@ -0,0 +1,95 @@
+import numpy as np
+from candleStore import CandleStore
+from binance.helpers import interval_to_milliseconds
+
+
+# Aggregator deriving the bars of a higher interval from the candles of a base interval, updated in O(1) per base candle update
+class CandleAggregator:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, base_interval, interval, base_capacity) -> None:
+        # Initializing object's attributes
+        self.base_interval = base_interval
+        self.interval = interval
+        self.base_interval_ms = interval_to_milliseconds(base_interval)
+        self.interval_ms = interval_to_milliseconds(interval)
+
+        # The bars are aligned to the epoch, which holds for the intervals up to a day
+        if self.interval_ms is None or self.interval_ms % self.base_interval_ms != 0 or interval[-1] in ("w", "M"):
+            raise Exception(f'Interval {interval} can not be aggregated from {base_interval} candles')
+
+        # Creating the store of the aggregated bars, sized to cover the window of the base candles
+        self.store = CandleStore(capacity=base_capacity * self.base_interval_ms // self.interval_ms + 2)
+
+        # State of the current bar: its open time, the aggregation of its closed base candles and the open time of its live base candle
+        self.bar_time = None
+        self.closed = None
+        self.live_time = None
+        self.live = None
+
+
+    # Function to combine two OHLCV tuples, the first one being the oldest
+    def __combine(self, first, second) -> tuple:
+        if first is None:
+            return tuple(second)
+
+        return (first[0], max(first[1], second[1]), min(first[2], second[2]), second[3], first[4] + second[4])
+
+
+    """ PUBLIC METHODS """
+    # Function to rebuild the bars from a batch of base candles (times and OHLCV values as one row per column, oldest first)
+    def load(self, times, values) -> None:
+        times = np.asarray(times, dtype='int64')
+        values = np.asarray(values, dtype='float64')
+
+        self.bar_time = None
+        self.closed = None
+        self.live_time = None
+        self.live = None
+
+        if len(times) == 0:
+            self.store.load([], np.empty((0, 5)))
+            return
+
+        # Grouping the base candles by the open time of the bar they belong to
+        bars_times = times - times % self.interval_ms
+        starts = np.flatnonzero(np.r_[True, bars_times[1:] != bars_times[:-1]])
+        ends = np.r_[starts[1:], len(times)] - 1
+
+        self.store.load(bars_times[starts], np.column_stack([
+            values[0, starts],
+            np.maximum.reduceat(values[1], starts),
+            np.minimum.reduceat(values[2], starts),
+            values[3, ends],
+            np.add.reduceat(values[4], starts)
+        ]))
+
+        # Restoring the state of the current bar, split into its closed base candles and the live one
+        last_start = starts[-1]
+        self.bar_time = int(bars_times[-1])
+        self.live_time = int(times[-1])
+        self.live = tuple(values[:, -1])
+        for i in range(last_start, len(times) - 1):
+            self.closed = self.__combine(self.closed, values[:, i])
+
+
+    # Function to apply an update of the latest base candle, or the opening of a new one
+    def update(self, time, values) -> None:
+        bar_time = time - time % self.interval_ms
+
+        # A new bar starts with the new base candle
+        if bar_time != self.bar_time:
+            self.bar_time = bar_time
+            self.closed = None
+            self.live_time = time
+            self.live = values
+            self.store.append(bar_time, values)
+            return
+
+        # A new base candle within the current bar: the previous one is closed
+        if time != self.live_time:
+            self.closed = self.__combine(self.closed, self.live)
+            self.live_time = time
+
+        self.live = values
+        self.store.update(bar_time, self.__combine(self.closed, values))
@@ -0,0 +1,239 @@
+import time
+import atexit
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+
+# Ring buffer of the latest candles of a symbol, written by a single thread and read by any thread or process.
+# The writes are guarded by a sequence lock: the sequence number is odd while a write is in progress, so that the readers
+# can compute on views of the buffers without copying them, and retry if a write overlapped their read.
+class CandleStore:
+    """ PRIVATE METHODS """
+    # Class constructor.
+    # With shared=True the buffers are allocated in a shared memory block, which other processes attach to by its name.
+    def __init__(self, capacity, shared=False, name=None) -> None:
+        # Initializing object's attributes
+        self.capacity = max(int(capacity), 1)
+        self.columns = ['open', 'high', 'low', 'close', 'volume']
+        self.start = 0
+        self.size = 0
+
+        # Preallocating the buffers. Every candle is written twice (at its slot and at slot + capacity),
+        # so that the window of the latest candles is always a contiguous slice of the buffers.
+        # The header holds the sequence number, the start and the size of the window, as published to the readers
+        # (a plain list, cheaper to update, unless it has to be shared with other processes).
+        self.shared_memory = None
+        if shared or name is not None:
+            self.__allocateShared(name)
+        else:
+            self.header = [0, 0, 0]
+            self.times = np.zeros(2 * self.capacity, dtype='int64')
+            self.values = np.zeros((len(self.columns), 2 * self.capacity), dtype='float64')
+
+
+    # Function to create the buffers in a new shared memory block, or to map them on an existing one
+    def __allocateShared(self, name) -> None:
+        header_size = 3 * 8
+        times_size = 2 * self.capacity * 8
+        values_size = len(self.columns) * 2 * self.capacity * 8
+
+        # The block is owned by the store which created it, and released when the process exits
+        self.owner = name is None
+        if self.owner:
+            self.shared_memory = shared_memory.SharedMemory(create=True, size=header_size + times_size + values_size)
+            atexit.register(self.close)
+        else:
+            self.shared_memory = shared_memory.SharedMemory(name=name)
+
+        self.header = np.ndarray((3,), dtype='int64', buffer=self.shared_memory.buf)
+        self.times = np.ndarray((2 * self.capacity,), dtype='int64', buffer=self.shared_memory.buf, offset=header_size)
+        self.values = np.ndarray((len(self.columns), 2 * self.capacity), dtype='float64', buffer=self.shared_memory.buf, offset=header_size + times_size)
+
+        # An attached store starts from the window published by the owner
+        if not self.owner:
+            self.start = int(self.header[1])
+            self.size = int(self.header[2])
+
+
+    # Function to mark the beginning of a write
+    def __beginWrite(self) -> None:
+        self.header[0] += 1
+
+
+    # Function to publish the window and to mark the end of a write
+    def __endWrite(self) -> None:
+        self.header[1] = self.start
+        self.header[2] = self.size
+        self.header[0] += 1
+
+
+    # Function to write a candle in both the mirrored positions of a slot
+    def __write(self, slot, time, values) -> None:
+        self.times[slot] = time
+        self.times[slot + self.capacity] = time
+        self.values[:, slot] = values
+        self.values[:, slot + self.capacity] = values
+
+
+    # Function to get the number of candles in the store
+    def __len__(self) -> int:
+        return self.size
+
+
+    """ PUBLIC METHODS """
+    # Function to load a batch of candles (oldest first) into the store, replacing its content
+    def load(self, times, values) -> None:
+        times = np.asarray(times, dtype='int64')[-self.capacity:]
+        values = np.asarray(values, dtype='float64').reshape(-1, len(self.columns))[-self.capacity:]
+
+        self.__beginWrite()
+        self.start = 0
+        self.size = len(times)
+        self.times[:self.size] = times
+        self.times[self.capacity:self.capacity + self.size] = times
+        self.values[:, :self.size] = values.T
+        self.values[:, self.capacity:self.capacity + self.size] = values.T
+        self.__endWrite()
+
+
+    # Function to append a new candle, overwriting the oldest one if the store is full
+    def append(self, time, values) -> None:
+        self.__beginWrite()
+        if self.size < self.capacity:
+            self.__write(self.size, time, values)
+            self.size += 1
+
+        else:
+            self.__write(self.start, time, values)
+            self.start = (self.start + 1) % self.capacity
+        self.__endWrite()
+
+
+    # Function to update in place the candle with the given open time
+    def update(self, time, values) -> bool:
+        if self.size == 0:
+            return False
+
+        # Fast path: the candle being updated is the latest one
+        last = self.start + self.size - 1
+        if self.times[last] == time:
+            self.__beginWrite()
+            self.__write(last % self.capacity, time, values)
+            self.__endWrite()
+            return True
+
+        # Looking for an older candle within the window
+        times = self.times[self.start:self.start + self.size]
+        index = int(np.searchsorted(times, time))
+        if index < self.size and times[index] == time:
+            self.__beginWrite()
+            self.__write((self.start + index) % self.capacity, time, values)
+            self.__endWrite()
+            return True
+
+        return False
+
+
+    # Function to apply a function to consistent read-only views of the open times and of the OHLCV values (one row per column),
+    # from any thread or process. The function may be run again if a write overlaps it, so it must not keep the views nor have side effects.
+    def read(self, function):
+        while True:
+            sequence = int(self.header[0])
+            if sequence % 2 == 0:
+                start = int(self.header[1])
+                size = int(self.header[2])
+                times = self.times[start:start + size]
+                values = self.values[:, start:start + size]
+                times.flags.writeable = False
+                values.flags.writeable = False
+
+                result = function(times, values)
+                if int(self.header[0]) == sequence:
+                    return result
+
+            # Yielding to the writer before trying again
+            time.sleep(0)
+
+
+    # Function to get a consistent copy of the window as a dataframe
+    def snapshot(self) -> pd.DataFrame:
+        return self.read(lambda times, values: pd.DataFrame(values.T.copy(), index=pd.Index(times.copy(), name="time"), columns=self.columns))
+
+
+    # Function to get the open time of the latest candle (to be used by the writer's thread)
+    def lastTime(self) -> int:
+        return int(self.times[self.start + self.size - 1]) if self.size > 0 else None
+
+
+    # Function to get a consistent copy of the latest candle as a dictionary
+    def last(self) -> dict:
+        def lastCandle(times, values):
+            if len(times) == 0:
+                return None
+
+            candle = {column: float(values[i, -1]) for i, column in enumerate(self.columns)}
+            candle["time"] = int(times[-1])
+
+            return candle
+
+        return self.read(lastCandle)
+
+
+    # Function to get read-only views of the open times and of the OHLCV values (one row per column), to be used by the writer's thread
+    def view(self) -> tuple:
+        times = self.times[self.start:self.start + self.size]
+        values = self.values[:, self.start:self.start + self.size]
+        times.flags.writeable = False
+        values.flags.writeable = False
+
+        return times, values
+
+
+    # Function to get a read-only view of a single column, to be used by the writer's thread
+    def column(self, column) -> np.ndarray:
+        values = self.values[self.columns.index(column), self.start:self.start + self.size]
+        values.flags.writeable = False
+
+        return values
+
+
+    # Function to get the information needed by another process to attach to the store: the shared memory block's name and the capacity
+    def descriptor(self) -> tuple:
+        if self.shared_memory is None:
+            raise Exception('The candle store is not allocated in shared memory')
+
+        return (self.shared_memory.name, self.capacity)
+
+
+    # Function to release the shared memory block, unlinking it if it was created by this store.
+    # The buffers are copied to the private memory first, so that the store remains usable.
+    def close(self) -> None:
+        if self.shared_memory is None:
+            return
+
+        self.header = [int(value) for value in self.header]
+        self.times = self.times.copy()
+        self.values = self.values.copy()
+
+        # Views of the block still referenced elsewhere (i.e. dataframes) keep it mapped until they are released
+        try:
+            self.shared_memory.close()
+        except BufferError:
+            pass
+
+        if self.owner:
+            try:
+                self.shared_memory.unlink()
+            except FileNotFoundError:
+                pass
+
+        self.shared_memory = None
+
+
+    # Function to get a dataframe backed by the store's buffers, without copying them, to be used by the writer's thread
+    def toDataFrame(self) -> pd.DataFrame:
+        times, values = self.view()
+        dataframe = pd.DataFrame(values.T, index=pd.Index(times, name="time"), columns=self.columns, copy=False)
+
+        return dataframe
@@ -1,18 +1,21 @@
 import math
 import time
 import utils
+import asyncio
 import threading
-import indicators
-import datetime as dt
-import concurrent.futures
-from binance.client import Client
+import numpy as np
+from functools import partial
+from symbolsInfo import SymbolsInfo
 from dataCollector import DataCollector
+from strategies import SMADivergenceStrategy
+from workerPool import WorkerPool, storesFeatures
+from restScheduler import RestScheduler, ScheduledClient
 
 
 class CryptoBot:
     """ PRIVATE METHODS """
     # Class constructor
-    def __init__(self, api_key, api_secret, symbols, minumum_profit, against_symbol="USDT", interval="1m") -> None:
+    def __init__(self, api_key, api_secret, symbols, minumum_profit, against_symbol="USDT", interval="1m", debounce=0.0, max_positions=1, multiplex=False, client=None, offline=False, clock=None, recorder=None, aggregate_intervals=None, strategy=None, metrics=None, worker_mode="inline", workers=None, async_client=None, checkpoint_path=None) -> None:
         # Initializing object's attributes
         self.symbols = symbols
         self.against_symbol = against_symbol
@@ -20,11 +23,36 @@ class CryptoBot:
         self.interval = interval
         self.buy_fees = 0.00075
         self.sell_fees = 0.00075
-        self.open_position = False
         self.timeout = 60
+        self.final_statuses = ("FILLED", "CANCELED", "REJECTED", "EXPIRED")
+        self.debounce = debounce
 
-        # Instantiating the Binance API Client
-        self.client = Client(api_key=api_key, api_secret=api_secret)
+        # Buying strategy, scoring all the symbols at once on their latest features
+        self.strategy = strategy if strategy is not None else SMADivergenceStrategy(window=200, threshold=1.01)
+
+        # Initializing the portfolio: the symbols held by the position slots, the capital reserved for their buying orders
+        # and the ids of the buying orders placed whose locked funds are not yet reflected by the balances
+        self.max_positions = max_positions
+        self.positions = {}
+        self.reservations = {}
+        self.reserved_orders = {}
+        self.portfolio_lock = threading.Lock()
+
+        # Clock measuring the orders' age: the wall clock by default, or a simulated one
+        self.clock = clock if clock is not None else time.time
+
+        # Metrics registry, if any: the trading path is instrumented only when it is provided
+        self.metrics = metrics
+
+        # Instantiating the persistent pool of workers computing the symbols' features at every strategy pass
+        self.worker_pool = WorkerPool(mode=worker_mode, workers=workers)
+
+        # Instantiating the Binance API Client, unless an equivalent one is provided (i.e. a simulated exchange).
+        # The client is shared by the bot, the DataCollector and the symbols' exchange filters, so that all their requests are scheduled together.
+        self.client = client if client is not None else ScheduledClient(api_key=api_key, api_secret=api_secret, scheduler=RestScheduler(metrics=metrics))
+
+        # Instantiating the cache of the symbols' exchange filters
+        self.symbols_info = SymbolsInfo(client=self.client, symbols=self.symbols)
 
         # Instantiating the DataCollector object
         self.data_collector = DataCollector(
@@ -32,40 +60,28 @@ class CryptoBot:
             api_secret=api_secret, 
             symbols=self.symbols, 
             against_symbol=self.against_symbol, 
-            interval=self.interval
+            interval=self.interval,
+            indicators=self.strategy.liveIndicators(),
+            multiplex=multiplex,
+            client=self.client,
+            offline=offline,
+            clock=clock,
+            recorder=recorder,
+            aggregate_intervals=aggregate_intervals,
+            metrics=metrics,
+            shared_stores=self.worker_pool.mode == "processes",
+            async_client=async_client,
+            checkpoint_path=checkpoint_path
         )
 
-
-    # Function to get the number of decimal digits for a specific symbol
-    def __getDecimals(self, symbol) -> tuple:
-        # Collecting the information of a symbol
-        symbol_info = self.client.get_symbol_info(symbol)
-
-        # Extracting the filters of the symbol
-        lot_size = [filter for filter in symbol_info["filters"] if filter["filterType"] == "LOT_SIZE"][0]
-        price_filter = [filter for filter in symbol_info["filters"] if filter["filterType"] == "PRICE_FILTER"][0]
-
-        # Extracting the sizes for each filter
-        sizes = [lot_size["stepSize"], price_filter["tickSize"]]
-
-        # Computing the number of decimals of each symbol's size
-        decimals = []
-        for size in sizes:
-            filter_decimals = 0
-            is_decimal = False
-            for c in size:
-                if is_decimal is True:
-                    filter_decimals += 1
-                if c == '1':
-                    break
-                if c == '.':
-                    is_decimal = True
-
-            decimals.append(filter_decimals)
-
-        decimals = tuple(decimals)
-
-        return decimals
+        # Timing the strategy evaluation and the orders' submission
+        if self.metrics is not None:
+            self.__symbolsData = self.metrics.timed("symbols_data_seconds", self.__symbolsData)
+            self.__buyingStrategy = self.metrics.timed("buying_strategy_seconds", self.__buyingStrategy)
+            self.__buyOrder = self.metrics.timed("order_submission_seconds", self.__buyOrder, labels={"side": "BUY"})
+            self.__sellOrder = self.metrics.timed("order_submission_seconds", self.__sellOrder, labels={"side": "SELL"})
+            self.__buyOrderAsync = self.metrics.timedAsync("order_submission_seconds", self.__buyOrderAsync, labels={"side": "BUY"})
+            self.__sellOrderAsync = self.metrics.timedAsync("order_submission_seconds", self.__sellOrderAsync, labels={"side": "SELL"})
 
 
     # Function to truncate a number after a specific number of decimals
@@ -76,24 +92,33 @@ class CryptoBot:
         return truncated_number
     
 
-    # Function to open a buying order for a specific symbol at a given price
-    def __buyOrder(self, symbol, price, amount) -> str:
-        # Getting the number of decimals required for the selected symbol
-        quantity_decimals, price_decimals = self.__getDecimals(symbol)
+    # Function to compute the parameters of a buying order for a specific symbol at a given price
+    def __buyOrderParams(self, symbol, price, amount) -> dict:
+        # Getting the cached exchange filters of the selected symbol
+        symbol_info = self.symbols_info.getSymbolInfo(symbol)
 
         # Rearranging the quantity and the price according to the symbol's rules
         quantity = amount / price
-        quantity = self.__truncateNumber(quantity, quantity_decimals)
+        quantity = self.__truncateNumber(quantity, symbol_info["quantity_decimals"])
+
+        price = round(price, symbol_info["price_decimals"])
+
+        # Checking the order against the minimum quantity and the minimum notional value of the symbol
+        if quantity < symbol_info["min_quantity"]:
+            raise Exception(f'Order quantity below the minimum quantity of {symbol_info["min_quantity"]} {symbol}')
+
+        if quantity * price < symbol_info["min_notional"]:
+            raise Exception(f'Order value below the minimum notional of {symbol_info["min_notional"]} {self.against_symbol}')
 
-        price = round(price, price_decimals)
         price = format(price, f'.8f')
 
+        return {"symbol": symbol, "quantity": quantity, "price": price}
+
+
+    # Function to open a buying order for a specific symbol at a given price
+    def __buyOrder(self, symbol, price, amount) -> str:
         # Creating the buying order
-        order = self.client.order_limit_buy(
-            symbol=symbol,
-            quantity=quantity,
-            price=price
-        )
+        order = self.client.order_limit_buy(**self.__buyOrderParams(symbol, price, amount))
 
         # Extracting order id
         order_id = order["orderId"]
@@ -101,10 +126,17 @@ class CryptoBot:
         return order_id
 
 
-    # Function to open a selling order for a specific symbol at a given price
-    def __sellOrder(self, symbol, price, amount) -> str:
-        # Getting the number of decimals required for the selected symbol
-        quantity_decimals, price_decimals = self.__getDecimals(symbol)
+    # Coroutine to open a buying order for a specific symbol at a given price, over the asynchronous client
+    async def __buyOrderAsync(self, symbol, price, amount) -> str:
+        order = await self.data_collector.async_client.order_limit_buy(**self.__buyOrderParams(symbol, price, amount))
+
+        return order["orderId"]
+
+
+    # Function to compute the parameters of a selling order for a specific symbol at a given price
+    def __sellOrderParams(self, symbol, price, amount) -> dict:
+        # Getting the cached exchange filters of the selected symbol
+        symbol_info = self.symbols_info.getSymbolInfo(symbol)
 
         # Fetching the quantity of the crypto to sell 
         symbol_balance = self.data_collector.getAssetBalance(symbol.replace(self.against_symbol, ""))
@@ -113,192 +145,403 @@ class CryptoBot:
         quantity = amount if amount <= symbol_balance else symbol_balance
 
         # Rearranging the quantity and the price according to the symbol's rules
-        quantity = self.__truncateNumber(quantity, quantity_decimals)
+        quantity = self.__truncateNumber(quantity, symbol_info["quantity_decimals"])
 
-        price = round(price, price_decimals)
+        # Checking the order against the minimum quantity of the symbol
+        if quantity < symbol_info["min_quantity"]:
+            raise Exception(f'Order quantity below the minimum quantity of {symbol_info["min_quantity"]} {symbol}')
+
+        price = round(price, symbol_info["price_decimals"])
         price = format(price, f'.8f')
 
+        return {"symbol": symbol, "quantity": quantity, "price": price}
+
+
+    # Function to open a selling order for a specific symbol at a given price
+    def __sellOrder(self, symbol, price, amount) -> str:
         # Creating the selling order
-        order = self.client.order_limit_sell(
-            symbol=symbol,
-            quantity=quantity,
-            price=price
-        )
+        order = self.client.order_limit_sell(**self.__sellOrderParams(symbol, price, amount))
 
         # Extracting order id
         order_id = order["orderId"]
 
         return order_id
 
+
+    # Coroutine to open a selling order for a specific symbol at a given price, over the asynchronous client
+    async def __sellOrderAsync(self, symbol, price, amount) -> str:
+        order = await self.data_collector.async_client.order_limit_sell(**self.__sellOrderParams(symbol, price, amount))
+
+        return order["orderId"]
+
     
-    # Function to compute the required indicators of a given symbol
-    def __computeIndicators(self, dataframe) -> tuple:
-        # Computing the Simple Moving Average 200
-        dataframe["SMA_200"] = indicators.SMA(dataframe["close"], window=200)
+    # Function to collect the latest features of a symbol required by the strategy, from its latest candle and its inidcators
+    def __symbolData(self, symbol) -> list:
+        # Getting the symbol's snapshot, published by the DataCollector at every kline, so that the candle and the indicators are consistent
+        snapshot = self.data_collector.getSymbolSnapshot(symbol)
 
+        return [snapshot[feature] for feature in self.strategy.features]
 
-    # Function to collect the data of a symbol and to compute the required inidcators
-    def __symbolData(self, symbol) -> dict:
-        # Getting the symbol's data from the DataCollector object
-        dataframe = self.data_collector.getSymbolData(symbol)
 
-        # Computing the required indicators
-        self.__computeIndicators(dataframe)
+    # Function to collect the latest features of a batch of symbols
+    def __symbolsBatchData(self, symbols) -> list:
+        return [self.__symbolData(symbol) for symbol in symbols]
 
-        return {"symbol": symbol, "historical_data": dataframe}
 
+    # Function to collect the features of the symbols in the list into an array (symbols x features)
+    def __symbolsData(self, symbols) -> np.ndarray:
+        if len(symbols) == 0:
+            return np.empty((0, len(self.strategy.features)))
 
-    # Function to collect the data of all the symbols in the list and compute the required inidcators
-    def __symbolsData(self) -> list:
-        symbols_data = []
+        # Fetching the features of every symbol in the list by the worker pool, keeping the order of the list.
+        # The worker processes compute the features from the candle windows in shared memory, instead of the streaming indicators.
+        if self.worker_pool.mode == "processes":
+            descriptors = [self.data_collector.getSymbolStore(symbol).descriptor() for symbol in symbols]
+            symbols_data = self.worker_pool.map(partial(storesFeatures, self.strategy), descriptors)
+        else:
+            symbols_data = self.worker_pool.map(self.__symbolsBatchData, symbols)
 
-        # Fetching the data and computing the indicators for every symbol in the list
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.symbols)) as executor:
-            futures = {executor.submit(self.__symbolData, symbol): symbol for symbol in self.symbols}
-            for future in concurrent.futures.as_completed(futures):
-                symbols_data.append(future.result())
+        return np.array(symbols_data, dtype='float64')
 
-        return symbols_data
 
+    # Function to wait until the symbols' data change with respect to the last evaluated version
+    def __waitForData(self, version) -> int:
+        # The first evaluation runs immediately
+        if version is None:
+            return self.data_collector.getVersion()
 
-    # Function defining the buying strategy
-    def __buyingStrategy(self) -> dict:
-        # Getting the data of the symbols
-        symbols_data = self.__symbolsData()
+        # Waiting for a kline update
+        self.data_collector.waitForUpdate(version, timeout=self.timeout)
 
-        # Filtering symbols whose close price il lower than the SMA 200 
-        symbols_data = [symbol_data for symbol_data in symbols_data if symbol_data["historical_data"].iloc[-1].SMA_200 / symbol_data["historical_data"].iloc[-1].close >= 1.01]
+        # Waiting for the debounce period, so that bursts of updates are evaluated only once
+        if self.debounce > 0:
+            time.sleep(self.debounce)
 
-        if len(symbols_data) > 0:
-            # Sorting the symbols according to the highest SMA - price ratio
-            symbols_data.sort(key=lambda symbol_data: (symbol_data["historical_data"].iloc[-1].SMA_200 / symbol_data["historical_data"].iloc[-1].close), reverse=True)
+        return self.data_collector.getVersion()
 
-            # Selecting the symbol to invest in as the one with the highest SMA - price ratio
-            selected_symbol = symbols_data[0]
 
-            return selected_symbol
+    # Function applying the buying strategy, ignoring the symbols already held by other positions
+    def __buyingStrategy(self, excluded_symbols=()) -> dict:
+        # Getting the features of the symbols
+        symbols = [symbol for symbol in self.symbols if symbol not in excluded_symbols]
+        symbols_data = self.__symbolsData(symbols)
 
-        else:
+        # Scoring all the symbols at once and selecting the one with the highest score, if any is eligible
+        selected_symbol, score = self.strategy.select(symbols_data)
+        if selected_symbol is None:
             return None
 
+        return {"symbol": symbols[selected_symbol], "score": score, "price": float(self.strategy.buyPrice(symbols_data)[selected_symbol])}
+
+
+    # Function to select a buying opportunity for a position slot and to reserve the capital to invest in it
+    def __openPosition(self, slot) -> tuple:
+        with self.portfolio_lock:
+            # Looking for a buying opportunity among the symbols not held by other positions
+            buy_opportunity = self.__buyingStrategy(excluded_symbols=set(self.positions.values()))
+            if buy_opportunity is None:
+                return None, None
+
+            # Allocating the capital not yet reserved evenly across the free position slots
+            self.__releaseSettledReservations()
+            balance = self.data_collector.getAssetBalance(self.against_symbol)
+            available = float(balance["free"]) - sum(self.reservations.values())
+            free_slots = self.max_positions - len(self.positions)
+            investment = max(available, 0.0) / free_slots
+
+            # Reserving the capital and the symbol for the slot
+            self.positions[slot] = buy_opportunity["symbol"]
+            self.reservations[slot] = investment
+
+            return buy_opportunity, investment
+
+
+    # Function to keep the capital reserved by a position slot until the balances reflect the funds locked by its buying order
+    def __reserveOrder(self, slot, order_id) -> None:
+        with self.portfolio_lock:
+            self.reserved_orders[slot] = order_id
+
+
+    # Function to release the capital reserved by the position slots whose buying orders are settled: from then on the exchange
+    # holds the capital as locked, so it is no longer among the free balance (the caller must hold the lock)
+    def __releaseSettledReservations(self) -> None:
+        for slot, order_id in list(self.reserved_orders.items()):
+            if self.data_collector.isOrderSettled(order_id):
+                self.reserved_orders.pop(slot)
+                self.reservations.pop(slot, None)
+
+
+    # Function to free a position slot
+    def __closePosition(self, slot) -> None:
+        with self.portfolio_lock:
+            self.reservations.pop(slot, None)
+            self.reserved_orders.pop(slot, None)
+            self.positions.pop(slot, None)
+
+
+    # Function to count an order's event (i.e. its creation or its final status) and an error, if any
+    def __countOrder(self, side, event, error=False) -> None:
+        if self.metrics is not None:
+            self.metrics.inc("orders_total", labels={"side": side, "event": event})
+            if error:
+                self.metrics.inc("errors_total", labels={"source": f'{side.lower()}_order'})
+
+
+    # Function to observe the time elapsed since the arrival of the latest kline, in seconds
+    def __observeTick(self, name) -> None:
+        if self.metrics is not None and self.data_collector.getLastKlineArrival() is not None:
+            self.metrics.observe(name, time.perf_counter() - self.data_collector.getLastKlineArrival())
+
+
+    # Function to handle a buy opportunity found for a position slot
+    def __buyOpportunityFound(self, buy_opportunity) -> None:
+        self.__observeTick("tick_to_decision_seconds")
+
+        # Logging operation
+        utils.log(f'Buying opportunity found - Symbol: {buy_opportunity["symbol"]} | Buying price: {buy_opportunity["price"]} {self.against_symbol}')
+
+
+    # Function to handle the creation of a buying order, whose capital is now locked by the exchange
+    def __buyOrderCreated(self, slot, buy_order_id) -> None:
+        self.__reserveOrder(slot, buy_order_id)
+        self.__observeTick("tick_to_order_seconds")
+        self.__countOrder("BUY", "CREATED")
+
+        # Logging operation
+        utils.log(f'Buying order created - Id: {buy_order_id}')
+
+
+    # Function to handle an error creating a buying order, freeing the position slot
+    def __buyOrderFailed(self, slot, e) -> None:
+        utils.log(f'Error creating buying order: {str(e)}')
+        self.__countOrder("BUY", "FAILED", error=True)
+        self.__closePosition(slot)
+
+
+    # Function to check if a buying order has been filled
+    def __isFilled(self, order) -> bool:
+        return order["status"] == "FILLED" or (order["status"] == "TRADE" and order["filled_quantity"] >= order["quantity"])
+
+
+    # Function to check if a buying order has been partially filled
+    def __isPartiallyFilled(self, order) -> bool:
+        return order["status"] == "PARTIALLY_FILLED" or (order["status"] == "TRADE" and order["filled_quantity"] < order["quantity"])
+
+
+    # Function to handle the fill of a buying order, which opens the position
+    def __buyOrderFilled(self, symbol, buy_order, investment, creation_time) -> None:
+        # Measuring the time from the order's submission to its fill acknowledgement
+        self.__countOrder("BUY", "FILLED")
+        if self.metrics is not None:
+            self.metrics.observe("order_fill_seconds", self.clock() - creation_time, labels={"side": "BUY"})
+
+        # Logging operation
+        utils.log(f'Buying order filled - Id: {buy_order["id"]}')
+
+        # Queueing a buying notification for the Discord channel
+        utils.sendWebhook(
+            symbol=symbol.replace(self.against_symbol, ""),
+            description=f'Price: **{buy_order["price"]} {self.against_symbol}**\nQuantity invested: **{round(investment, 3)} {self.against_symbol}**\nQuantity bought: **{buy_order["quantity"]} {symbol.replace(self.against_symbol, "")}**',
+            side="BUY"
+        )
+
+
+    # Function to handle a buying order rejected, canceled or expired, freeing the position slot
+    def __buyOrderClosed(self, slot, buy_order) -> None:
+        # Deleting buy order from the memory
+        self.data_collector.deleteOrder(buy_order["id"])
+        self.__countOrder("BUY", buy_order["status"])
+
+        # logging operation
+        utils.log(f'Buying order {buy_order["status"].lower()} - Id: {buy_order["id"]}')
+
+        # Freeing the position slot
+        self.__closePosition(slot)
+
+
+    # Function to check if a pending buying order has to be canceled
+    def __shouldCancelBuyOrder(self, symbol, buy_score, buy_order, creation_time) -> bool:
+        # Fetching the latest features of the symbol
+        fill_check_start = time.perf_counter()
+        symbol_data = self.__symbolsData([symbol])
+
+        # Computing the current score and price of the symbol
+        current_score = self.strategy.score(symbol_data)[0]
+        current_price = symbol_data[0, self.strategy.features.index("close")]
+
+        # Getting the time elapsed seconds from the creation of the order
+        elapsed_time = self.clock() - creation_time
+
+        # Timing the check of the pending buying order
+        if self.metrics is not None:
+            self.metrics.observe("fill_check_seconds", time.perf_counter() - fill_check_start, labels={"side": "BUY"})
+
+        # If during the fulfillment operation the strategy's score (i.e. the SMA_200-price divergence) increases and the
+        # last price of the symbol increases, the order is canceled: the previous
+        # buying condition is no longer the best.
+        return (current_score > buy_score and current_price > buy_order["price"]) or elapsed_time >= self.timeout
+
+
+    # Function to handle an error canceling an order
+    def __cancelOrderFailed(self, order, e) -> None:
+        # Logging error
+        utils.log(f'Error canceling order ({order["id"]}): {str(e)}')
+        if self.metrics is not None:
+            self.metrics.inc("errors_total", labels={"source": "cancel_order"})
+
+
+    # Function to handle the creation of a selling order
+    def __sellOrderCreated(self, sell_order_id) -> None:
+        self.__countOrder("SELL", "CREATED")
+
+        # Logging operation
+        utils.log(f'Selling order created - Id: {sell_order_id}')
+
+
+    # Function to handle an error creating a selling order
+    def __sellOrderFailed(self, e) -> None:
+        # Logging error
+        utils.log(f'Error creating sell order: {str(e)}')
+        self.__countOrder("SELL", "FAILED", error=True)
+
+
+    # Function to handle the fill of a selling order, which closes the position and frees its slot
+    def __sellOrderFilled(self, slot, symbol, investment, buy_order, sell_order, sell_creation_time) -> None:
+        # Measuring the time from the order's submission to its fill acknowledgement
+        self.__countOrder("SELL", "FILLED")
+        if self.metrics is not None:
+            self.metrics.observe("order_fill_seconds", self.clock() - sell_creation_time, labels={"side": "SELL"})
+
+        try:
+            # Fetching the current account balance
+            account_balance = self.data_collector.getAssetBalance(self.against_symbol)
+            account_balance = float(account_balance["free"])
+
+            # Computing the Gross profit obtained from the transaction
+            gross_profit = investment * (sell_order["price"] / buy_order["price"])
+            gross_profit -= investment
+            gross_profit = round(gross_profit, 3)
+
+            # Computing the Net profit obtained from the transaction
+            net_profit = (1 - self.buy_fees) * investment / buy_order["price"]
+            net_profit *= (1 - self.sell_fees) * sell_order["price"]
+            net_profit -= investment
+            net_profit = round(net_profit, 3)
+
+            # Queueing a selling notification for the Discord channel
+            utils.sendWebhook(
+                symbol=symbol.replace(self.against_symbol, ""),
+                description=f'Price: **{sell_order["price"]} {self.against_symbol}**\nGross profit: **{gross_profit} {self.against_symbol}**\nNet profit: **{net_profit} {self.against_symbol}**\nBalance: **{round(account_balance, 3)} {self.against_symbol}**',
+                side="SELL"
+            )
+
+        except Exception as e:
+            # Logging error
+            utils.log(f'Error sending selling report: {str(e)}')
+            if self.metrics is not None:
+                self.metrics.inc("errors_total", labels={"source": "report"})
+
+        # Logging operation
+        utils.log(f'Selling order filled - Id: {sell_order["id"]}')
+
+        # Deleting the orders of the position from the memory
+        self.data_collector.deleteOrder(buy_order["id"])
+        self.data_collector.deleteOrder(sell_order["id"])
+
+        # Freeing the position slot
+        self.__closePosition(slot)
+
 
-    # Bot's trading process
-    def __trade(self) -> None:
+    # Function to handle a selling order rejected or expired, which has to be opened again
+    def __sellOrderRejected(self, sell_order) -> None:
+        # Deleting sell order from the memory
+        self.data_collector.deleteOrder(sell_order["id"])
+        self.__countOrder("SELL", sell_order["status"])
+
+        # Logging operation
+        utils.log(f'Selling order {sell_order["status"].lower()} - Id: {sell_order["id"]}')
+
+
+    # Function to handle a selling order manually canceled by the user, which frees the position slot
+    def __sellOrderCanceled(self, slot, sell_order) -> None:
+        # Deleting sell order from the memory
+        self.data_collector.deleteOrder(sell_order["id"])
+        self.__countOrder("SELL", "CANCELED")
+
+        # Logging operation
+        utils.log(f'Selling order canceled - Id: {sell_order["id"]}')
+
+        # Freeing the position slot
+        self.__closePosition(slot)
+
+
+    # Bot's trading process, driving the state machine of a single position slot
+    def __trade(self, slot=0) -> None:
         while True:
             ### LOOKING FOR BUYING OPPORTUNITIES ###
-            # Looking for a buying opportunity according to the selected strategy
+            # Looking for a buying opportunity according to the selected strategy,
+            # evaluated only when the symbols' data have changed
             buy_opportunity = None
+            data_version = None
             while buy_opportunity is None:
-                buy_opportunity = self.__buyingStrategy()
+                data_version = self.__waitForData(data_version)
+                buy_opportunity, investment = self.__openPosition(slot)
 
             # Buy opportunity found
+            self.__buyOpportunityFound(buy_opportunity)
             symbol = buy_opportunity["symbol"]
-            SMA_price_divergence = buy_opportunity["historical_data"].iloc[-1].SMA_200 / buy_opportunity["historical_data"].iloc[-1].close
-            buy_price = buy_opportunity["historical_data"].iloc[-1].close
-
-            # Logging operation
-            utils.log(f'Buying opportunity found - Symbol: {symbol} | Buying price: {buy_price} {self.against_symbol}')
+            buy_score = buy_opportunity["score"]
+            buy_price = buy_opportunity["price"]
 
             ### BUYING PROCESS ###
             # Creating a buying order.
             # If an error occurs, the process restarts by looking for buying opportunities.
             try:
-                # Fetching the amount to invest
-                investment = self.data_collector.getAssetBalance(self.against_symbol)
-                investment = float(investment["free"])
-
-                # Creating the buying order
+                # Creating the buying order with the capital reserved for the slot
                 buy_order_id = self.__buyOrder(symbol, buy_price, investment)
 
                 # Saving the timestamp in which the buying order has been placed
-                creation_time = dt.datetime.now()
-
-                # Logging operation
-                utils.log(f'Buying order created - Id: {buy_order_id}')
+                creation_time = self.clock()
+                self.__buyOrderCreated(slot, buy_order_id)
 
             except Exception as e:
-                utils.log(f'Error creating buying order: {str(e)}')
+                self.__buyOrderFailed(slot, e)
                 continue
 
             # Checking for buying order fulfillment.
-            self.open_position = False
-            while not self.open_position:
-                # Getting buy order information
-                buy_order = self.data_collector.getOrder(buy_order_id)
+            open_position = False
+            while not open_position:
+                # Waiting for the buy order to reach a final status, waking up every second to check the cancel conditions
+                buy_order = self.data_collector.waitForOrder(buy_order_id, statuses=self.final_statuses, timeout=1)
 
                 # Waiting until the buying order information are available before proceeding
                 if buy_order is None:
-                    time.sleep(1)
                     continue
 
-                # Order Filled
-                if buy_order["status"] == "FILLED" or (buy_order["status"] == "TRADE" and buy_order["filled_quantity"] >= buy_order["quantity"]):
-                    try:
-                        # Sending a buying notification to the Discord channel
-                        utils.sendWebhook(
-                            symbol=symbol.replace(self.against_symbol, ""),
-                            description=f'Price: **{buy_order["price"]} {self.against_symbol}**\nQuantity invested: **{round(investment, 3)} {self.against_symbol}**\nQuantity bought: **{buy_order["quantity"]} {symbol.replace(self.against_symbol, "")}**',
-                            side="BUY"
-                        )
-
-                        # Logging operation
-                        utils.log(f'Buying order filled - Id: {buy_order_id}')
-
-                    except Exception as e:
-                        # Logging error
-                        utils.log(f'Error sending buying report: {str(e)}')
-
-                    else:
-                        # Mark the position as open
-                        self.open_position = True
+                # Order Filled: the position is open
+                if self.__isFilled(buy_order):
+                    open_position = True
+                    self.__buyOrderFilled(symbol, buy_order, investment, creation_time)
 
                 # if the order is partially filled, checks again the order status by jumping to the next iteration.
-                elif buy_order["status"] == "PARTIALLY_FILLED" or (buy_order["status"] == "TRADE" and buy_order["filled_quantity"] < buy_order["quantity"]):
-                    time.sleep(1)
+                elif self.__isPartiallyFilled(buy_order):
                     continue
 
                 # If the order is Rejected, Canceled or Expired, the process restarts by looking for buying opportunities.
                 elif buy_order["status"] == "CANCELED" or buy_order["status"] == "REJECTED" or buy_order["status"] == "EXPIRED":
-                    # Deleting buy order from the memory
-                    self.data_collector.deleteOrder(buy_order_id)
-
-                    # logging operation
-                    utils.log(f'Buying order {buy_order["status"].lower()} - Id: {buy_order_id}')
-                    
+                    self.__buyOrderClosed(slot, buy_order)
                     break
 
-                else:
-                    # Fetching the last SMA 200 value and the price of the symbol
-                    symbol_data = self.__symbolData(symbol)
-
-                    # Extracting the current SMA 200 and price of the symbol
-                    current_SMA_200 = symbol_data["historical_data"].iloc[-1].SMA_200
-                    current_price = symbol_data["historical_data"].iloc[-1].close
-
-                    # Computing the current SMA 200 - price divergence
-                    current_SMA_price_divergence = current_SMA_200 / current_price
-
-                    # Getting the time elapsed seconds from the creation of the order
-                    current_time = dt.datetime.now()
-                    elapsed_time = (current_time - creation_time).seconds
-
-                    # If during the fulfillment operation the SMA_200-price divergence value increases and the
-                    # last price of the symbol increases, the order is canceled: the previous 
-                    # buying condition is no longer the best.
-                    if (current_SMA_price_divergence > SMA_price_divergence and current_price > buy_order["price"]) or elapsed_time >= self.timeout:
-                        try:
-                            # Canceling the order
-                            self.client.cancel_order(symbol=symbol, orderId=buy_order["id"])
-
-                        except Exception as e:
-                            # Logging error
-                            utils.log(f'Error canceling order ({buy_order["id"]}): {str(e)}')
-
-                time.sleep(1)
+                # Canceling the order if the buying condition is no longer the best, or if it timed out
+                elif self.__shouldCancelBuyOrder(symbol, buy_score, buy_order, creation_time):
+                    try:
+                        self.client.cancel_order(symbol=symbol, orderId=buy_order["id"])
+                    except Exception as e:
+                        self.__cancelOrderFailed(buy_order, e)
 
             ### SELLING PROCESS ###
             sell_order_id = None
-            while self.open_position:
+            while open_position:
                 # Creating a selling order.
                 # If an error occurs, the process restarts by trying to open another sell order.
                 while sell_order_id is None:
@@ -308,88 +551,138 @@ class CryptoBot:
 
                         # Creating the selling order
                         sell_order_id = self.__sellOrder(symbol, sell_price, float(buy_order["quantity"]))
-
-                        # Logging operation
-                        utils.log(f'Selling order created - Id: {sell_order_id}')
+                        sell_creation_time = self.clock()
+                        self.__sellOrderCreated(sell_order_id)
 
                     except Exception as e:
-                        # Logging error
-                        utils.log(f'Error creating sell order: {str(e)}')
+                        self.__sellOrderFailed(e)
 
-                        continue
-
-                    finally:
+                        # Waiting before trying again
                         time.sleep(1)
 
-                # Fetching sell order information
-                sell_order = self.data_collector.getOrder(sell_order_id)
+                        continue
+
+                # Waiting for the sell order to reach a final status
+                sell_order = self.data_collector.waitForOrder(sell_order_id, statuses=self.final_statuses, timeout=self.timeout)
 
                 # Waiting until the selling order information are available before proceeding
                 if sell_order is None:
-                    time.sleep(1)
                     continue
 
-                # Order Filled
-                if sell_order["status"] == "FILLED" or (sell_order["status"] == "TRADE" and sell_order["filled_quantity"] >= sell_order["quantity"]):
-                    try:
-                        # Fetching the current account balance
-                        account_balance = self.data_collector.getAssetBalance(self.against_symbol)
-                        account_balance = float(account_balance["free"])
-
-                        # Computing the Gross profit obtained from the transaction
-                        gross_profit = investment * (sell_order["price"] / buy_order["price"])
-                        gross_profit -= investment
-                        gross_profit = round(gross_profit, 3)
-
-                        # Computing the Net profit obtained from the transaction
-                        net_profit = (1 - self.buy_fees) * investment / buy_order["price"]
-                        net_profit *= (1 - self.sell_fees) * sell_order["price"]
-                        net_profit -= investment
-                        net_profit = round(net_profit, 3)
-
-                        # Sending a selling notification to the Discord channel
-                        utils.sendWebhook(
-                            symbol=symbol.replace(self.against_symbol, ""),
-                            description=f'Price: **{sell_order["price"]} {self.against_symbol}**\nGross profit: **{gross_profit} {self.against_symbol}**\nNet profit: **{net_profit} {self.against_symbol}**\nBalance: **{round(account_balance, 3)} {self.against_symbol}**',
-                            side="SELL"
-                        )
-
-                        # Logging operation
-                        utils.log(f'Selling order filled - Id: {sell_order_id}')
+                # Order Filled: the position is closed
+                if self.__isFilled(sell_order):
+                    open_position = False
+                    self.__sellOrderFilled(slot, symbol, investment, buy_order, sell_order, sell_creation_time)
 
-                    except Exception as e:
-                        # Logging error
-                        utils.log(f'Error sending selling report: {str(e)}')
-                        
-                    else:
-                        # Deleting all the orders from the memory
-                        self.data_collector.cleanOrders()
-                        
-                        # Mark the position as close
-                        self.open_position = False
-
-                # if the order is Rejected, Canceled or Expired, the process restarts by trying to open another selling order
+                # if the order is Rejected or Expired, the process restarts by trying to open another selling order
                 elif sell_order["status"] == "REJECTED" or sell_order["status"] == "EXPIRED":
-                    # Deleting sell order from the memory
-                    self.data_collector.deleteOrder(sell_order_id)
-
-                    # Mark the selling order as not open
+                    self.__sellOrderRejected(sell_order)
                     sell_order_id = None
 
-                    # Logging operation
-                    utils.log(f'Selling order {sell_order["status"].lower()} - Id: {sell_order_id}')
-                
                 # If the order has been manually canceled from the user, it breaks the cycle.
                 elif sell_order["status"] == "CANCELED":
-                    # Deleting sell order from the memory
-                    self.data_collector.deleteOrder(sell_order_id)
+                    self.__sellOrderCanceled(slot, sell_order)
+                    break
+
+
+    # Coroutine to wait until the symbols' data change with respect to the last evaluated version, for the asyncio runtime
+    async def __waitForDataAsync(self, version) -> int:
+        # The first evaluation runs immediately
+        if version is None:
+            return self.data_collector.getVersion()
+
+        # Waiting for a kline update
+        await self.data_collector.waitForUpdateAsync(version, timeout=self.timeout)
+
+        # Waiting for the debounce period, so that bursts of updates are evaluated only once
+        if self.debounce > 0:
+            await asyncio.sleep(self.debounce)
+
+        return self.data_collector.getVersion()
+
+
+    # Bot's trading coroutine for the asyncio runtime, driving the same state machine of a single position slot as __trade,
+    # without blocking the event loop: the waits and the REST calls are awaited
+    async def __tradeAsync(self, slot=0) -> None:
+        while True:
+            ### LOOKING FOR BUYING OPPORTUNITIES ###
+            buy_opportunity = None
+            data_version = None
+            while buy_opportunity is None:
+                data_version = await self.__waitForDataAsync(data_version)
+                buy_opportunity, investment = self.__openPosition(slot)
+
+            # Buy opportunity found
+            self.__buyOpportunityFound(buy_opportunity)
+            symbol = buy_opportunity["symbol"]
+            buy_score = buy_opportunity["score"]
+            buy_price = buy_opportunity["price"]
+
+            ### BUYING PROCESS ###
+            try:
+                buy_order_id = await self.__buyOrderAsync(symbol, buy_price, investment)
+                creation_time = self.clock()
+                self.__buyOrderCreated(slot, buy_order_id)
 
-                    # Logging operation
-                    utils.log(f'Selling order canceled - Id: {sell_order_id}')
+            except Exception as e:
+                self.__buyOrderFailed(slot, e)
+                continue
+
+            # Checking for buying order fulfillment
+            open_position = False
+            while not open_position:
+                buy_order = await self.data_collector.waitForOrderAsync(buy_order_id, statuses=self.final_statuses, timeout=1)
+
+                if buy_order is None:
+                    continue
+
+                if self.__isFilled(buy_order):
+                    open_position = True
+                    self.__buyOrderFilled(symbol, buy_order, investment, creation_time)
 
+                elif self.__isPartiallyFilled(buy_order):
+                    continue
+
+                elif buy_order["status"] == "CANCELED" or buy_order["status"] == "REJECTED" or buy_order["status"] == "EXPIRED":
+                    self.__buyOrderClosed(slot, buy_order)
                     break
 
-                time.sleep(1)
+                elif self.__shouldCancelBuyOrder(symbol, buy_score, buy_order, creation_time):
+                    try:
+                        await self.data_collector.async_client.cancel_order(symbol=symbol, orderId=buy_order["id"])
+                    except Exception as e:
+                        self.__cancelOrderFailed(buy_order, e)
+
+            ### SELLING PROCESS ###
+            sell_order_id = None
+            while open_position:
+                while sell_order_id is None:
+                    try:
+                        sell_price = buy_order["price"] * self.minumum_profit
+                        sell_order_id = await self.__sellOrderAsync(symbol, sell_price, float(buy_order["quantity"]))
+                        sell_creation_time = self.clock()
+                        self.__sellOrderCreated(sell_order_id)
+
+                    except Exception as e:
+                        self.__sellOrderFailed(e)
+                        await asyncio.sleep(1)
+
+                sell_order = await self.data_collector.waitForOrderAsync(sell_order_id, statuses=self.final_statuses, timeout=self.timeout)
+
+                if sell_order is None:
+                    continue
+
+                if self.__isFilled(sell_order):
+                    open_position = False
+                    self.__sellOrderFilled(slot, symbol, investment, buy_order, sell_order, sell_creation_time)
+
+                elif sell_order["status"] == "REJECTED" or sell_order["status"] == "EXPIRED":
+                    self.__sellOrderRejected(sell_order)
+                    sell_order_id = None
+
+                elif sell_order["status"] == "CANCELED":
+                    self.__sellOrderCanceled(slot, sell_order)
+                    break
 
 
     """ PUBLIC METHODS """
@@ -397,11 +690,14 @@ class CryptoBot:
     def start(self) -> None:
         # Creating the objects threads
         data_collector_thread = threading.Thread(target=self.data_collector.start, args=[])
-        crypto_bot_thread = threading.Thread(target=self.__trade, args=[])
+        crypto_bot_threads = [threading.Thread(target=self.__trade, args=[slot]) for slot in range(self.max_positions)]
 
         # Initializing the logs file
         utils.initLogFile()
 
+        # Loading the symbols' exchange filters before trading begins
+        self.symbols_info.refresh()
+
         # Starting the DataCollector's main thread
         data_collector_thread.start()
 
@@ -414,9 +710,45 @@ class CryptoBot:
         # Logging the bot's connection status
         utils.log(f'Bot {data_collector_status.lower()}')
 
-        # Starting the CryptoBot's main thread
-        crypto_bot_thread.start()
+        # Starting a CryptoBot's trading thread for each position slot
+        for crypto_bot_thread in crypto_bot_threads:
+            crypto_bot_thread.start()
         
         # Joining the threads with the main thread
         data_collector_thread.join()
-        crypto_bot_thread.join()
\ No newline at end of file
+        for crypto_bot_thread in crypto_bot_threads:
+            crypto_bot_thread.join()
+
+
+    # Coroutine to run the CryptoBot on the asyncio runtime: the market data, the user data and the trading of
+    # every position slot are cooperative tasks of the same event loop, instead of threads
+    async def run(self) -> None:
+        # Initializing the logs file
+        utils.initLogFile()
+
+        # Loading the symbols' exchange filters before trading begins, without blocking the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.symbols_info.refresh)
+
+        # Starting the DataCollector's task
+        data_collector_task = asyncio.create_task(self.data_collector.run())
+
+        # Waiting until the DataCollector is connected to the websocket
+        data_collector_status = self.data_collector.getStatus()
+        while data_collector_status != "CONNECTED":
+            # Stopping if the DataCollector failed before connecting
+            if data_collector_task.done():
+                data_collector_task.result()
+
+            await asyncio.sleep(1)
+            data_collector_status = self.data_collector.getStatus()
+
+        # Logging the bot's connection status
+        utils.log(f'Bot {data_collector_status.lower()}')
+
+        # Starting a trading task for each position slot, and running them along with the DataCollector's one
+        await asyncio.gather(data_collector_task, *[self.__tradeAsync(slot) for slot in range(self.max_positions)])
+
+
+    # Function to start the CryptoBot's execution on the asyncio runtime
+    def startAsync(self) -> None:
+        asyncio.run(self.run())
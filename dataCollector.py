@@ -1,15 +1,57 @@
+import os
+import copy
+import time
 import utils
+import atexit
+import pickle
+import asyncio
 import threading
+import numpy as np
+import concurrent.futures
 import pandas as pd
+from collections import deque
 import datetime as dt
-from binance.client import Client
-from binance import ThreadedWebsocketManager
+from functools import partial
+from types import MappingProxyType
+from candleStore import CandleStore
+from candleAggregator import CandleAggregator
+from restScheduler import ScheduledClient, ScheduledAsyncClient
+from binance import AsyncClient, BinanceSocketManager, ThreadedWebsocketManager
+
+
+# Websocket manager able to connect to a custom stream URL (i.e. a local replay server)
+class ThreadedStreamManager(ThreadedWebsocketManager):
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, api_key, api_secret, stream_url=None) -> None:
+        super().__init__(api_key=api_key, api_secret=api_secret)
+        self.stream_url = stream_url
+
+
+    # Function to create the socket manager, pointing it to the custom stream URL
+    async def _before_socket_listener_start(self) -> None:
+        await super()._before_socket_listener_start()
+        if self.stream_url is not None:
+            self._bsm.STREAM_URL = self.stream_url
+
+
+    # Function to run the sockets' event loop
+    async def socket_listener(self) -> None:
+        if self.stream_url is None:
+            await super().socket_listener()
+            return
+
+        # Creating the client without pinging the exchange, which is not needed by a replay server
+        self._client = AsyncClient(loop=self._loop, **self._client_params)
+        await self._before_socket_listener_start()
+        while self._running or self._socket_running:
+            await asyncio.sleep(0.2)
 
 
 class DataCollector:
     """ PRIVATE METHODS """
     # Class constructor
-    def __init__(self, api_key, api_secret, symbols, against_symbol="USDT", interval="1m", lookback_days=1, lookback_hours=6) -> None:
+    def __init__(self, api_key, api_secret, symbols, against_symbol="USDT", interval="1m", lookback_days=1, lookback_hours=6, indicators=None, max_terminal_orders=1000, multiplex=False, stream_url=None, latency_window=10000, reconnect_delay=1, max_reconnect_delay=60, client=None, offline=False, clock=None, recorder=None, aggregate_intervals=None, metrics=None, shared_stores=False, async_client=None, max_history_workers=4, checkpoint_path=None, checkpoint_period=60) -> None:
         # Initializing object's attributes
         self.symbols = symbols
         self.interval = interval
@@ -18,184 +60,907 @@ class DataCollector:
         self.against_symbol = against_symbol
         self.status = "DISCONNECTED"
 
-        # Creating dataframes to containing historical data of the symbols
-        self.symbols_dataframes = {symbol: None for symbol in self.symbols}
+        # Offline mode: the messages are pushed through the feed hook (i.e. by a replay engine) instead of the websockets
+        self.offline = offline
+
+        # Recorder persisting the messages received, if any
+        self.recorder = recorder
+
+        # Metrics registry, if any: the callbacks are instrumented only when it is provided
+        self.metrics = metrics
+        self.last_kline_arrival = None
+
+        # Clock of the timed waits: the wall clock by default, or a simulated clock advanced by the messages fed
+        self.clock = clock
+
+        # Streaming mode: a single combined stream for all the symbols and the user's data, or a socket for each of them
+        self.multiplex = multiplex
+        self.listen_key = None
+        self.listen_key_keepalive = 30 * 60
+
+        # Creating the event set by the websocket callbacks on disconnection, and the backoff of the reconnections
+        self.disconnected = threading.Event()
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        # Creating the candle stores containing historical data of the symbols, allocated in shared memory if they are read by other processes
+        self.symbols_stores = {symbol: None for symbol in self.symbols}
+        self.shared_stores = shared_stores
+
+        # Creating the aggregators deriving the bars of the higher intervals from the candles of the symbols
+        self.aggregate_intervals = [interval for interval in (aggregate_intervals or []) if interval != self.interval]
+        self.symbols_aggregators = {symbol: {} for symbol in self.symbols}
+
+        # Creating the streaming indicators of the symbols, from a dictionary mapping each indicator's name to its factory.
+        # The indicators are derived data, kept apart from the candle stores.
+        self.indicators = dict(indicators) if indicators is not None else {}
+        self.symbols_indicators = {symbol: {name: factory() for name, factory in self.indicators.items()} for symbol in self.symbols}
+
+        # Creating the table of the symbols' snapshots: the latest candle and indicators' values of every symbol, as an immutable dictionary
+        # replaced (never modified) at every update, so that the consumers read them consistently without any lock
+        self.symbols_snapshots = {symbol: None for symbol in self.symbols}
+
+        # Creating the lock shared by the websocket callback and the REST backfill over the candle stores
+        self.symbols_lock = threading.Lock()
+
+        # Creating the buffer of the klines received while the missed ones are backfilled after a reconnection (None otherwise)
+        self.pending_klines = None
+
+        # Creating the condition used to notify the consumers about symbols' data updates
+        self.updates = threading.Condition()
+        self.version = 0
+
+        # Creating the table of assets' balances, indexed by asset, and the number of its updates
+        self.assets_balances = {}
+        self.balances_version = 0
+
+        # Creating the table of orders, indexed by id, and its secondary index by symbol and status
+        self.orders = {}
+        self.orders_index = {}
+
+        # Creating the table of the balances' versions at which the orders were first reported, indexed by id: the balances reflect
+        # the funds locked by an order once they are updated after its report
+        self.orders_balances_versions = {}
+
+        # Creating the queue of the orders in a terminal status, pruned beyond the retention limit
+        self.terminal_statuses = ("FILLED", "CANCELED", "REJECTED", "EXPIRED")
+        self.terminal_orders = deque()
+        self.max_terminal_orders = max_terminal_orders
+
+        # Creating the lock shared by the websocket callback and the trading thread over user's data,
+        # and the condition used to notify the consumers about orders' state transitions
+        self.user_data_lock = threading.RLock()
+        self.orders_updates = threading.Condition(self.user_data_lock)
+
+        # Creating the table of the consumers' wait conditions, indexed by thread
+        self.waiters = {}
+
+        # Creating the windows of the latest messages' processing times and event lags, in milliseconds
+        self.processing_times = deque(maxlen=latency_window)
+        self.event_lags = deque(maxlen=latency_window)
+        self.messages = 0
+        self.latency_lock = threading.Lock()
+
+        # Instantiating the Binance API Client, unless an equivalent one is provided (i.e. a simulated exchange),
+        # and bounding the concurrent requests of the historical data's collection
+        self.client = client if client is not None else ScheduledClient(api_key=api_key, api_secret=api_secret)
+        self.max_history_workers = max_history_workers
+
+        # Instantiating the websocket manager, re-created at every reconnection
+        self.stream_manager_params = {"api_key": api_key, "api_secret": api_secret, "stream_url": stream_url}
+        self.twm = ThreadedStreamManager(**self.stream_manager_params)
 
-        # Creating list of assets' balances
-        self.assets_balances = []
+        # Asyncio runtime: the asynchronous client, the event loop running the collector (in whose thread all the callbacks are run)
+        # and the futures of the coroutines waiting for updates. They are used only when the collector is run by run() instead of start().
+        self.async_client = async_client
+        self.loop = None
+        self.async_waiters = set()
 
-        # Creating list of orders
-        self.orders = []
+        # Checkpoint of the candle windows, the indicators' state and the user's data, if any: it is written periodically and at exit,
+        # and loaded at start so that only the data since the checkpoint are fetched
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_period = checkpoint_period
 
-        # Instantiating the Binance API Client
-        self.client = Client(api_key=api_key, api_secret=api_secret)
+        # Timing the websocket callbacks
+        if self.metrics is not None:
+            self.__updateSymbolsData = self.metrics.timed("update_symbols_data_seconds", self.__updateSymbolsData)
+            self.__updateUserData = self.metrics.timed("update_user_data_seconds", self.__updateUserData)
 
-        # Instantiating the websocket manager
-        self.twm = ThreadedWebsocketManager(api_key=api_key, api_secret=api_secret)
+
+    # Function to get the start time of the historical data, in milliseconds
+    def __historicalStart(self) -> int:
+        start = self.clock() if self.clock is not None else dt.datetime.now().timestamp()
+        return int(start * 1000) - (self.lookback_days * self.lookback_hours * 60 * 60 * 1000)
 
 
     # Function to collect historical data for a specific symbol
     def __historicalData(self, symbol) -> None:
-        # Defining the start period
-        start = dt.datetime.now().timestamp()
-        start = int(start * 1000) - (self.lookback_days * self.lookback_hours * 60 * 60 * 1000)
-
         # Collecting historical data of the symbol
-        historical_data = self.client.get_historical_klines(symbol.upper(), self.interval, start)
+        historical_data = self.client.get_historical_klines(symbol.upper(), self.interval, self.__historicalStart())
+
+        self.__loadHistoricalData(symbol.upper(), historical_data)
+
 
-        # Loading the data into a pandas dataframe
-        dataframe = pd.DataFrame([[data[i] for i in range(6)] for data in historical_data])
-        dataframe.columns = ['time','open', 'high', 'low', 'close', 'volume']
-        dataframe = dataframe.astype({"open": 'float64', "high": 'float64', "low": 'float64', "close": 'float64', "volume": 'float64'})
-        dataframe.set_index("time", drop=True, inplace=True)
-        dataframe.index.astype('int64')
+    # Function to load the historical data of a symbol into its candle store, indicators and aggregators
+    def __loadHistoricalData(self, symbol, historical_data) -> None:
+        # Loading the data into a candle store sized on the lookback window
+        self.__loadSymbolData(
+            symbol,
+            times=[int(data[0]) for data in historical_data],
+            values=[[float(data[i]) for i in range(1, 6)] for data in historical_data],
+            capacity=len(historical_data)
+        )
 
-        self.symbols_dataframes[symbol.upper()] = dataframe
 
+    # Function to load the candles of a symbol (oldest first) into a new candle store, and to initialize its indicators and aggregators.
+    # The streaming indicators' state can be given (i.e. restored from a checkpoint), or else they are computed on the close prices.
+    def __loadSymbolData(self, symbol, times, values, capacity, indicators=None) -> None:
+        store = CandleStore(capacity=capacity, shared=self.shared_stores)
+        store.load(times=times, values=values)
+
+        self.symbols_stores[symbol] = store
+
+        # Restoring the streaming indicators only if they are the configured ones, whose names include their parameters (i.e. "SMA_200")
+        if indicators is not None and indicators.keys() == self.indicators.keys() and all(type(indicator) is type(self.indicators[name]()) for name, indicator in indicators.items()):
+            self.symbols_indicators[symbol] = indicators
+        else:
+            self.__loadIndicators(symbol)
+
+        # Initializing the bars of the higher intervals on the historical candles
+        self.symbols_aggregators[symbol] = {interval: CandleAggregator(self.interval, interval, base_capacity=store.capacity) for interval in self.aggregate_intervals}
+        self.__loadAggregators(symbol)
+
+        self.__publishSnapshot(symbol)
+
+
+    # Function to (re)initialize the streaming indicators of a symbol from its candle store
+    def __loadIndicators(self, symbol) -> None:
+        close_prices = self.symbols_stores[symbol].column("close")
+        self.symbols_indicators[symbol] = {name: factory() for name, factory in self.indicators.items()}
+        for indicator in self.symbols_indicators[symbol].values():
+            indicator.load(close_prices)
     
-    # Function to initialize the symbols' data
-    def __initializeSymbolsData(self) -> None:
-        # Starting a thread for each symbol to collect histprical data
-        threads = []
-        for symbol in self.symbols:
-            thread = threading.Thread(target=self.__historicalData, args=[symbol])
-            threads.append(thread)
-            thread.start()
 
-        for thread in threads:
-            thread.join()
+    # Function to (re)build the bars of the higher intervals of a symbol from its candle store
+    def __loadAggregators(self, symbol) -> None:
+        times, values = self.symbols_stores[symbol].view()
+        for aggregator in self.symbols_aggregators[symbol].values():
+            aggregator.load(times, values)
+
+
+    # Function to initialize the symbols' data, restoring them from a checkpoint where possible
+    def __initializeSymbolsData(self, checkpoint=None) -> None:
+        restored = self.__restoreSymbolsData(checkpoint)
+        missing = [symbol for symbol in self.symbols if symbol.upper() not in restored]
+
+        # Collecting the historical data of the other symbols with a bounded number of concurrent requests, paced by the client's scheduler
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_history_workers) as executor:
+            list(executor.map(self.__historicalData, missing))
+
+        # Fetching only the klines since the checkpoint for the restored symbols
+        if len(restored) > 0:
+            self.__backfillSymbolsData(restored)
+
+
+    # Function to publish the snapshot of a symbol, after its candle store and its indicators have been updated,
+    # built from the latest candle if it is given or else read from the store
+    def __publishSnapshot(self, symbol, candle_time=None, candle_values=None) -> None:
+        if candle_time is not None:
+            snapshot = {"open": candle_values[0], "high": candle_values[1], "low": candle_values[2], "close": candle_values[3], "volume": candle_values[4], "time": candle_time}
+        else:
+            snapshot = self.symbols_stores[symbol].last() or {}
+
+        for name, indicator in self.symbols_indicators[symbol].items():
+            snapshot[name] = indicator.value
+
+        self.symbols_snapshots[symbol] = MappingProxyType(snapshot)
+
+
+    # Function to add or update a candle of a symbol, together with its indicators (the caller must hold the lock)
+    def __storeCandle(self, symbol, candle_time, candle_values) -> None:
+        store = self.symbols_stores[symbol]
+
+        # If the candle is newer than the latest stored one, it is appended and the oldest candle is dropped
+        if len(store) == 0 or candle_time > store.lastTime():
+            store.append(candle_time, candle_values)
+            for indicator in self.symbols_indicators[symbol].values():
+                indicator.append(candle_values[3])
+            for aggregator in self.symbols_aggregators[symbol].values():
+                aggregator.update(candle_time, candle_values)
+            self.__publishSnapshot(symbol, candle_time, candle_values)
+
+        # If the candle is the latest one, it is updated in place together with the indicators
+        elif candle_time == store.lastTime():
+            store.update(candle_time, candle_values)
+            for indicator in self.symbols_indicators[symbol].values():
+                indicator.update(candle_values[3])
+            for aggregator in self.symbols_aggregators[symbol].values():
+                aggregator.update(candle_time, candle_values)
+            self.__publishSnapshot(symbol, candle_time, candle_values)
+
+        # An older candle has been revised: the indicators and the bars of the higher intervals are recomputed from the store
+        elif store.update(candle_time, candle_values):
+            self.__loadIndicators(symbol)
+            self.__loadAggregators(symbol)
+            self.__publishSnapshot(symbol)
+
+
+    # Function to notify the consumers waiting for new data
+    def __notifyUpdate(self) -> None:
+        with self.updates:
+            self.version += 1
+            self.updates.notify_all()
+
+        self.__wakeAsyncWaiters()
+
+
+    # Function to wake up the coroutines waiting for new data or orders' updates, when run by the asyncio runtime
+    def __wakeAsyncWaiters(self) -> None:
+        if len(self.async_waiters) == 0:
+            return
+
+        waiters, self.async_waiters = self.async_waiters, set()
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+
+    # Function to handle an error message of a websocket, which is no longer delivering data
+    def __handleDisconnection(self, msg) -> None:
+        if self.status == "CONNECTED":
+            self.status = "DISCONNECTED"
+            utils.log(f'Websocket Disconnected: {msg["m"]}')
+
+        if self.metrics is not None:
+            self.metrics.inc("errors_total", labels={"source": "websocket"})
+
+        # Waking up the supervisor of the connection
+        self.disconnected.set()
 
 
     # Callback function to collect and update symbols' data
     def __updateSymbolsData(self, msg) -> None:
         # Error handling
-        if msg["e"] == "error" and msg["m"] == "Max reconnect retries reached":
-            self.status = "DISCONNECTED"
-            utils.log("Fatal Error - Websocket Disconnected")
-            raise Exception("Websocket Disconnected")
+        if msg["e"] == "error":
+            self.__handleDisconnection(msg)
+
+        else:
+            # Recording the message
+            if self.recorder is not None:
+                self.recorder.record(f'{msg["s"].lower()}@kline_{msg["k"]["i"]}', msg)
+
+            candle_values = (float(msg["k"]["o"]), float(msg["k"]["h"]), float(msg["k"]["l"]), float(msg["k"]["c"]), float(msg["k"]["v"]))
+            with self.symbols_lock:
+                # Buffering the klines received during a backfill, so that they do not advance the stores past the missed ones
+                if self.pending_klines is not None:
+                    self.pending_klines.append((msg["s"], msg["k"]["t"], candle_values))
+                    return
+
+                self.__storeCandle(msg["s"], msg["k"]["t"], candle_values)
+
+            self.__notifyUpdate()
+
+
+    # Function to fetch over REST the klines of a symbol missed while disconnected, and to splice them into its candle store
+    def __backfillSymbolData(self, symbol) -> int:
+        # Fetching the klines from the latest stored one, which may have been revised before closing
+        start = self.symbols_stores[symbol].lastTime()
+        klines = self.client.get_historical_klines(symbol, self.interval, start, limit=1000)
+
+        return self.__spliceKlines(symbol, klines)
 
-        # If the candle's open time is not present in the symbol's dataframe, it is added and the oldest candle is removed
-        elif msg["k"]["t"] not in self.symbols_dataframes[msg["s"]].index:
-            # Loading the candle's data into a pandas dataframe
-            df = pd.DataFrame([[msg["k"]["t"], msg["k"]["o"], msg["k"]["h"], msg["k"]["l"], msg["k"]["c"], msg["k"]["v"]]])
-            df.columns = ['time','open', 'high', 'low', 'close', 'volume']
-            df = df.astype({"open": 'float64', "high": 'float64', "low": 'float64', "close": 'float64', "volume": 'float64'})
-            df.set_index("time", drop=True, inplace=True)
-            df.index.astype('int64')
 
-            # Appending the candle's dataframe to the symbol's main dataframe
-            self.symbols_dataframes[msg["s"]] = pd.concat([self.symbols_dataframes[msg["s"]], df])
+    # Function to splice the klines fetched over REST into the candle store of a symbol
+    def __spliceKlines(self, symbol, klines) -> int:
+        with self.symbols_lock:
+            for kline in klines:
+                self.__storeCandle(symbol, int(kline[0]), tuple(float(kline[i]) for i in range(1, 6)))
 
-            # Remove first row corresponding to the oldest candle
-            self.symbols_dataframes[msg["s"]] =  self.symbols_dataframes[msg["s"]].iloc[1:,:]
+        return len(klines)
+
+
+    # Function to store the klines buffered during a backfill, once the missed ones are spliced
+    def __storePendingKlines(self) -> None:
+        with self.symbols_lock:
+            for symbol, candle_time, candle_values in self.pending_klines:
+                self.__storeCandle(symbol, candle_time, candle_values)
+
+            self.pending_klines = None
+
+        self.__notifyUpdate()
+
+
+    # Function to fetch the klines of the symbols (all of them by default) missed while disconnected
+    def __backfillSymbolsData(self, symbols=None) -> None:
+        symbols = symbols if symbols is not None else [symbol.upper() for symbol in self.symbols]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(len(symbols), 8))) as executor:
+            backfilled = sum(executor.map(self.__backfillSymbolData, symbols))
+
+        utils.log(f'Symbols data backfilled - Klines: {backfilled}')
+        self.__notifyUpdate()
+
+
+    # Callback function dispatching the messages of the combined stream by stream name
+    def __dispatchStream(self, msg) -> None:
+        # Error messages are not wrapped by the combined stream
+        if "stream" not in msg:
+            self.__updateSymbolsData(msg)
+
+        elif msg["stream"] == self.listen_key:
+            self.__updateUserData(msg["data"])
 
-        # If the candle's open time is present in the symbol's dataframe, it updates the corresponding row with the latest values
         else:
-            self.symbols_dataframes[msg["s"]].loc[msg["k"]["t"], 'open'] = float(msg["k"]["o"])
-            self.symbols_dataframes[msg["s"]].loc[msg["k"]["t"], 'high'] = float(msg["k"]["h"])
-            self.symbols_dataframes[msg["s"]].loc[msg["k"]["t"], 'low'] = float(msg["k"]["l"])
-            self.symbols_dataframes[msg["s"]].loc[msg["k"]["t"], 'close'] = float(msg["k"]["c"])
-            self.symbols_dataframes[msg["s"]].loc[msg["k"]["t"], 'volume'] = float(msg["k"]["v"])
+            self.__updateSymbolsData(msg["data"])
+
+
+    # Callback function measuring the processing time and the event lag of a message handled by a given callback
+    def __onMessage(self, callback, msg) -> None:
+        start = time.perf_counter()
+        try:
+            callback(msg)
+
+        finally:
+            processing_time = (time.perf_counter() - start) * 1000
+
+            # Measuring the delay between the event time set by the exchange and the end of its processing
+            data = msg.get("data", msg)
+            now = self.clock() if self.clock is not None else time.time()
+            event_lag = now * 1000 - data["E"] if "E" in data else None
+
+            with self.latency_lock:
+                self.messages += 1
+                self.processing_times.append(processing_time)
+                if event_lag is not None:
+                    self.event_lags.append(event_lag)
 
+            # Counting the messages by event type, and saving the arrival time of the latest kline for the tick-to-decision latency
+            if self.metrics is not None:
+                self.metrics.inc("messages_total", labels={"event": data.get("e", "unknown")})
+                if event_lag is not None:
+                    self.metrics.observe("event_lag_seconds", max(event_lag, 0.0) / 1000)
+                if data.get("e") == "kline":
+                    self.last_kline_arrival = start
 
-    # Function to initialize user's data
+
+    # Function to keep the listen key of the user's data stream alive. The key is read at every round, so that the one obtained
+    # by the latest reconnection is kept alive by the same thread.
+    def __keepAliveListenKey(self) -> None:
+        while True:
+            time.sleep(self.listen_key_keepalive)
+            try:
+                self.client.stream_keepalive(self.listen_key)
+            except Exception as e:
+                utils.log(f'Error keeping the listen key alive: {str(e)}')
+
+
+    # Function to wait on a condition until a predicate holds or the timeout expires (the caller must hold the condition)
+    def __waitFor(self, condition, predicate, timeout) -> None:
+        # With a simulated clock, the timeout expires when the clock is advanced past the deadline
+        if self.clock is not None and timeout is not None:
+            deadline = self.clock() + timeout
+            wait_predicate = lambda: predicate() or self.clock() >= deadline
+            timeout = None
+
+        else:
+            wait_predicate = predicate
+
+        # Registering the wait, so that it is possible to tell whether the consumers have nothing left to process
+        thread_id = threading.get_ident()
+        self.waiters[thread_id] = wait_predicate
+        try:
+            condition.wait_for(wait_predicate, timeout=timeout)
+        finally:
+            del self.waiters[thread_id]
+
+
+    # Function to compute the summary statistics of a window of latencies
+    def __latencyStats(self, latencies) -> dict:
+        if len(latencies) == 0:
+            return {"mean": None, "p50": None, "p99": None, "max": None}
+
+        latencies = np.array(latencies, dtype=float)
+        return {
+            "mean": float(np.mean(latencies)),
+            "p50": float(np.percentile(latencies, 50)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(np.max(latencies))
+        }
+
+
+    # Function to add or update an order in the orders' table and in its indexes (the caller must hold the lock)
+    def __storeOrder(self, order) -> None:
+        # Removing the order from the index entry of its previous status
+        previous_order = self.orders.get(order["id"])
+        if previous_order is not None:
+            self.__unindexOrder(previous_order)
+
+        self.orders[order["id"]] = order
+        self.orders_index.setdefault((order["symbol"], order["status"]), set()).add(order["id"])
+        self.orders_balances_versions.setdefault(order["id"], self.balances_version)
+
+        # Waking up the consumers waiting for orders' updates
+        self.orders_updates.notify_all()
+        self.__wakeAsyncWaiters()
+
+        # Keeping track of the orders in a terminal status and pruning the oldest ones
+        if order["status"] in self.terminal_statuses and (previous_order is None or previous_order["status"] not in self.terminal_statuses):
+            self.terminal_orders.append(order["id"])
+
+            while len(self.terminal_orders) > self.max_terminal_orders:
+                order_id = self.terminal_orders.popleft()
+                if order_id in self.orders and self.orders[order_id]["status"] in self.terminal_statuses:
+                    self.__removeOrder(order_id)
+
+
+    # Function to remove an order from the orders' table and from its indexes (the caller must hold the lock)
+    def __removeOrder(self, order_id) -> None:
+        order = self.orders.pop(order_id, None)
+        self.orders_balances_versions.pop(order_id, None)
+        if order is not None:
+            self.__unindexOrder(order)
+
+
+    # Function to remove an order from the index entry of its symbol and status (the caller must hold the lock)
+    def __unindexOrder(self, order) -> None:
+        key = (order["symbol"], order["status"])
+        if key in self.orders_index:
+            self.orders_index[key].discard(order["id"])
+            if len(self.orders_index[key]) == 0:
+                del self.orders_index[key]
+
+
+    # Function to convert an order returned by the REST API into the orders' table format
+    def __parseOrder(self, order) -> dict:
+        return {
+            "id": order["orderId"],
+            "symbol": order["symbol"],
+            "side": order["side"],
+            "type": order["type"],
+            "quantity": float(order["origQty"]),
+            "price": float(order["price"]),
+            "status": order["status"],
+            "timestamp": order["time"],
+            "filled_quantity": float(order["executedQty"])
+        }
+
+
+    # Function to initialize user's data, or to reconcile it with the exchange after a disconnection
     def __initializeUserData(self) -> None:
         # Fetching user's data
         account_info = self.client.get_account()
         
         # Fetchin user's open orders
-        open_orders = self.client.get_open_orders()
+        open_orders = [self.__parseOrder(open_order) for open_order in self.client.get_open_orders()]
+
+        # Fetching the final state of the known orders that are no longer open (i.e. filled while disconnected)
+        closed_orders = [self.__parseOrder(self.client.get_order(symbol=order["symbol"], orderId=order["id"])) for order in self.__closedOrders(open_orders)]
+
+        self.__loadUserData(account_info, open_orders + closed_orders)
+
 
+    # Function to get the known orders which are not in a terminal status, but no longer among the open orders
+    def __closedOrders(self, open_orders) -> list:
+        open_orders_ids = set(open_order["id"] for open_order in open_orders)
+        with self.user_data_lock:
+            return [order for order in self.orders.values() if order["status"] not in self.terminal_statuses and order["id"] not in open_orders_ids]
+
+
+    # Function to load the fetched user's data: the account information and the orders
+    def __loadUserData(self, account_info, orders) -> None:
         # Extracting user's assets balances
         balances = account_info["balances"]
         symbols = [symbol.replace(self.against_symbol, "") for symbol in self.symbols]
 
-        # Loading the assets' balance into a list
-        for balance in balances:
-            if balance["asset"] in symbols or balance["asset"] == self.against_symbol:
-                self.assets_balances.append(balance)
-
-        # Loading the user's open orders into a list
-        for open_order in open_orders:
-            self.orders.append({
-                "id": open_order["orderId"],
-                "symbol": open_order["symbol"],
-                "side": open_order["side"],
-                "type": open_order["type"],
-                "quantity": float(open_order["origQty"]),
-                "price": float(open_order["price"]),
-                "status": open_order["status"],
-                "timestamp": open_order["time"],
-                "filled_quantity": float(open_order["executedQty"])
-            })
+        with self.user_data_lock:
+            # Loading the user's orders into the table
+            for order in orders:
+                self.__storeOrder(order)
+
+            # Loading the assets' balance into the table, which reflect the funds locked by the orders loaded
+            for balance in balances:
+                if balance["asset"] in symbols or balance["asset"] == self.against_symbol:
+                    self.assets_balances[balance["asset"]] = {"asset": balance["asset"], "free": float(balance["free"]), "locked": float(balance["locked"])}
+
+            self.balances_version += 1
 
 
     # Callback function to collect and update user's data
     def __updateUserData(self, msg) -> None:
+        # Recording the message
+        if self.recorder is not None and msg["e"] != "error":
+            self.recorder.record("user", msg)
+
         # Error handling
-        if msg["e"] == "error" and msg["m"] == "Max reconnect retries reached":
-            self.status = "DISCONNECTED"
-            utils.log("Fatal Error - Websocket Disconnected")
-            raise Exception("Websocket Disconnected")
+        if msg["e"] == "error":
+            self.__handleDisconnection(msg)
 
         # Updating user's assets balance
         elif msg["e"] == "outboundAccountPosition":
-            for asset_balance in msg["B"]:
-                account_asset_balance = [balance for balance in self.assets_balances if balance["asset"] == asset_balance["a"]]
-                if len(account_asset_balance) > 0:
-                    account_asset_balance = account_asset_balance[0]
+            with self.user_data_lock:
+                for asset_balance in msg["B"]:
+                    account_asset_balance = self.assets_balances.setdefault(asset_balance["a"], {"asset": asset_balance["a"]})
+
+                    # Updating the free and locked quantity of the asset
+                    account_asset_balance["free"] = float(asset_balance["f"])
+                    account_asset_balance["locked"] = float(asset_balance["l"])
 
-                # Updating the free and locked quantity of the asset
-                account_asset_balance["free"] = float(asset_balance["f"])
-                account_asset_balance["locked"] = float(asset_balance["l"])
+                self.balances_version += 1
 
         # Updating user's open orders
         elif msg["e"] == "executionReport":
-            # Updating the order if it is already present
-            if msg['i'] in [o["id"] for o in self.orders]:
-                orders = [o for o in self.orders if o["id"] == msg['i']]
-                if len(orders) > 0:
-                    order = orders[0]
-                    order["status"] = msg["X"]
-                    order["filled_quantity"] = float(msg["z"])
-
-            # Adding the order if it is not present
-            else:
-                self.orders.append({
-                    "id": msg["i"],
-                    "symbol": msg["s"],
-                    "side": msg["S"],
-                    "type": msg["o"],
-                    "quantity": float(msg["q"]),
-                    "price": float(msg["p"]),
-                    "status": msg["X"],
-                    "timestamp": msg["T"],
-                    "filled_quantity": float(msg["z"])
-                })
+            with self.user_data_lock:
+                order = self.orders.get(msg["i"])
+
+                # Updating the order if it is already present
+                if order is not None:
+                    order = dict(order, status=msg["X"], filled_quantity=float(msg["z"]))
+
+                # Adding the order if it is not present
+                else:
+                    order = {
+                        "id": msg["i"],
+                        "symbol": msg["s"],
+                        "side": msg["S"],
+                        "type": msg["o"],
+                        "quantity": float(msg["q"]),
+                        "price": float(msg["p"]),
+                        "status": msg["X"],
+                        "timestamp": msg["T"],
+                        "filled_quantity": float(msg["z"])
+                    }
+
+                self.__storeOrder(order)
+
+
+    # Function to open the websocket streams
+    def __connect(self) -> None:
+        self.twm.start()
+        if self.multiplex:
+            # Subscribing to the klines of all the symbols and to the user's data over a single combined stream
+            self.listen_key = self.client.stream_get_listen_key()
+            streams = [f'{symbol.lower()}@kline_{self.interval}' for symbol in self.symbols] + [self.listen_key]
+            self.twm.start_multiplex_socket(callback=partial(self.__onMessage, self.__dispatchStream), streams=streams)
+
+        else:
+            # Starting a websocket stream for each symbol
+            for symbol in self.symbols:
+                self.twm.start_kline_socket(callback=partial(self.__onMessage, self.__updateSymbolsData), symbol=symbol.lower(), interval=self.interval)
+
+            # Starting a websocket stream to collect user's data
+            self.twm.start_user_socket(callback=partial(self.__onMessage, self.__updateUserData))
+
+
+    # Function to reopen the websocket streams with exponential backoff, backfilling the data missed in the meanwhile
+    def __reconnect(self) -> None:
+        # Buffering the klines of the new streams until the missed ones are spliced, so that the backfill of every symbol
+        # starts from the latest candle stored before the disconnection
+        with self.symbols_lock:
+            if self.pending_klines is None:
+                self.pending_klines = []
+
+        delay = self.reconnect_delay
+        while True:
+            self.status = "RECONNECTING"
+            utils.log('Websocket reconnecting')
+            try:
+                # Stopping the previous websocket manager and starting a new one
+                try:
+                    self.twm.stop()
+                except Exception:
+                    pass
+
+                self.twm = ThreadedStreamManager(**self.stream_manager_params)
+                self.__connect()
+
+                # Splicing the missed klines and then the buffered ones, and reconciling user's data, once the streams are already delivering the new events
+                self.__backfillSymbolsData()
+                self.__storePendingKlines()
+                self.__initializeUserData()
+
+                self.status = "CONNECTED"
+                utils.log('Websocket reconnected')
+                if self.metrics is not None:
+                    self.metrics.inc("reconnections_total")
+                return
+
+            except Exception as e:
+                utils.log(f'Error reconnecting websocket: {str(e)}')
+                if self.metrics is not None:
+                    self.metrics.inc("errors_total", labels={"source": "reconnection"})
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+
+    # Coroutine to collect the historical data of all the symbols concurrently, over the asynchronous client, restoring them from a checkpoint where possible
+    async def __initializeSymbolsDataAsync(self, checkpoint=None) -> None:
+        restored = self.__restoreSymbolsData(checkpoint)
+
+        start = self.__historicalStart()
+        symbols = [symbol.upper() for symbol in self.symbols if symbol.upper() not in restored]
+        historical_data = await asyncio.gather(*[self.async_client.get_historical_klines(symbol, self.interval, start) for symbol in symbols])
+
+        for symbol, symbol_historical_data in zip(symbols, historical_data):
+            self.__loadHistoricalData(symbol, symbol_historical_data)
+
+        # Fetching only the klines since the checkpoint for the restored symbols
+        if len(restored) > 0:
+            await self.__backfillSymbolsDataAsync(restored)
+
+
+    # Coroutine to initialize user's data, or to reconcile it with the exchange after a disconnection, over the asynchronous client
+    async def __initializeUserDataAsync(self) -> None:
+        account_info, open_orders = await asyncio.gather(self.async_client.get_account(), self.async_client.get_open_orders())
+        open_orders = [self.__parseOrder(open_order) for open_order in open_orders]
+
+        closed_orders = await asyncio.gather(*[self.async_client.get_order(symbol=order["symbol"], orderId=order["id"]) for order in self.__closedOrders(open_orders)])
+        closed_orders = [self.__parseOrder(closed_order) for closed_order in closed_orders]
+
+        self.__loadUserData(account_info, open_orders + closed_orders)
+
+
+    # Coroutine to fetch the klines of the symbols (all of them by default) missed while disconnected, over the asynchronous client
+    async def __backfillSymbolsDataAsync(self, symbols=None) -> None:
+        symbols = symbols if symbols is not None else [symbol.upper() for symbol in self.symbols]
+        klines = await asyncio.gather(*[self.async_client.get_historical_klines(symbol, self.interval, self.symbols_stores[symbol].lastTime(), limit=1000) for symbol in symbols])
+        backfilled = sum(self.__spliceKlines(symbol, symbol_klines) for symbol, symbol_klines in zip(symbols, klines))
+
+        utils.log(f'Symbols data backfilled - Klines: {backfilled}')
+        self.__notifyUpdate()
+
+
+    # Coroutine handling the messages of a socket, until it reports an error
+    async def __listen(self, socket) -> None:
+        while True:
+            msg = await socket.recv()
+            data = msg.get("data", msg)
+            self.__onMessage(self.__updateSymbolsData if data["e"] == "kline" else self.__updateUserData, data)
+
+            if data["e"] == "error":
+                return
+
+
+    # Coroutine waiting until a predicate holds or the timeout expires
+    async def __waitForAsync(self, predicate, timeout) -> None:
+        # With a simulated clock, the timeout expires when the clock is advanced past the deadline
+        if self.clock is not None and timeout is not None:
+            clock_deadline = self.clock() + timeout
+            wait_predicate = lambda: predicate() or self.clock() >= clock_deadline
+            timeout = None
+
+        else:
+            wait_predicate = predicate
+
+        deadline = self.loop.time() + timeout if timeout is not None else None
+        while not wait_predicate():
+            remaining = deadline - self.loop.time() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                return
+
+            future = self.loop.create_future()
+            self.async_waiters.add(future)
+            try:
+                await asyncio.wait_for(future, timeout=remaining)
+            except asyncio.TimeoutError:
+                return
+            finally:
+                self.async_waiters.discard(future)
+
+
+    # Function to load the checkpoint of a previous run, if it exists and is valid
+    def __loadCheckpoint(self) -> dict:
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return None
+
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                checkpoint = pickle.load(f)
+
+            if checkpoint.get("format") != 2 or checkpoint["interval"] != self.interval:
+                utils.log(f'Checkpoint ignored - Path: {self.checkpoint_path}')
+                return None
+
+            return checkpoint
+
+        except Exception as e:
+            utils.log(f'Error loading checkpoint: {str(e)}')
+            return None
+
+
+    # Function to restore the candle windows and the indicators of the symbols from a checkpoint, returning the symbols restored.
+    # A symbol is not restored if its window is older than the lookback, since the whole window would have to be fetched anyway.
+    def __restoreSymbolsData(self, checkpoint) -> list:
+        if checkpoint is None:
+            return []
+
+        start = self.__historicalStart()
+        restored = []
+        for symbol in [symbol.upper() for symbol in self.symbols]:
+            symbol_data = checkpoint["symbols"].get(symbol)
+            if symbol_data is None or len(symbol_data["times"]) == 0 or symbol_data["times"][-1] < start:
+                continue
+
+            self.__loadSymbolData(symbol, symbol_data["times"], symbol_data["values"], symbol_data["capacity"], symbol_data["indicators"])
+            restored.append(symbol)
+
+        utils.log(f'Symbols data restored from checkpoint - Symbols: {len(restored)}/{len(self.symbols)}')
+
+        return restored
+
+
+    # Function to restore the balances and the orders from a checkpoint, so that the orders filled or canceled since then are reconciled with the exchange
+    def __restoreUserData(self, checkpoint) -> None:
+        if checkpoint is None:
+            return
+
+        with self.user_data_lock:
+            self.assets_balances.update(checkpoint["balances"])
+            for order in checkpoint["orders"]:
+                self.__storeOrder(order)
+
+
+    # Function to write a checkpoint, logging the error on failure
+    def __writeCheckpoint(self) -> None:
+        try:
+            self.saveCheckpoint()
+        except Exception as e:
+            utils.log(f'Error writing checkpoint: {str(e)}')
+            if self.metrics is not None:
+                self.metrics.inc("errors_total", labels={"source": "checkpoint"})
+
+
+    # Function to start writing the checkpoints periodically and at exit
+    def __startCheckpoints(self) -> None:
+        if self.checkpoint_path is None:
+            return
+
+        def work():
+            while True:
+                time.sleep(self.checkpoint_period)
+                self.__writeCheckpoint()
+
+        threading.Thread(target=work, args=[], daemon=True).start()
+        atexit.register(self.__writeCheckpoint)
 
 
     """ PUBLIC METHODS """
     # Function to start the data collection
     def start(self) -> None:
+        # Loading the checkpoint of the previous run, if any
+        checkpoint = self.__loadCheckpoint()
+
         # Initializing symbols' hystorical data
-        self.__initializeSymbolsData()
+        self.__initializeSymbolsData(checkpoint)
 
-        # Initializing user's data
+        # Initializing user's data, reconciling the orders of the checkpoint with the exchange
+        self.__restoreUserData(checkpoint)
         self.__initializeUserData()
 
-        # Starting a websocket stream for each symbol
-        self.twm.start()
-        for symbol in self.symbols:
-            self.twm.start_kline_socket(callback=self.__updateSymbolsData, symbol=symbol.lower(), interval=self.interval)
+        # Checkpointing the collected data from now on
+        self.__startCheckpoints()
+
+        # In offline mode the messages are fed by the caller
+        if self.offline:
+            self.status = "CONNECTED"
+            return
 
-        # Starting a websocket stream to collect user's data
-        self.twm.start_user_socket(callback=self.__updateUserData)
+        # Starting the websocket streams
+        self.__connect()
 
         # Setting the object status to READY
         self.status = "CONNECTED"
 
-        # Joining the threads with the main thread
-        self.twm.join()
+        # Keeping the listen key of the combined stream alive, which is otherwise done by the user socket
+        if self.multiplex:
+            threading.Thread(target=self.__keepAliveListenKey, args=[], daemon=True).start()
+
+        # Supervising the connection: the streams are reopened whenever a websocket reports an error
+        while True:
+            self.disconnected.wait()
+            self.disconnected.clear()
+            self.__reconnect()
+
+
+    # Coroutine running the data collection on the current event loop, as an alternative to start(): the REST calls are made by the asynchronous
+    # client and the klines (over a single combined stream) and the user's data are received by the sockets of a BinanceSocketManager
+    async def run(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        if self.async_client is None:
+            # Sharing the scheduler of the synchronous client, if any, so that the requests of both the clients are scheduled together
+            scheduler = getattr(self.client, "scheduler", None)
+            self.async_client = await ScheduledAsyncClient.create(api_key=self.stream_manager_params["api_key"], api_secret=self.stream_manager_params["api_secret"], scheduler=scheduler)
+
+        # Initializing symbols' hystorical data and user's data, from the checkpoint of the previous run if any
+        checkpoint = self.__loadCheckpoint()
+        await self.__initializeSymbolsDataAsync(checkpoint)
+        self.__restoreUserData(checkpoint)
+        await self.__initializeUserDataAsync()
+
+        # Checkpointing the collected data from now on
+        self.__startCheckpoints()
+
+        # In offline mode the messages are fed by the caller, on the event loop
+        if self.offline:
+            self.status = "CONNECTED"
+            return
+
+        streams = [f'{symbol.lower()}@kline_{self.interval}' for symbol in self.symbols]
+        delay = self.reconnect_delay
+        reconnecting = False
+        while True:
+            try:
+                # Opening the sockets, with a new manager at every reconnection
+                socket_manager = BinanceSocketManager(self.async_client)
+                if self.stream_manager_params["stream_url"] is not None:
+                    socket_manager.STREAM_URL = self.stream_manager_params["stream_url"]
+
+                async with socket_manager.multiplex_socket(streams) as klines_socket, socket_manager.user_socket() as user_socket:
+                    # Splicing the missed klines and reconciling user's data, once the streams are already delivering the new events
+                    if reconnecting:
+                        await self.__backfillSymbolsDataAsync()
+                        await self.__initializeUserDataAsync()
+                        utils.log('Websocket reconnected')
+                        if self.metrics is not None:
+                            self.metrics.inc("reconnections_total")
+
+                    self.status = "CONNECTED"
+                    delay = self.reconnect_delay
+
+                    # Handling the messages of both the sockets until any of them reports an error
+                    tasks = [asyncio.create_task(self.__listen(klines_socket)), asyncio.create_task(self.__listen(user_socket))]
+                    try:
+                        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        for task in tasks:
+                            task.cancel()
+
+                    for task in done:
+                        task.result()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                utils.log(f'Error reconnecting websocket: {str(e)}')
+                if self.metrics is not None:
+                    self.metrics.inc("errors_total", labels={"source": "reconnection"})
+
+            # Reopening the sockets with exponential backoff
+            self.status = "RECONNECTING"
+            utils.log('Websocket reconnecting')
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+            reconnecting = True
+
+
+    # Coroutine waiting until the symbols' data change with respect to a given version, for the asyncio runtime
+    async def waitForUpdateAsync(self, version, timeout=None) -> int:
+        await self.__waitForAsync(lambda: self.version != version, timeout)
+        return self.version
+
+
+    # Coroutine waiting until an order reaches one of the given statuses, returning the latest known order on timeout, for the asyncio runtime
+    async def waitForOrderAsync(self, order_id, statuses, timeout=None) -> dict:
+        await self.__waitForAsync(lambda: order_id in self.orders and self.orders[order_id]["status"] in statuses, timeout)
+        return self.getOrder(order_id)
+
+
+    # Function to feed a message, either a raw event or a combined stream's one, as if it had been received by a websocket
+    def feed(self, msg) -> None:
+        data = msg.get("data", msg)
+        self.__onMessage(self.__updateSymbolsData if data["e"] == "kline" else self.__updateUserData, data)
+
+        # Waking up all the consumers, so that the timed waits are re-evaluated against the clock
+        with self.updates:
+            self.updates.notify_all()
+        with self.orders_updates:
+            self.orders_updates.notify_all()
+        self.__wakeAsyncWaiters()
+
+
+    # Function to check if a given number of consumers are all waiting with nothing left to process
+    def isIdle(self, consumers) -> bool:
+        waiters = list(self.waiters.values())
+        return len(waiters) >= consumers and not any(predicate() for predicate in waiters)
 
 
     # Function to get the DataCollector status
@@ -203,36 +968,148 @@ class DataCollector:
         return self.status
 
 
-    # Function to get the dataframe of a specific symbol
-    def getSymbolData(self, symbol) -> pd.DataFrame:
-        return self.symbols_dataframes[symbol]
+    # Function to get the statistics of the messages' processing times and event lags, in milliseconds
+    def getLatencyStats(self) -> dict:
+        with self.latency_lock:
+            processing_times = list(self.processing_times)
+            event_lags = list(self.event_lags)
+            messages = self.messages
+
+        return {
+            "messages": messages,
+            "processing_time": self.__latencyStats(processing_times),
+            "event_lag": self.__latencyStats(event_lags)
+        }
+
+
+    # Function to get the arrival time of the latest kline message (time.perf_counter() based), tracked only when metrics are enabled
+    def getLastKlineArrival(self) -> float:
+        return self.last_kline_arrival
+
+
+    # Function to get the version of the symbols' data, increased at every kline update
+    def getVersion(self) -> int:
+        return self.version
+
+
+    # Function to wait until the symbols' data change with respect to a given version
+    def waitForUpdate(self, version, timeout=None) -> int:
+        with self.updates:
+            self.__waitFor(self.updates, lambda: self.version != version, timeout)
+            return self.version
+
+
+    # Function to get a consistent copy of the candles of a specific symbol as a dataframe, for the collected interval or a higher one
+    def getSymbolData(self, symbol, interval=None) -> pd.DataFrame:
+        return self.getSymbolStore(symbol, interval).snapshot()
+
+
+    # Function to apply a function to consistent read-only views of the open times and of the OHLCV values of a specific symbol,
+    # for the collected interval or a higher one, without copying them (see CandleStore.read)
+    def readSymbolData(self, symbol, function, interval=None):
+        return self.getSymbolStore(symbol, interval).read(function)
+
+
+    # Function to get the consistent snapshot of the latest candle and indicators' values of a specific symbol
+    def getSymbolSnapshot(self, symbol) -> MappingProxyType:
+        return self.symbols_snapshots[symbol]
+
+
+    # Function to get the latest values of the streaming indicators of a specific symbol
+    def getSymbolIndicators(self, symbol) -> dict:
+        return {name: indicator.value for name, indicator in self.symbols_indicators[symbol].items()}
+
+
+    # Function to get the candle store of a specific symbol, for the collected interval or a higher one
+    def getSymbolStore(self, symbol, interval=None) -> CandleStore:
+        if interval is None or interval == self.interval:
+            return self.symbols_stores[symbol]
+
+        return self.symbols_aggregators[symbol][interval].store
 
     
     # Function to get balance of a given asset
     def getAssetBalance(self, symbol) -> dict:
-        asset = None
-        for balance in self.assets_balances:
-            if balance["asset"] == symbol:
-                asset = balance
+        with self.user_data_lock:
+            asset = self.assets_balances.get(symbol)
+            return dict(asset) if asset is not None else None
 
-        return asset
+
+    # Function to check if the balances have been updated since an order was first reported, so that they reflect the funds it locks
+    def isOrderSettled(self, order_id) -> bool:
+        with self.user_data_lock:
+            version = self.orders_balances_versions.get(order_id)
+            return version is not None and self.balances_version > version
 
 
     # Function to get an order by id
     def getOrder(self, order_id) -> dict:
-        order = None
-        for stored_order in self.orders:
-            if stored_order["id"] == order_id:
-                order = stored_order
+        with self.user_data_lock:
+            order = self.orders.get(order_id)
+            return dict(order) if order is not None else None
+
 
-        return order
+    # Function to wait until an order reaches one of the given statuses, returning the latest known order on timeout
+    def waitForOrder(self, order_id, statuses, timeout=None) -> dict:
+        with self.orders_updates:
+            self.__waitFor(self.orders_updates, lambda: order_id in self.orders and self.orders[order_id]["status"] in statuses, timeout)
+            order = self.orders.get(order_id)
+            return dict(order) if order is not None else None
+
+
+    # Function to get the orders of a symbol with a given status
+    def getOrders(self, symbol, status) -> list:
+        with self.user_data_lock:
+            return [dict(self.orders[order_id]) for order_id in self.orders_index.get((symbol, status), set())]
 
 
     # Function to delete an order by its id
     def deleteOrder(self, order_id) -> None:
-        self.orders = [order for order in self.orders if order["id"] != order_id]
+        with self.user_data_lock:
+            self.__removeOrder(order_id)
 
 
     # Function to remove all the orders from the memory
     def cleanOrders(self) -> None:
-        self.orders = []
\ No newline at end of file
+        with self.user_data_lock:
+            self.orders = {}
+            self.orders_index = {}
+            self.orders_balances_versions = {}
+            self.terminal_orders.clear()
+
+
+    # Function to write a checkpoint of the candle windows, the indicators' state, the balances and the orders to a binary file, replaced atomically
+    def saveCheckpoint(self, path=None) -> None:
+        path = path if path is not None else self.checkpoint_path
+        start = time.perf_counter()
+
+        # Copying the symbols' data, consistently with the indicators
+        symbols = {}
+        with self.symbols_lock:
+            for symbol, store in self.symbols_stores.items():
+                if store is None:
+                    continue
+
+                times, values = store.view()
+                symbols[symbol] = {"capacity": store.capacity, "times": times.copy(), "values": values.T.copy(), "indicators": copy.deepcopy(self.symbols_indicators[symbol])}
+
+        # Copying the user's data
+        with self.user_data_lock:
+            balances = {asset: dict(balance) for asset, balance in self.assets_balances.items()}
+            orders = [dict(order) for order in self.orders.values()]
+
+        checkpoint = {
+            "format": 2,
+            "timestamp": self.clock() if self.clock is not None else time.time(),
+            "interval": self.interval,
+            "symbols": symbols,
+            "balances": balances,
+            "orders": orders
+        }
+
+        with open(path + ".tmp", 'wb') as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+        if self.metrics is not None:
+            self.metrics.observe("checkpoint_seconds", time.perf_counter() - start)
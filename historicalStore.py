@@ -0,0 +1,183 @@
+import os
+import sys
+import glob
+import json
+import numpy as np
+import pandas as pd
+
+
+class HistoricalStore:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, root="historical_data") -> None:
+        # Initializing object's attributes
+        self.root = root
+        self.columns = {"time": "int64", "open": "float64", "high": "float64", "low": "float64", "close": "float64", "volume": "float64"}
+
+
+    # Function to get the directory containing the columns of a symbol for a given interval
+    def __directory(self, symbol, interval) -> str:
+        return os.path.join(self.root, f'{symbol}_{interval}')
+
+
+    # Function to get the path of the file of a column
+    def __columnPath(self, directory, column) -> str:
+        return os.path.join(directory, f'{column}.bin')
+
+
+    # Function to get the number of complete rows stored in a directory
+    def __rows(self, directory) -> int:
+        rows = []
+        for column, dtype in self.columns.items():
+            path = self.__columnPath(directory, column)
+            rows.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+
+        return min(rows)
+
+
+    # Function to convert a list of klines into typed columns
+    def __toColumns(self, klines) -> dict:
+        if isinstance(klines, dict):
+            return {column: np.asarray(klines[column], dtype=dtype) for column, dtype in self.columns.items()}
+
+        return {column: np.array([kline[i] for kline in klines], dtype=dtype) for i, (column, dtype) in enumerate(self.columns.items())}
+
+
+    """ PUBLIC METHODS """
+    # Function to check if the data of a symbol are available for a given interval
+    def exists(self, symbol, interval) -> bool:
+        return os.path.exists(self.__columnPath(self.__directory(symbol, interval), "time"))
+
+
+    # Function to get the number of candles stored for a symbol
+    def rows(self, symbol, interval) -> int:
+        directory = self.__directory(symbol, interval)
+        return self.__rows(directory) if os.path.exists(directory) else 0
+
+
+    # Function to replace the data of a symbol with a list of klines (oldest first)
+    def write(self, symbol, interval, klines) -> None:
+        directory = self.__directory(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+
+        # Writing every column to a temporary file and then replacing the current one
+        columns = self.__toColumns(klines)
+        for column, values in columns.items():
+            path = self.__columnPath(directory, column)
+            values.tofile(f'{path}.tmp')
+            os.replace(f'{path}.tmp', path)
+
+
+    # Function to append a list of klines (oldest first), newer than the stored ones, to the data of a symbol
+    def append(self, symbol, interval, klines) -> None:
+        if not self.exists(symbol, interval):
+            self.write(symbol, interval, klines)
+            return
+
+        directory = self.__directory(symbol, interval)
+        rows = self.__rows(directory)
+
+        for column, values in self.__toColumns(klines).items():
+            path = self.__columnPath(directory, column)
+            with open(path, 'r+b') as f:
+                # Dropping the partial rows left by an interrupted append
+                f.truncate(rows * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                values.tofile(f)
+
+
+    # Function to merge a list of klines, in any order, into the data of a symbol, replacing the stored copy of the duplicated candles
+    def merge(self, symbol, interval, klines) -> None:
+        if len(klines) == 0:
+            return
+
+        stored = self.load(symbol, interval)
+        fetched = self.__toColumns(klines)
+
+        # Sorting the candles by open time and removing the duplicates
+        times = np.concatenate([fetched["time"], stored["time"]])
+        times, indexes = np.unique(times, return_index=True)
+        merged = {column: np.concatenate([fetched[column], stored[column]])[indexes] for column in self.columns}
+
+        self.write(symbol, interval, merged)
+
+
+    # Function to get the gaps of the data of a symbol known to be missing on the exchange too (i.e. maintenance windows), as (start, end) ranges
+    def knownGaps(self, symbol, interval) -> list:
+        path = os.path.join(self.__directory(symbol, interval), 'gaps.json')
+        if not os.path.exists(path):
+            return []
+
+        with open(path, 'r') as f:
+            return [tuple(gap) for gap in json.load(f)]
+
+
+    # Function to record gaps of the data of a symbol known to be missing on the exchange too, so that they are not requested again
+    def addKnownGaps(self, symbol, interval, gaps) -> None:
+        gaps = sorted(set(self.knownGaps(symbol, interval)) | set(tuple(gap) for gap in gaps))
+        directory = self.__directory(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+
+        path = os.path.join(directory, 'gaps.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump([list(gap) for gap in gaps], f)
+        os.replace(f'{path}.tmp', path)
+
+
+    # Function to get the open time of the latest stored candle of a symbol
+    def lastTime(self, symbol, interval) -> int:
+        rows = self.rows(symbol, interval)
+        if rows == 0:
+            return None
+
+        times = np.memmap(self.__columnPath(self.__directory(symbol, interval), "time"), dtype='int64', mode='r', shape=(rows,))
+        return int(times[-1])
+
+
+    # Function to load the columns of a symbol as read-only memory-mapped arrays, optionally within a time range [start, end)
+    def load(self, symbol, interval, start=None, end=None) -> dict:
+        directory = self.__directory(symbol, interval)
+        rows = self.rows(symbol, interval)
+        if rows == 0:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in self.columns.items()}
+
+        # Mapping the columns without reading them
+        columns = {column: np.memmap(self.__columnPath(directory, column), dtype=dtype, mode='r', shape=(rows,)) for column, dtype in self.columns.items()}
+
+        # Locating the time range with a binary search, which only touches a few pages of the time column
+        first = int(np.searchsorted(columns["time"], start)) if start is not None else 0
+        last = int(np.searchsorted(columns["time"], end)) if end is not None else rows
+
+        return {column: values[first:last] for column, values in columns.items()}
+
+
+    # Function to load the data of a symbol into a pandas dataframe, optionally within a time range [start, end)
+    def loadDataFrame(self, symbol, interval, start=None, end=None) -> pd.DataFrame:
+        columns = self.load(symbol, interval, start, end)
+        return pd.DataFrame({column: np.asarray(values) for column, values in columns.items()})
+
+
+    # Function to convert a CSV file written by the previous versions of the backtester into the columnar format
+    def convertCSV(self, file_path, symbol, interval) -> int:
+        df = pd.read_csv(file_path, sep=";", header=None)
+        df.columns = list(self.columns.keys())
+        df = df.astype(self.columns)
+        df = df.sort_values(by="time").drop_duplicates(subset="time")
+
+        self.write(symbol, interval, {column: df[column].to_numpy() for column in self.columns})
+
+        return len(df)
+
+
+# Function to convert all the CSV files of a directory into the columnar format
+def convertCSVFiles(directory="historical_data", interval="1m") -> None:
+    store = HistoricalStore(root=directory)
+    for file_path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+        symbol = os.path.splitext(os.path.basename(file_path))[0]
+        rows = store.convertCSV(file_path, symbol, interval)
+        print(f'Historical data converted for symbol : {symbol} ({rows} candles)')
+
+
+if __name__ == "__main__":
+    # Usage: python historicalStore.py [directory] [interval]
+    convertCSVFiles(*sys.argv[1:3])
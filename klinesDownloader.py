@@ -0,0 +1,117 @@
+import time
+import numpy as np
+import datetime as dt
+import concurrent.futures
+from binance.helpers import interval_to_milliseconds
+from binance.exceptions import BinanceAPIException
+
+
+# Downloader of the historical klines, whose requests are paced by the scheduler of the client (i.e. a ScheduledClient, at the "data" priority),
+# so that the bulk downloads share the request weight with the rest of the bot and never delay nor get an order throttled
+class KlinesDownloader:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, client, store, interval, max_workers=4, page_limit=1000, max_retries=5) -> None:
+        # Initializing object's attributes
+        self.client = client
+        self.store = store
+        self.interval = interval
+        self.interval_ms = interval_to_milliseconds(interval)
+        self.max_workers = max_workers
+        self.page_limit = page_limit
+        self.max_retries = max_retries
+
+
+    # Function to request a single page of klines, retrying with exponential backoff when rate limited
+    def __getPage(self, symbol, start, end) -> list:
+        for attempt in range(self.max_retries):
+            try:
+                return self.client.get_klines(symbol=symbol, interval=self.interval, startTime=start, endTime=end, limit=self.page_limit)
+
+            except BinanceAPIException as e:
+                if e.status_code not in (418, 429) or attempt == self.max_retries - 1:
+                    raise
+
+                # The scheduler of the client already holds back the requests as long as requested by the exchange,
+                # otherwise waiting as long as requested or with an exponential backoff
+                if getattr(self.client, "scheduler", None) is None:
+                    retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+                    time.sleep(float(retry_after) if retry_after else 2 ** attempt)
+
+
+    # Function to iterate over the pages of closed klines within the time range [start, end)
+    def __fetchRange(self, symbol, start, end):
+        now = int(dt.datetime.now().timestamp() * 1000)
+        while start < end:
+            page = self.__getPage(symbol, start, end - 1)
+
+            # Keeping only the klines already closed, so that the stored candles are final
+            page = [kline[:6] for kline in page if kline[0] < end and kline[6] < now]
+            if len(page) == 0:
+                break
+
+            yield page
+            start = page[-1][0] + self.interval_ms
+
+
+    # Function to find the missing ranges [start, end) between the stored candles
+    def __findGaps(self, times) -> list:
+        deltas = np.diff(times)
+        gaps = np.flatnonzero(deltas > self.interval_ms)
+
+        return [(int(times[i]) + self.interval_ms, int(times[i + 1])) for i in gaps]
+
+
+    """ PUBLIC METHODS """
+    # Function to bring the stored data of a symbol up to date over the time range [start, end)
+    def downloadSymbol(self, symbol, start, end=None) -> int:
+        end = end if end is not None else int(dt.datetime.now().timestamp() * 1000)
+        start = start - start % self.interval_ms
+        downloaded = 0
+
+        # Fetching the candles older than the stored ones (or the whole range if nothing is stored)
+        if self.store.rows(symbol, self.interval) == 0:
+            for page in self.__fetchRange(symbol, start, end):
+                self.store.append(symbol, self.interval, page)
+                downloaded += len(page)
+
+        else:
+            times = self.store.load(symbol, self.interval)["time"]
+            if times[0] > start:
+                head = [kline for page in self.__fetchRange(symbol, start, int(times[0])) for kline in page]
+                self.store.merge(symbol, self.interval, head)
+                downloaded += len(head)
+
+            # Backfilling the gaps between the stored candles, except the ones already requested in vain
+            times = self.store.load(symbol, self.interval)["time"]
+            times = times[times >= start]
+            known_gaps = set(self.store.knownGaps(symbol, self.interval))
+            gaps = [gap for gap in self.__findGaps(times) if gap not in known_gaps]
+            klines = [kline for gap_start, gap_end in gaps for page in self.__fetchRange(symbol, gap_start, gap_end) for kline in page]
+            self.store.merge(symbol, self.interval, klines)
+            downloaded += len(klines)
+
+            # Recording the gaps still missing within the requested ones, which are gaps of the exchange too (i.e. maintenance windows)
+            if len(gaps) > 0:
+                times = self.store.load(symbol, self.interval)["time"]
+                times = times[times >= start]
+                missing = [gap for gap in self.__findGaps(times) if any(gap_start <= gap[0] and gap[1] <= gap_end for gap_start, gap_end in gaps)]
+                self.store.addKnownGaps(symbol, self.interval, missing)
+
+            # Fetching only the missing tail, page by page, so that an interrupted download resumes from the last stored candle
+            for page in self.__fetchRange(symbol, self.store.lastTime(symbol, self.interval) + self.interval_ms, end):
+                self.store.append(symbol, self.interval, page)
+                downloaded += len(page)
+
+        return downloaded
+
+
+    # Function to bring the stored data of a list of symbols up to date, with a bounded number of concurrent downloads
+    def download(self, symbols, start, end=None) -> dict:
+        downloaded = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.downloadSymbol, symbol, start, end): symbol for symbol in symbols}
+            for future in concurrent.futures.as_completed(futures):
+                downloaded[futures[future]] = future.result()
+
+        return downloaded
@@ -1,5 +1,6 @@
 import os
 import dotenv
+from metrics import Metrics
 from cryptoBot import CryptoBot
 
 
@@ -14,6 +15,17 @@ against_symbol = "USDT"
 minimum_profit = 1.003
 interval = '1m'
 
+# Port of the local metrics endpoint, the metrics being disabled when it is not set
+metrics_port = os.getenv('METRICS_PORT')
+metrics = Metrics() if metrics_port else None
+
+# Path of the checkpoint of the collected data, from which the bot is restarted without downloading the whole history,
+# the checkpoints being disabled when it is not set (i.e. CHECKPOINT_PATH=checkpoint.bin)
+checkpoint_path = os.getenv('CHECKPOINT_PATH')
+
+# Runtime of the bot: "threads" by default, or "asyncio" to run it as cooperative tasks of a single event loop
+runtime = os.getenv('BOT_RUNTIME', 'threads')
+
 # Instantiating the CryptoBot object
 crypto_bot = CryptoBot(
     api_key=api_key, 
@@ -21,10 +33,18 @@ crypto_bot = CryptoBot(
     symbols=symbols, 
     minumum_profit=minimum_profit,
     against_symbol=against_symbol, 
-    interval=interval
+    interval=interval,
+    metrics=metrics,
+    checkpoint_path=checkpoint_path
 )
 
 
 # Starting the bot's execution
 if __name__ == "__main__":
-    crypto_bot.start()
\ No newline at end of file
+    if metrics is not None:
+        metrics.serve(port=int(metrics_port))
+
+    if runtime == "asyncio":
+        crypto_bot.startAsync()
+    else:
+        crypto_bot.start()
\ No newline at end of file
@@ -0,0 +1,174 @@
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import threading
+import utils
+import datetime as dt
+
+
+# Recorder appending the messages received by the DataCollector to rotating gzip-compressed segments of
+# combined stream messages, i.e. {"stream": ..., "data": ...} JSON lines, written by a background thread
+class MarketRecorder:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, root="recordings", rotate_seconds=3600, max_segment_messages=1000000, max_queue_size=100000, compresslevel=6, metrics=None) -> None:
+        # Initializing object's attributes
+        self.root = root
+        self.rotate_seconds = rotate_seconds
+        self.max_segment_messages = max_segment_messages
+        self.compresslevel = compresslevel
+        self.dropped = 0
+        self.lost = 0
+
+        # Metrics registry, if any
+        self.metrics = metrics
+
+        # Creating the bounded queue of the messages to write
+        self.queue = queue.Queue(maxsize=max_queue_size)
+
+        # Current segment's handle, opening time and number of messages
+        self.segment = None
+        self.segment_start = 0
+        self.segment_messages = 0
+
+        os.makedirs(self.root, exist_ok=True)
+
+        # Starting the background writer and closing the current segment on exit, so that it is a complete gzip file
+        self.worker = threading.Thread(target=self.__work, args=[], daemon=True)
+        self.worker.start()
+        atexit.register(self.close)
+
+
+    # Function to open a new segment, named after its opening time
+    def __openSegment(self) -> None:
+        self.__closeSegment()
+
+        name = dt.datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')
+        self.segment = gzip.open(os.path.join(self.root, f'{name}.jsonl.gz'), 'wt', compresslevel=self.compresslevel)
+        self.segment_start = time.monotonic()
+        self.segment_messages = 0
+
+
+    # Function to close the current segment
+    def __closeSegment(self) -> None:
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+
+    # Writer's loop: draining the queue in batches
+    def __work(self) -> None:
+        while True:
+            items = [self.queue.get()]
+            while len(items) < 1000:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Index of the message being written, and of the first message of the batch written to the current segment and not flushed yet
+            current = 0
+            unflushed = 0
+            try:
+                for current, item in enumerate(items):
+                    if item is None:
+                        self.__closeSegment()
+                        unflushed = current + 1
+                        continue
+
+                    # Rotating the segment by age or by number of messages
+                    if self.segment is None or self.segment_messages >= self.max_segment_messages or time.monotonic() - self.segment_start >= self.rotate_seconds:
+                        self.__openSegment()
+                        unflushed = current
+
+                    self.segment.write(json.dumps(item, separators=(',', ':')) + '\n')
+                    self.segment_messages += 1
+
+                # Flushing the compressor, so that the current segment can be read while it is written
+                current = len(items)
+                if self.segment is not None:
+                    self.segment.flush()
+
+            # The writer must survive any failure (i.e. a full disk), so that the websocket callbacks are never affected:
+            # the segment is closed and given up, and the messages of the batch which did not reach it are counted as lost,
+            # including the ones already written to it if it can not be closed either
+            except Exception as e:
+                try:
+                    self.__closeSegment()
+                    lost = sum(1 for item in items[current:] if item is not None)
+                except Exception:
+                    self.segment = None
+                    lost = sum(1 for item in items[unflushed:] if item is not None)
+
+                self.lost += lost
+                utils.log(f'Error writing the recording segment: {str(e)} - Lost messages: {lost}')
+                if self.metrics is not None:
+                    self.metrics.inc("errors_total", labels={"source": "recorder"})
+
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+
+    """ PUBLIC METHODS """
+    # Function to enqueue a message of a stream without ever blocking the caller
+    def record(self, stream, data) -> None:
+        try:
+            self.queue.put_nowait({"stream": stream, "data": data})
+        except queue.Full:
+            self.dropped += 1
+
+
+    # Function to write all the pending messages and to close the current segment
+    def close(self) -> None:
+        self.queue.put(None)
+        self.queue.join()
+
+
+# Function to list the segments of a recordings directory, oldest first
+def listSegments(root="recordings") -> list:
+    return sorted(glob.glob(os.path.join(root, '*.jsonl.gz')))
+
+
+# Function to iterate over the recorded messages of a directory, of a segment or of a (possibly uncompressed) JSON lines file
+def readMessages(path):
+    paths = listSegments(path) if os.path.isdir(path) else [path]
+    for path in paths:
+        with (gzip.open(path, 'rt') if path.endswith('.gz') else open(path, 'r')) as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+            # The segment being written may end with an incomplete block
+            except (EOFError, json.JSONDecodeError):
+                pass
+
+
+# Function to add the closed klines of the recorded messages to the historical data used by the backtester
+def exportKlines(root, store, interval="1m") -> dict:
+    klines = {}
+    for message in readMessages(root):
+        data = message["data"]
+        if data.get("e") == "kline" and data["k"]["x"] and data["k"]["i"] == interval:
+            kline = data["k"]
+            klines.setdefault(data["s"], []).append([kline["t"], kline["o"], kline["h"], kline["l"], kline["c"], kline["v"]])
+
+    for symbol, symbol_klines in klines.items():
+        store.merge(symbol, interval, symbol_klines)
+
+    return {symbol: len(symbol_klines) for symbol, symbol_klines in klines.items()}
+
+
+if __name__ == "__main__":
+    from historicalStore import HistoricalStore
+
+    # Usage: python marketRecorder.py [recordings directory] [historical data directory] [interval]
+    exported = exportKlines(sys.argv[1] if len(sys.argv) > 1 else "recordings", HistoricalStore(root=sys.argv[2] if len(sys.argv) > 2 else "historical_data"), *sys.argv[3:4])
+    for symbol, rows in exported.items():
+        print(f'Recorded klines exported for symbol : {symbol} ({rows} candles)')
@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Default bounds of the latency histograms' buckets, in seconds
+latency_buckets = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+
+# Histogram counting the observations of a value in fixed buckets, with their sum and maximum
+class Histogram:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, buckets=latency_buckets) -> None:
+        # Initializing object's attributes
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+
+    """ PUBLIC METHODS """
+    # Function to add an observation
+    def observe(self, value) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+
+    # Function to get a consistent copy of the histogram's state: the cumulative counts of the buckets, the count, the sum and the maximum
+    def state(self) -> tuple:
+        with self.lock:
+            counts = list(self.counts)
+            count, total, maximum = self.count, self.sum, self.max
+
+        cumulative = []
+        running = 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+
+        return cumulative, count, total, maximum
+
+
+    # Function to estimate a quantile as the upper bound of the bucket containing it
+    def quantile(self, q, cumulative=None, count=None) -> float:
+        if cumulative is None:
+            cumulative, count, _, _ = self.state()
+
+        if count == 0:
+            return None
+
+        i = bisect.bisect_left(cumulative, q * count)
+        return self.buckets[i] if i < len(self.buckets) else self.max
+
+
+# Registry of the counters and histograms of the bot, exposed as Prometheus text, over HTTP or as periodic JSON snapshots.
+# The instrumented objects receive a registry as an optional parameter: without it, they are not instrumented at all.
+class Metrics:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, prefix="cryptobot_") -> None:
+        # Initializing object's attributes
+        self.prefix = prefix
+        self.start_time = time.time()
+
+        # Creating the tables of the counters and of the histograms, indexed by name and labels
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+        self.server = None
+
+
+    # Function to get the key of a metric from its name and labels
+    def __key(self, name, labels) -> tuple:
+        return (self.prefix + name, tuple(sorted(labels.items())))
+
+
+    # Function to format the labels of a metric
+    def __formatLabels(self, labels, extra=()) -> str:
+        labels = list(labels) + list(extra)
+        if len(labels) == 0:
+            return ''
+
+        return '{' + ','.join(f'{label}="{value}"' for label, value in labels) + '}'
+
+
+    """ PUBLIC METHODS """
+    # Function to increase a counter
+    def inc(self, name, value=1, labels={}) -> None:
+        key = self.__key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+    # Function to get a histogram, creating it on first use
+    def histogram(self, name, labels={}, buckets=latency_buckets) -> Histogram:
+        key = self.__key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets=buckets)
+
+        return histogram
+
+
+    # Function to add an observation to a histogram
+    def observe(self, name, value, labels={}) -> None:
+        self.histogram(name, labels).observe(value)
+
+
+    # Function to wrap a function so that the duration of its calls is observed by a histogram, in seconds
+    def timed(self, name, function, labels={}):
+        histogram = self.histogram(name, labels)
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+
+    # Function to wrap a coroutine function so that the duration of its calls is observed by a histogram, in seconds
+    def timedAsync(self, name, function, labels={}):
+        histogram = self.histogram(name, labels)
+
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+
+    # Function to get the values of all the metrics as a JSON serializable dictionary
+    def snapshot(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+
+        snapshot = {"timestamp": time.time(), "uptime": time.time() - self.start_time, "counters": {}, "histograms": {}}
+        for (name, labels), value in sorted(counters.items()):
+            snapshot["counters"][name + self.__formatLabels(labels)] = value
+
+        for (name, labels), histogram in sorted(histograms.items(), key=lambda item: item[0]):
+            cumulative, count, total, maximum = histogram.state()
+            snapshot["histograms"][name + self.__formatLabels(labels)] = {
+                "count": count,
+                "sum": total,
+                "mean": total / count if count > 0 else None,
+                "max": maximum,
+                "p50": histogram.quantile(0.5, cumulative, count),
+                "p90": histogram.quantile(0.9, cumulative, count),
+                "p99": histogram.quantile(0.99, cumulative, count)
+            }
+
+        return snapshot
+
+
+    # Function to get the values of all the metrics in the Prometheus text exposition format
+    def prometheus(self) -> str:
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+
+        lines = []
+        for name in sorted(set(name for name, _ in counters)):
+            lines.append(f'# TYPE {name} counter')
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f'{name}{self.__formatLabels(labels)} {value}')
+
+        for name in sorted(set(name for name, _ in histograms)):
+            lines.append(f'# TYPE {name} histogram')
+            for (histogram_name, labels), histogram in sorted(histograms.items(), key=lambda item: item[0]):
+                if histogram_name != name:
+                    continue
+
+                cumulative, count, total, _ = histogram.state()
+                for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], cumulative):
+                    lines.append(f'{name}_bucket{self.__formatLabels(labels, [("le", bound)])} {bucket_count}')
+                lines.append(f'{name}_sum{self.__formatLabels(labels)} {total}')
+                lines.append(f'{name}_count{self.__formatLabels(labels)} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+    # Function to serve the metrics over HTTP, as Prometheus text on /metrics and as JSON on /metrics.json
+    def serve(self, port=9100, host="127.0.0.1") -> ThreadingHTTPServer:
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = metrics.prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(metrics.snapshot()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            # The requests are not logged on the standard error
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, args=[], daemon=True).start()
+
+        return self.server
+
+
+    # Function to periodically write a JSON snapshot of the metrics to a file, replaced atomically
+    def writeSnapshots(self, path="metrics.json", period=60) -> None:
+        def work():
+            while True:
+                time.sleep(period)
+                try:
+                    with open(path + ".tmp", 'w') as f:
+                        json.dump(self.snapshot(), f, indent=4)
+                    os.replace(path + ".tmp", path)
+
+                # The writer must survive any failure (i.e. a full disk)
+                except Exception:
+                    pass
+
+        threading.Thread(target=work, args=[], daemon=True).start()
+
+
+    # Function to stop the HTTP server
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+
+if __name__ == "__main__":
+    import urllib.request
+
+    # Usage: python metrics.py [url of a running bot's metrics, e.g. http://127.0.0.1:9100/metrics.json]
+    with urllib.request.urlopen(sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:9100/metrics.json") as response:
+        print(json.dumps(json.loads(response.read()), indent=4))
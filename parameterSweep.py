@@ -0,0 +1,145 @@
+import os
+import itertools
+import indicators
+import backtesting
+import numpy as np
+import pandas as pd
+import concurrent.futures
+from multiprocessing import shared_memory
+from strategies import SMADivergenceStrategy
+
+
+# Global variables of the worker processes
+worker_arrays = {}
+worker_buffers = []
+worker_features_cache = {}
+
+
+# Function to copy an array into a new shared memory block
+def shareArray(array) -> tuple:
+    buffer = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=buffer.buf)
+    shared_array[:] = array
+
+    return buffer, {"name": buffer.name, "shape": array.shape, "dtype": array.dtype.str}
+
+
+# Function to attach a worker process to the shared price arrays
+def initWorker(arrays_specs, symbols) -> None:
+    for key, spec in arrays_specs.items():
+        buffer = shared_memory.SharedMemory(name=spec["name"])
+        worker_buffers.append(buffer)
+        worker_arrays[key] = np.ndarray(spec["shape"], dtype=np.dtype(spec["dtype"]), buffer=buffer.buf)
+
+    worker_arrays["symbols"] = symbols
+
+
+# Function to get the features of the worker's symbols for a given SMA window, i.e. the close prices and the SMA
+# stacked as (symbols x features x periods), computing them only once per process
+def getFeatures(window) -> np.ndarray:
+    if window not in worker_features_cache:
+        close = worker_arrays["close"]
+        sma = np.vstack([indicators.SMA(pd.Series(row), window=window).to_numpy() for row in close])
+        worker_features_cache[window] = np.stack([close, sma], axis=1)
+
+    return worker_features_cache[window]
+
+
+# Function to compute the summary statistics of a transactions table
+def summarizeTransactions(transactions, investment) -> dict:
+    if len(transactions) == 0:
+        return {"transactions": 0, "winning_rate": 0.0, "total_profit": 0.0, "percentage_profit": 0.0, "mean_time_to_sell": np.nan, "min_time_to_sell": np.nan, "max_time_to_sell": np.nan}
+
+    return {
+        "transactions": len(transactions),
+        "winning_rate": round(len(transactions.loc[transactions["transaction_profit"] > 0]) / len(transactions) * 100, 4),
+        "total_profit": round(transactions.iloc[-1].balance - investment, 4),
+        "percentage_profit": round(((transactions.iloc[-1].balance / investment) - 1) * 100, 4),
+        "mean_time_to_sell": np.mean(transactions.time_to_sell),
+        "min_time_to_sell": np.min(transactions.time_to_sell),
+        "max_time_to_sell": np.max(transactions.time_to_sell)
+    }
+
+
+# Function to backtest a single combination of parameters inside a worker process
+def testParameters(parameters) -> dict:
+    divergence_threshold, minimum_profit, sma_window, fees = parameters
+
+    strategy = SMADivergenceStrategy(window=sma_window, threshold=divergence_threshold)
+    aligned = {
+        "symbols": worker_arrays["symbols"],
+        "time": worker_arrays["time"],
+        "close": worker_arrays["close"],
+        "high": worker_arrays["high"],
+        "features": getFeatures(sma_window)
+    }
+
+    transactions = backtesting.simulateStrategy(
+        aligned,
+        len(aligned["time"]),
+        strategy=strategy,
+        minimum_profit=minimum_profit,
+        buy_fees=fees,
+        sell_fees=fees
+    )
+
+    results = {"divergence_threshold": divergence_threshold, "minimum_profit": minimum_profit, "sma_window": sma_window, "fees": fees}
+    results.update(summarizeTransactions(transactions, backtesting.investment))
+
+    return results
+
+
+# Function to backtest every combination of the given parameters' ranges across a pool of processes
+def sweep(symbols_data, divergence_thresholds, minimum_profits, sma_windows, fees=[backtesting.buy_fees], workers=None) -> pd.DataFrame:
+    # Aligning the prices of the symbols and moving them into shared memory blocks
+    aligned = backtesting.alignSymbolsData(symbols_data, features=None)
+
+    buffers = []
+    arrays_specs = {}
+    try:
+        for key in ["time", "close", "high"]:
+            buffer, arrays_specs[key] = shareArray(aligned[key])
+            buffers.append(buffer)
+
+        # Grouping the combinations by SMA window, so that each worker computes every SMA as few times as possible
+        combinations = sorted(itertools.product(divergence_thresholds, minimum_profits, sma_windows, fees), key=lambda combination: combination[2])
+
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(combinations) // (workers * 4))
+
+        # Fanning the combinations out across the process pool
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=[arrays_specs, aligned["symbols"]]) as executor:
+            results = list(executor.map(testParameters, combinations, chunksize=chunksize))
+
+    finally:
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+
+    # Ranking the combinations by total profit
+    results = pd.DataFrame(results)
+    results = results.sort_values(by=["total_profit", "winning_rate"], ascending=False, ignore_index=True)
+
+    return results
+
+
+if __name__ == "__main__":
+    # Loading the historical data from the local files
+    dataframes = backtesting.loadData()
+
+    # Backtesting every combination of the parameters
+    results = sweep(
+        dataframes,
+        divergence_thresholds=[1.005, 1.0075, 1.01, 1.0125, 1.015, 1.02],
+        minimum_profits=[0.002, 0.003, 0.004, 0.005],
+        sma_windows=[50, 100, 200, 400],
+        fees=[0.00075, 0.001]
+    )
+
+    # Formatting the time information
+    for column in ["mean_time_to_sell", "min_time_to_sell", "max_time_to_sell"]:
+        results[column] = results[column].map(lambda time: backtesting.parseTime(time) if not np.isnan(time) else "-")
+
+    # Displaying results
+    with pd.option_context('display.max_rows', 50, 'display.width', 200):
+        print(results.head(50))
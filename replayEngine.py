@@ -0,0 +1,144 @@
+import sys
+import json
+import time
+import utils
+import threading
+from cryptoBot import CryptoBot
+from marketRecorder import readMessages
+from simulatedExchange import SimulatedExchange
+
+
+# Clock of the simulations, advanced by the replay engine to the event time of every message
+class SimulatedClock:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, start=0.0) -> None:
+        self.now = start
+
+
+    # Function to get the current time in seconds, as time.time() does
+    def __call__(self) -> float:
+        return self.now
+
+
+    """ PUBLIC METHODS """
+    # Function to move the clock forward to a given time in seconds
+    def advance(self, now) -> None:
+        self.now = max(self.now, now)
+
+
+# Engine replaying recorded market data through the real CryptoBot code path, against a simulated exchange
+class ReplayEngine:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, messages, bot_params, balances={"USDT": 1000.0}, fees=0.00075, warmup_candles=200, speed=None, idle_timeout=5.0, notifications=False) -> None:
+        # Initializing object's attributes
+        self.speed = speed
+        self.idle_timeout = idle_timeout
+        self.interval = bot_params.get("interval", "1m")
+        self.against_symbol = bot_params.get("against_symbol", "USDT")
+        self.symbols = bot_params["symbols"]
+
+        # Loading the recorded messages of the combined stream, i.e. {"stream": ..., "data": ...}, from a recordings directory or a JSON lines file
+        if isinstance(messages, str):
+            messages = readMessages(messages)
+
+        # Splitting the messages into the candles' history used to initialize the bot and the events to replay
+        history, self.messages = self.__splitMessages([message.get("data", message) for message in messages], warmup_candles)
+
+        # Instantiating the simulated clock, starting right after the history
+        self.clock = SimulatedClock(start=self.messages[0]["E"] / 1000 if len(self.messages) > 0 else 0.0)
+
+        # Instantiating the simulated exchange
+        self.exchange = SimulatedExchange(clock=self.clock, balances=balances, fees=fees, history=history, against_symbol=self.against_symbol)
+
+        # Instantiating the bot, connected to the simulated exchange and fed by the engine
+        self.bot = CryptoBot(api_key=None, api_secret=None, client=self.exchange, offline=True, clock=self.clock, **bot_params)
+        self.bot.buy_fees = fees
+        self.bot.sell_fees = fees
+
+        # Routing the user's data events of the simulated exchange to the bot
+        self.exchange.listener = self.bot.data_collector.feed
+
+        # The simulated trades must not be notified to the Discord channel
+        if not notifications:
+            utils.notifier.webhook_url = None
+
+
+    # Function to split the kline events into the first closed candles of every symbol, in the REST API format, and the following events
+    def __splitMessages(self, messages, warmup_candles) -> tuple:
+        history = {symbol: [] for symbol in self.symbols}
+        start = 0
+        for i, message in enumerate(messages):
+            if all(len(klines) >= warmup_candles for klines in history.values()):
+                break
+
+            start = i + 1
+            if message["e"] == "kline" and message["k"]["x"] and message["s"] in history:
+                kline = message["k"]
+                history[message["s"]].append([kline["t"], kline["o"], kline["h"], kline["l"], kline["c"], kline["v"], kline["T"]])
+
+        return history, messages[start:]
+
+
+    # Function to wait until all the trading threads are waiting with nothing left to process
+    def __waitIdle(self) -> None:
+        deadline = time.monotonic() + self.idle_timeout
+        while not self.bot.data_collector.isIdle(self.bot.max_positions) and time.monotonic() < deadline:
+            time.sleep(0)
+
+
+    """ PUBLIC METHODS """
+    # Function to replay the messages, in lockstep with the bot, and to get the results of the simulation
+    def run(self) -> dict:
+        # Starting the bot, whose DataCollector is initialized from the simulated exchange
+        threading.Thread(target=self.bot.start, args=[], daemon=True).start()
+        while self.bot.data_collector.getStatus() != "CONNECTED":
+            time.sleep(0.01)
+
+        self.__waitIdle()
+
+        start = time.perf_counter()
+        for message in self.messages:
+            # Pacing the replay on the event times if a speed is set
+            if self.speed is not None:
+                delay = (message["E"] - self.messages[0]["E"]) / 1000 / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            self.clock.advance(message["E"] / 1000)
+
+            # Matching the open orders against the new prices before the bot sees them
+            if message["e"] == "kline":
+                self.exchange.matchKline(message)
+
+            self.bot.data_collector.feed(message)
+
+            # Waiting for the bot to react to the message before replaying the next one
+            self.__waitIdle()
+
+        elapsed_time = time.perf_counter() - start
+        simulated_time = (self.messages[-1]["E"] - self.messages[0]["E"]) / 1000 if len(self.messages) > 0 else 0.0
+
+        return {
+            "messages": len(self.messages),
+            "elapsed_time": elapsed_time,
+            "simulated_time": simulated_time,
+            "speedup": simulated_time / elapsed_time if elapsed_time > 0 else None,
+            "trades": list(self.exchange.trades),
+            "balances": self.exchange.get_account()["balances"],
+            "latency": self.bot.data_collector.getLatencyStats()
+        }
+
+
+if __name__ == "__main__":
+    # Usage: python replayEngine.py <messages file> <symbols (comma separated)> [minimum profit] [speed]
+    engine = ReplayEngine(
+        sys.argv[1],
+        bot_params={"symbols": sys.argv[2].split(","), "minumum_profit": float(sys.argv[3]) if len(sys.argv) > 3 else 1.003},
+        speed=float(sys.argv[4]) if len(sys.argv) > 4 else None
+    )
+
+    results = engine.run()
+    print(json.dumps({key: value for key, value in results.items() if key != "trades"}, indent=4))
+    print(f'Trades: {len(results["trades"])}')
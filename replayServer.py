@@ -0,0 +1,122 @@
+import sys
+import json
+import time
+import asyncio
+import threading
+import websockets
+from marketRecorder import readMessages
+from urllib.parse import urlparse, parse_qs
+
+
+# Local websocket server replaying recorded messages with the Binance stream endpoints' layout,
+# so that the data collector can be exercised without connecting to the exchange
+class ReplayServer:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, messages, host="127.0.0.1", port=8765, speed=0.0) -> None:
+        # Initializing object's attributes
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.url = f'ws://{host}:{port}/'
+
+        # Loading the recorded messages of the combined stream, i.e. {"stream": ..., "data": ...}, from a recordings directory or a JSON lines file
+        if isinstance(messages, str):
+            messages = list(readMessages(messages))
+
+        self.messages = messages
+
+        self.loop = None
+        self.stopped = None
+        self.ready = threading.Event()
+        self.thread = None
+
+
+    # Function to get the messages to replay to a connection, according to the path it requested
+    def __selectMessages(self, path) -> tuple:
+        url = urlparse(path)
+
+        # Combined stream: "/stream?streams=btcusdt@kline_1m/<listen key>"
+        if url.path.rstrip("/").endswith("stream"):
+            streams = parse_qs(url.query).get("streams", [""])[0].split("/")
+            combined = True
+
+        # Raw stream: "/ws/btcusdt@kline_1m" or "/ws/<listen key>"
+        else:
+            streams = [url.path.split("/")[-1]]
+            combined = False
+
+        # The streams without "@" are listen keys, which receive the recorded user's data whatever key they were recorded with
+        listen_keys = [stream for stream in streams if "@" not in stream]
+
+        selected = []
+        for message in self.messages:
+            if message["stream"] in streams:
+                selected.append(message)
+
+            elif "@" not in message["stream"] and len(listen_keys) > 0:
+                selected.append({"stream": listen_keys[0], "data": message["data"]})
+
+        return selected, combined
+
+
+    # Function to replay the messages to a connection, paced on their event times if a speed is set
+    async def __handle(self, websocket, path=None) -> None:
+        # The path is passed as an argument, an attribute or a request's attribute, according to the version of the library
+        path = path or getattr(websocket, "path", None) or websocket.request.path
+        messages, combined = self.__selectMessages(path)
+
+        previous_time = None
+        for message in messages:
+            event_time = message["data"].get("E")
+            if self.speed > 0 and previous_time is not None and event_time is not None:
+                await asyncio.sleep(max(event_time - previous_time, 0) / 1000 / self.speed)
+
+            previous_time = event_time if event_time is not None else previous_time
+
+            # Refreshing the event time, so that the event lag measured by the client does not include the age of the recording
+            data = dict(message["data"], E=int(time.time() * 1000)) if event_time is not None else message["data"]
+
+            await websocket.send(json.dumps({"stream": message["stream"], "data": data} if combined else data))
+
+        # Keeping the connection open, as the exchange does, until the server is stopped
+        await self.stopped.wait()
+
+
+    # Server's event loop
+    def __run(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.stopped = asyncio.Event()
+
+        async def serve():
+            async with websockets.serve(self.__handle, self.host, self.port):
+                self.ready.set()
+                await self.stopped.wait()
+
+        self.loop.run_until_complete(serve())
+        self.loop.close()
+
+
+    """ PUBLIC METHODS """
+    # Function to start the server in a background thread
+    def start(self) -> str:
+        self.thread = threading.Thread(target=self.__run, args=[], daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+        return self.url
+
+
+    # Function to stop the server
+    def stop(self) -> None:
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+            self.thread.join()
+
+
+if __name__ == "__main__":
+    # Usage: python replayServer.py <messages file> [port] [speed]
+    server = ReplayServer(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8765, speed=float(sys.argv[3]) if len(sys.argv) > 3 else 0.0)
+    print(f'Replaying {len(server.messages)} messages on {server.start()}')
+    server.thread.join()
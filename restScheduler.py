@@ -0,0 +1,344 @@
+import time
+import heapq
+import asyncio
+import aiohttp
+import requests
+import threading
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from binance.client import Client, AsyncClient
+
+
+# Priorities of the REST requests, the most urgent first: placing and canceling orders, user's data, market data and bulk downloads
+priorities = ("order", "user", "data")
+
+# Request weights of the endpoints, by method and endpoint or by endpoint only (the others weigh 1)
+endpoint_weights = {
+    ("get", "order"): 2,
+    "klines": 2,
+    "account": 10,
+    "openOrders": 3,
+    "allOrders": 10,
+    "myTrades": 10,
+    "exchangeInfo": 10,
+}
+
+# Endpoints of the user's data
+user_endpoints = ("account", "order", "openOrders", "allOrders", "myTrades", "userDataStream")
+
+
+# Function to get the priority and the expected weight of a request from its method and URI
+def requestClass(method, uri) -> tuple:
+    endpoint = urlparse(uri).path.rstrip("/").split("/")[-1]
+    weight = endpoint_weights.get((method, endpoint), endpoint_weights.get(endpoint, 1))
+
+    # Placing and canceling orders (i.e. POST and DELETE on "order", "order/oco" and "openOrders")
+    if method in ("post", "delete") and endpoint in ("order", "oco", "openOrders"):
+        return "order", weight
+
+    if endpoint in user_endpoints:
+        return "user", weight
+
+    return "data", weight
+
+
+# Function to get from the headers of a response the weight used in the current minute and, if the requests are throttled, the seconds to wait
+def responseLimits(status, headers) -> tuple:
+    used_weight = headers.get("X-MBX-USED-WEIGHT-1M", headers.get("X-MBX-USED-WEIGHT"))
+    used_weight = int(used_weight) if used_weight is not None else None
+
+    retry_after = None
+    if status in (418, 429):
+        retry_after = float(headers.get("Retry-After", 1))
+
+    return used_weight, retry_after
+
+
+# Scheduler of the REST requests shared by all the clients of the bot. The requests wait in a priority queue and are sent when:
+# - they are the most urgent waiting (the oldest first among the ones of the same priority)
+# - the token bucket of the request weight, resynchronized on the weight used reported by the exchange, can pay for them,
+#   keeping a reserve of weight that only the orders can spend, so that the bulk downloads never delay or get an order throttled
+# - the number of requests in flight is below the size of the connections' pool, keeping in the same way a reserve of connections
+#   that only the orders can use, so that an order never waits for the slow requests in flight to complete
+class RestScheduler:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, weight_per_minute=1200, reserve=0.2, max_in_flight=8, reserved_in_flight=1, metrics=None) -> None:
+        # Initializing object's attributes
+        self.capacity = weight_per_minute
+        self.tokens = weight_per_minute
+        self.refill_rate = weight_per_minute / 60
+        self.last_refill = time.monotonic()
+        self.reserve = reserve * weight_per_minute
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+        # Number of requests in flight that the other requests than the orders can reach, at least one
+        self.max_in_flight_others = max(1, max_in_flight - reserved_in_flight)
+
+        # Time until which the requests are held back, after the exchange throttled one
+        self.blocked_until = 0.0
+
+        # Creating the queue of the waiting requests, ordered by priority and arrival, shared by the threads and the coroutines.
+        # The threads wait on the condition, the coroutines on a future of their event loop, indexed by queue entry.
+        self.queue = []
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.async_waiters = {}
+
+        # Metrics registry, if any
+        self.metrics = metrics
+
+
+    # Function to refill the bucket according to the elapsed time
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+
+    # Function to get the seconds a request at the head of the queue has to wait before being sent: 0 if it can be sent now,
+    # None if it has to wait for a request in flight to complete
+    def __delay(self, priority, weight) -> float:
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        # Only the orders can use the reserved connections
+        if self.in_flight >= (self.max_in_flight if priority == "order" else self.max_in_flight_others):
+            return None
+
+        # Only the orders can spend the reserve
+        floor = 0 if priority == "order" else self.reserve
+        missing = floor + weight - self.tokens
+        if missing > 0:
+            return missing / self.refill_rate
+
+        return 0
+
+
+    # Function to wake up all the waiting requests, threads and coroutines, so that they check whether they can be sent (the caller must hold the condition)
+    def __notifyAll(self) -> None:
+        self.condition.notify_all()
+        for loop, future in self.async_waiters.values():
+            loop.call_soon_threadsafe(self.__wake, future)
+
+
+    # Function to wake up a coroutine, in the thread of its event loop
+    def __wake(self, future) -> None:
+        if not future.done():
+            future.set_result(None)
+
+
+    # Function to add a request to the queue, returning its entry (the caller must hold the condition)
+    def __enqueue(self, priority) -> tuple:
+        entry = (priorities.index(priority), self.sequence)
+        self.sequence += 1
+        heapq.heappush(self.queue, entry)
+
+        return entry
+
+
+    # Function to send a request if it is at the head of the queue and the bucket can pay for it, returning the seconds to wait otherwise,
+    # as __delay does (the caller must hold the condition)
+    def __admit(self, entry, priority, weight) -> float:
+        self.__refill()
+        delay = self.__delay(priority, weight) if self.queue[0] == entry else None
+        if delay == 0:
+            heapq.heappop(self.queue)
+            self.tokens -= weight
+            self.in_flight += 1
+
+            # Letting the next request in the queue check whether it can be sent too
+            self.__notifyAll()
+
+        return delay
+
+
+    # Function to remove from the queue a request whose wait is interrupted (the caller must hold the condition)
+    def __leave(self, entry) -> None:
+        if entry in self.queue:
+            self.queue.remove(entry)
+            heapq.heapify(self.queue)
+            self.__notifyAll()
+
+
+    # Function to record the wait of a request
+    def __observe(self, priority, start) -> None:
+        if self.metrics is not None:
+            self.metrics.observe("rest_wait_seconds", time.perf_counter() - start, labels={"priority": priority})
+            self.metrics.inc("rest_requests_total", labels={"priority": priority})
+
+
+    """ PUBLIC METHODS """
+    # Function to wait until a request of a given priority and weight can be sent
+    def acquire(self, priority="data", weight=1) -> None:
+        start = time.perf_counter()
+        with self.condition:
+            entry = self.__enqueue(priority)
+            try:
+                while True:
+                    delay = self.__admit(entry, priority, weight)
+                    if delay == 0:
+                        break
+
+                    self.condition.wait(timeout=delay)
+
+            # Leaving the queue if the wait is interrupted
+            except BaseException:
+                self.__leave(entry)
+                raise
+
+        self.__observe(priority, start)
+
+
+    # Coroutine to wait until a request of a given priority and weight can be sent, without blocking the event loop nor any thread.
+    # If the coroutine is cancelled while waiting, the request leaves the queue without consuming any weight.
+    async def acquireAsync(self, priority="data", weight=1) -> None:
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        with self.condition:
+            entry = self.__enqueue(priority)
+
+        try:
+            while True:
+                with self.condition:
+                    delay = self.__admit(entry, priority, weight)
+                    if delay == 0:
+                        break
+
+                    future = loop.create_future()
+                    self.async_waiters[entry] = (loop, future)
+
+                try:
+                    await asyncio.wait({future}, timeout=delay)
+                finally:
+                    with self.condition:
+                        self.async_waiters.pop(entry, None)
+
+        # Leaving the queue if the wait is interrupted
+        except BaseException:
+            with self.condition:
+                self.__leave(entry)
+            raise
+
+        self.__observe(priority, start)
+
+
+    # Function to complete a request, given the weight used in the current minute reported by the exchange and the seconds to wait if it was throttled
+    def release(self, used_weight=None, retry_after=None) -> None:
+        with self.condition:
+            self.in_flight -= 1
+
+            # Resynchronizing the bucket on the weight actually used, which includes the requests of any other client of the same IP
+            if used_weight is not None:
+                self.__refill()
+                self.tokens = min(self.tokens, self.capacity - used_weight)
+
+            # Holding back all the requests as long as requested by the exchange
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+                if self.metrics is not None:
+                    self.metrics.inc("rest_throttled_total")
+
+            self.__notifyAll()
+
+
+    # Function to get the weight available and the number of requests waiting and in flight
+    def getStatus(self) -> dict:
+        with self.condition:
+            self.__refill()
+            return {"tokens": self.tokens, "waiting": len(self.queue), "in_flight": self.in_flight}
+
+
+# Binance API Client sending its requests through a scheduler, over a pool of keep-alive connections.
+# The base URL can be replaced (i.e. by the one of a local mock server).
+class ScheduledClient(Client):
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, api_key=None, api_secret=None, scheduler=None, pool_size=None, base_url=None, requests_params=None, tld='com', testnet=False) -> None:
+        # Initializing object's attributes, before the base class opens the session and pings the exchange
+        self.scheduler = scheduler if scheduler is not None else RestScheduler()
+        self.pool_size = pool_size if pool_size is not None else self.scheduler.max_in_flight
+        if base_url is not None:
+            self.API_URL = base_url.rstrip("/") + "/api"
+
+        super().__init__(api_key=api_key, api_secret=api_secret, requests_params=requests_params, tld=tld, testnet=testnet)
+
+
+    # Function to create the session, with a pool of keep-alive connections as large as the requests in flight
+    def _init_session(self) -> requests.Session:
+        session = super()._init_session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return session
+
+
+    # Function to send a request once the scheduler allows it. The request is signed only then, so that its timestamp is not aged by the wait.
+    def _request(self, method, uri, signed, force_params=False, **kwargs):
+        priority, weight = requestClass(method, uri)
+        self.scheduler.acquire(priority, weight)
+
+        response = None
+        try:
+            kwargs = self._get_request_kwargs(method, signed, force_params, **kwargs)
+            response = getattr(self.session, method)(uri, **kwargs)
+        finally:
+            self.scheduler.release(*(responseLimits(response.status_code, response.headers) if response is not None else (None, None)))
+
+        # The response is kept for compatibility only, as it may be replaced by a concurrent request
+        self.response = response
+        return self._handle_response(response)
+
+
+# Asynchronous Binance API Client sending its requests through a scheduler (i.e. the one of the synchronous client, so that they share the same budget)
+class ScheduledAsyncClient(AsyncClient):
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, api_key=None, api_secret=None, requests_params=None, tld='com', testnet=False, loop=None, scheduler=None, pool_size=None, base_url=None) -> None:
+        # Initializing object's attributes, before the base class opens the session
+        self.scheduler = scheduler if scheduler is not None else RestScheduler()
+        self.pool_size = pool_size if pool_size is not None else self.scheduler.max_in_flight
+        if base_url is not None:
+            self.API_URL = base_url.rstrip("/") + "/api"
+
+        super().__init__(api_key=api_key, api_secret=api_secret, requests_params=requests_params, tld=tld, testnet=testnet, loop=loop)
+
+
+    # Function to create the session, with a pool of keep-alive connections as large as the requests in flight
+    def _init_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(headers=self._get_headers(), connector=aiohttp.TCPConnector(limit=self.pool_size))
+
+
+    # Coroutine to send a request once the scheduler allows it. The request is released even if the coroutine is cancelled.
+    async def _request(self, method, uri, signed, force_params=False, **kwargs):
+        priority, weight = requestClass(method, uri)
+        await self.scheduler.acquireAsync(priority, weight)
+
+        limits = (None, None)
+        try:
+            kwargs = self._get_request_kwargs(method, signed, force_params, **kwargs)
+            async with getattr(self.session, method)(uri, **kwargs) as response:
+                limits = responseLimits(response.status, response.headers)
+                self.response = response
+                return await self._handle_response(response)
+        finally:
+            self.scheduler.release(*limits)
+
+
+    """ PUBLIC METHODS """
+    # Coroutine to create a client, to check its connection and to compute the offset of the timestamps signing the requests from the server's time
+    @classmethod
+    async def create(cls, api_key=None, api_secret=None, scheduler=None, pool_size=None, base_url=None, **kwargs):
+        self = cls(api_key=api_key, api_secret=api_secret, scheduler=scheduler, pool_size=pool_size, base_url=base_url, **kwargs)
+        try:
+            await self.ping()
+            res = await self.get_server_time()
+            self.timestamp_offset = res['serverTime'] - int(time.time() * 1000)
+            return self
+
+        except Exception:
+            await self.close_connection()
+            raise
@@ -0,0 +1,236 @@
+import threading
+
+
+# Matching engine standing in for the Binance API Client in the simulations: it fills the limit orders
+# against the klines replayed and reports the orders' and balances' updates as the user's data stream does
+class SimulatedExchange:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, clock, balances={"USDT": 1000.0}, fees=0.00075, history={}, symbols_info={}, against_symbol="USDT") -> None:
+        # Initializing object's attributes
+        self.clock = clock
+        self.fees = fees
+        self.against_symbol = against_symbol
+        self.lock = threading.RLock()
+
+        # Historical klines of the symbols in the REST API format, served to initialize the candles' window
+        self.history = history
+
+        # Exchange filters of the symbols, with permissive defaults for the symbols not listed
+        self.symbols_info = symbols_info
+
+        # Creating the account's balances, indexed by asset
+        self.balances = {asset: {"free": float(free), "locked": 0.0} for asset, free in balances.items()}
+
+        # Creating the table of orders, indexed by id, and the list of the executed trades
+        self.orders = {}
+        self.next_order_id = 1
+        self.trades = []
+
+        # Latest update of the current candle of each symbol, used to tell the prices traded since the previous update
+        self.last_klines = {}
+
+        # Callback receiving the user's data events (i.e. the feed hook of the DataCollector)
+        self.listener = None
+
+
+    # Function to get the current time of the simulation in milliseconds
+    def __now(self) -> int:
+        return int(self.clock() * 1000)
+
+
+    # Function to get the base asset of a symbol
+    def __baseAsset(self, symbol) -> str:
+        return symbol[:-len(self.against_symbol)] if symbol.endswith(self.against_symbol) else symbol
+
+
+    # Function to get the balance of an asset, creating it if missing
+    def __balance(self, asset) -> dict:
+        return self.balances.setdefault(asset, {"free": 0.0, "locked": 0.0})
+
+
+    # Function to send an event to the listener
+    def __emit(self, event) -> None:
+        if self.listener is not None:
+            self.listener(event)
+
+
+    # Function to report the update of an order and of the balances it affects
+    def __report(self, order, assets) -> None:
+        self.__emit({
+            "e": "executionReport",
+            "E": self.__now(),
+            "i": order["orderId"],
+            "s": order["symbol"],
+            "S": order["side"],
+            "o": order["type"],
+            "q": order["origQty"],
+            "p": order["price"],
+            "X": order["status"],
+            "T": order["updateTime"],
+            "z": order["executedQty"]
+        })
+
+        self.__emit({
+            "e": "outboundAccountPosition",
+            "E": self.__now(),
+            "B": [{"a": asset, "f": str(self.balances[asset]["free"]), "l": str(self.balances[asset]["locked"])} for asset in assets]
+        })
+
+
+    # Function to create a limit order, locking the funds it requires
+    def __createOrder(self, symbol, side, quantity, price) -> dict:
+        quantity = float(quantity)
+        price = float(price)
+
+        if quantity <= 0 or price <= 0:
+            raise Exception(f'Invalid order - Quantity: {quantity} | Price: {price}')
+
+        with self.lock:
+            # Locking the quote asset for a buying order and the base asset for a selling one
+            asset = self.against_symbol if side == "BUY" else self.__baseAsset(symbol)
+            amount = quantity * price if side == "BUY" else quantity
+
+            balance = self.__balance(asset)
+            if balance["free"] < amount:
+                raise Exception(f'Account has insufficient balance for requested action ({asset})')
+
+            balance["free"] -= amount
+            balance["locked"] += amount
+
+            order = {
+                "orderId": self.next_order_id,
+                "symbol": symbol,
+                "side": side,
+                "type": "LIMIT",
+                "origQty": str(quantity),
+                "price": str(price),
+                "status": "NEW",
+                "time": self.__now(),
+                "updateTime": self.__now(),
+                "executedQty": "0"
+            }
+
+            self.orders[order["orderId"]] = order
+            self.next_order_id += 1
+
+            self.__report(order, [asset])
+
+            return dict(order)
+
+
+    # Function to fill an order at its limit price, charging the fees on the asset received
+    def __fillOrder(self, order) -> None:
+        quantity = float(order["origQty"])
+        price = float(order["price"])
+        base_asset = self.__baseAsset(order["symbol"])
+
+        if order["side"] == "BUY":
+            self.__balance(self.against_symbol)["locked"] -= quantity * price
+            self.__balance(base_asset)["free"] += quantity * (1 - self.fees)
+        else:
+            self.__balance(base_asset)["locked"] -= quantity
+            self.__balance(self.against_symbol)["free"] += quantity * price * (1 - self.fees)
+
+        order["status"] = "FILLED"
+        order["executedQty"] = order["origQty"]
+        order["updateTime"] = self.__now()
+
+        self.trades.append({"time": self.__now(), "symbol": order["symbol"], "side": order["side"], "price": price, "quantity": quantity, "order_id": order["orderId"]})
+
+        self.__report(order, [self.against_symbol, base_asset])
+
+
+    """ PUBLIC METHODS """
+    # Function to match the open orders of a symbol against a kline update (a kline websocket event)
+    def matchKline(self, kline_event) -> None:
+        kline = kline_event["k"]
+        symbol = kline_event["s"]
+
+        with self.lock:
+            # The prices traded since the previous update of the same candle are its close and the new extremes only
+            previous = self.last_klines.get(symbol)
+            low = float(kline["c"])
+            high = float(kline["c"])
+            if previous is None or previous["t"] != kline["t"] or float(kline["l"]) < float(previous["l"]):
+                low = float(kline["l"])
+            if previous is None or previous["t"] != kline["t"] or float(kline["h"]) > float(previous["h"]):
+                high = float(kline["h"])
+
+            self.last_klines[symbol] = kline
+
+            # Filling the buying orders priced above the lowest price and the selling orders priced below the highest one
+            for order in list(self.orders.values()):
+                if order["symbol"] != symbol or order["status"] != "NEW":
+                    continue
+
+                if (order["side"] == "BUY" and low <= float(order["price"])) or (order["side"] == "SELL" and high >= float(order["price"])):
+                    self.__fillOrder(order)
+
+
+    # Function to get the historical klines of a symbol from a given time
+    def get_historical_klines(self, symbol, interval, start_str, end_str=None, limit=1000, **kwargs) -> list:
+        return [kline for kline in self.history.get(symbol, []) if kline[0] >= int(start_str) and (end_str is None or kline[0] <= int(end_str))]
+
+
+    # Function to get the exchange information of the symbols
+    def get_exchange_info(self) -> dict:
+        symbols = set(self.history.keys()) | set(self.symbols_info.keys())
+        return {"symbols": [self.symbols_info.get(symbol, {
+            "symbol": symbol,
+            "status": "TRADING",
+            "filters": [
+                {"filterType": "LOT_SIZE", "stepSize": "0.00000001", "minQty": "0.00000001"},
+                {"filterType": "PRICE_FILTER", "tickSize": "0.00000001"},
+                {"filterType": "MIN_NOTIONAL", "minNotional": "10.00000000"}
+            ]
+        }) for symbol in symbols]}
+
+
+    # Function to get the account's balances
+    def get_account(self) -> dict:
+        with self.lock:
+            return {"balances": [{"asset": asset, "free": str(balance["free"]), "locked": str(balance["locked"])} for asset, balance in self.balances.items()]}
+
+
+    # Function to get the open orders
+    def get_open_orders(self, **kwargs) -> list:
+        with self.lock:
+            return [dict(order) for order in self.orders.values() if order["status"] == "NEW"]
+
+
+    # Function to get an order by id
+    def get_order(self, symbol, orderId) -> dict:
+        with self.lock:
+            return dict(self.orders[orderId])
+
+
+    # Function to create a limit buying order
+    def order_limit_buy(self, symbol, quantity, price, **kwargs) -> dict:
+        return self.__createOrder(symbol, "BUY", quantity, price)
+
+
+    # Function to create a limit selling order
+    def order_limit_sell(self, symbol, quantity, price, **kwargs) -> dict:
+        return self.__createOrder(symbol, "SELL", quantity, price)
+
+
+    # Function to cancel an open order, unlocking its funds
+    def cancel_order(self, symbol, orderId, **kwargs) -> dict:
+        with self.lock:
+            order = self.orders.get(orderId)
+            if order is None or order["status"] != "NEW":
+                raise Exception(f'Unknown order sent ({orderId})')
+
+            # Unlocking the funds of the order
+            asset = self.against_symbol if order["side"] == "BUY" else self.__baseAsset(symbol)
+            amount = float(order["origQty"]) * float(order["price"]) if order["side"] == "BUY" else float(order["origQty"])
+            self.__balance(asset)["locked"] -= amount
+            self.__balance(asset)["free"] += amount
+
+            order["status"] = "CANCELED"
+            order["updateTime"] = self.__now()
+
+            self.__report(order, [asset])
+
+            return dict(order)
@@ -0,0 +1,110 @@
+import abc
+import indicators
+import numpy as np
+import pandas as pd
+from functools import partial
+from streamingIndicators import StreamingSMA
+
+
+# Base class of the buying strategies shared by the live bot and the backtester.
+# A strategy declares the features it needs (candle columns or indicators) and scores all the symbols at once
+# on an array of features shaped (symbols x features), or (symbols x features x periods) in the backtester.
+class Strategy(abc.ABC):
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, name, features) -> None:
+        # Initializing object's attributes
+        self.name = name
+        self.features = features
+
+
+    """ PUBLIC METHODS """
+    # Function to get the factories of the streaming indicators required by the live bot, indexed by feature name
+    def liveIndicators(self) -> dict:
+        return {}
+
+
+    # Function to add the required indicators as columns of a symbol's historical dataframe
+    def applyIndicators(self, df) -> None:
+        pass
+
+
+    # Function to compute the latest features of a symbol from its window of candles (OHLCV values as one row per column, oldest first),
+    # as done by the worker processes instead of reading the streaming indicators
+    def windowFeatures(self, values) -> list:
+        df = pd.DataFrame(values.T, columns=['open', 'high', 'low', 'close', 'volume'])
+        self.applyIndicators(df)
+
+        return [float(df[feature].iloc[-1]) for feature in self.features]
+
+
+    # Function to score the symbols: the higher the better, -inf for the symbols not to buy
+    @abc.abstractmethod
+    def score(self, features) -> np.ndarray:
+        pass
+
+
+    # Function to get the buying prices of the symbols
+    def buyPrice(self, features) -> np.ndarray:
+        return features[:, self.features.index("close")]
+
+
+    # Function to select the best symbol (of every period), returning its index and its score
+    def rank(self, features) -> tuple:
+        scores = self.score(features)
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+
+        best_symbols = np.argmax(scores, axis=0)
+        best_scores = np.take_along_axis(scores, np.expand_dims(best_symbols, axis=0), axis=0)[0]
+
+        return best_symbols, best_scores
+
+
+    # Function to select the symbol to buy, if any, from the latest features of the symbols
+    def select(self, features) -> tuple:
+        if len(features) == 0:
+            return None, None
+
+        best_symbol, best_score = self.rank(features)
+        if best_score == -np.inf:
+            return None, None
+
+        return int(best_symbol), float(best_score)
+
+
+# Strategy buying the symbol whose price is the most below its SMA, provided that the SMA - price ratio reaches the threshold
+class SMADivergenceStrategy(Strategy):
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, window=200, threshold=1.01) -> None:
+        super().__init__(name=f'SMA_{window}_DIVERGENCE', features=["close", f'SMA_{window}'])
+        self.window = window
+        self.threshold = threshold
+
+
+    """ PUBLIC METHODS """
+    # Function to get the factories of the streaming indicators required by the live bot
+    def liveIndicators(self) -> dict:
+        return {f'SMA_{self.window}': partial(StreamingSMA, window=self.window)}
+
+
+    # Function to add the SMA as a column of a symbol's historical dataframe
+    def applyIndicators(self, df) -> None:
+        df[f'SMA_{self.window}'] = indicators.SMA(df["close"], window=self.window)
+
+
+    # Function to compute the latest close price and SMA of a symbol from its window of candles
+    def windowFeatures(self, values) -> list:
+        close_prices = values[3]
+        if len(close_prices) < self.window:
+            return [float(close_prices[-1]) if len(close_prices) > 0 else np.nan, np.nan]
+
+        return [float(close_prices[-1]), float(np.mean(close_prices[-self.window:]))]
+
+
+    # Function to score the symbols by SMA - price ratio
+    def score(self, features) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = features[:, 1] / features[:, 0]
+
+        return np.where(ratios >= self.threshold, ratios, -np.inf)
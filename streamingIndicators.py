@@ -0,0 +1,448 @@
+import math
+import numpy as np
+import pandas as pd
+from collections import deque
+
+
+# Whether the rolling windows of identical values are computed exactly, as done by pandas since its version 1.5 (GH#42064)
+same_values_exact = tuple(int(part) for part in pd.__version__.split(".")[:2]) >= (1, 5)
+
+
+# Running sum of a rolling window, replicating the Kahan summation of pandas' rolling mean, so that the streaming
+# moving averages are identical to the ones computed by indicators.py on the same sequence of close prices
+class RollingSum:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self) -> None:
+        # Initializing object's attributes
+        self.nobs = 0
+        self.sum = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_values = 0
+        self.previous = math.nan
+
+
+    """ PUBLIC METHODS """
+    # Function to add a value to the window
+    def add(self, value) -> None:
+        if math.isnan(value):
+            return
+
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum + y
+        self.compensation_add = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+
+        # Counting the identical values at the end of the window
+        self.same_values = self.same_values + 1 if value == self.previous else 1
+        self.previous = value
+
+
+    # Function to remove the oldest value from the window
+    def remove(self, value) -> None:
+        if math.isnan(value):
+            return
+
+        self.nobs -= 1
+        y = - value - self.compensation_remove
+        t = self.sum + y
+        self.compensation_remove = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+
+    # Function to compute the mean of the window, if it contains at least a given number of values
+    def mean(self, min_periods) -> float:
+        if self.nobs < min_periods or self.nobs == 0:
+            return math.nan
+
+        result = self.sum / self.nobs
+        if same_values_exact and self.same_values >= self.nobs:
+            return self.previous
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+
+        return result
+
+
+    # Function to copy the state of the window
+    def copy(self):
+        window = RollingSum.__new__(RollingSum)
+        window.__dict__.update(self.__dict__)
+
+        return window
+
+
+# Running mean and sum of squared deviations of a rolling window, replicating the Welford's algorithm with Kahan summation
+# of pandas' rolling variance, so that the streaming Bollinger Bands are identical to the ones computed by indicators.py
+class RollingVariance:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self) -> None:
+        # Initializing object's attributes
+        self.nobs = 0.0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_values = 0
+        self.previous = math.nan
+
+
+    """ PUBLIC METHODS """
+    # Function to add a value to the window
+    def add(self, value) -> None:
+        if math.isnan(value):
+            return
+
+        self.nobs += 1
+
+        # Counting the identical values at the end of the window
+        self.same_values = self.same_values + 1 if value == self.previous else 1
+        self.previous = value
+
+        previous_mean = self.mean - self.compensation_add
+        y = value - self.compensation_add
+        t = y - self.mean
+        self.compensation_add = t + self.mean - y
+        self.mean = self.mean + t / self.nobs
+        self.ssqdm = self.ssqdm + (value - previous_mean) * (value - self.mean)
+
+
+    # Function to remove the oldest value from the window
+    def remove(self, value) -> None:
+        if math.isnan(value):
+            return
+
+        self.nobs -= 1
+        if self.nobs == 0:
+            self.mean = 0.0
+            self.ssqdm = 0.0
+            return
+
+        previous_mean = self.mean - self.compensation_remove
+        y = value - self.compensation_remove
+        t = y - self.mean
+        self.compensation_remove = t + self.mean - y
+        self.mean = self.mean - t / self.nobs
+        self.ssqdm = self.ssqdm - (value - previous_mean) * (value - self.mean)
+
+
+    # Function to compute the sample variance of the window, if it contains at least a given number of values
+    def variance(self, min_periods) -> float:
+        if self.nobs < max(min_periods, 1) or self.nobs <= 1:
+            return math.nan
+
+        if same_values_exact and self.same_values >= self.nobs:
+            return 0.0
+
+        return self.ssqdm / (self.nobs - 1.0)
+
+
+    # Function to copy the state of the window
+    def copy(self):
+        window = RollingVariance.__new__(RollingVariance)
+        window.__dict__.update(self.__dict__)
+
+        return window
+
+
+# Streaming Simple Moving Average on close prices.
+# The running sum of the window is kept without the live (last) candle, which is added to a copy of it whenever its value
+# is computed, so that both appending a new candle and revising the last one cost O(1).
+class StreamingSMA:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, window=50) -> None:
+        # Initializing object's attributes
+        self.window = window
+        self.closed = deque()
+        self.sum = RollingSum()
+        self.live = math.nan
+        self.value = math.nan
+
+
+    # Function to compute the indicator value from the closed candles and the live one
+    def __compute(self) -> float:
+        if math.isnan(self.live):
+            return math.nan
+
+        window = self.sum.copy()
+        window.add(self.live)
+
+        return window.mean(self.window)
+
+
+    """ PUBLIC METHODS """
+    # Function to load a series of close prices (oldest first)
+    def load(self, close_prices) -> float:
+        for close_price in close_prices:
+            self.append(close_price)
+
+        return self.value
+
+
+    # Function to append the close price of a new candle
+    def append(self, close_price) -> float:
+        # The previous live candle becomes a closed one, and the oldest one leaves the window
+        if not math.isnan(self.live):
+            self.sum.add(self.live)
+            self.closed.append(self.live)
+            if len(self.closed) == self.window:
+                self.sum.remove(self.closed.popleft())
+
+        self.live = float(close_price)
+        self.value = self.__compute()
+
+        return self.value
+
+
+    # Function to revise the close price of the last candle
+    def update(self, close_price) -> float:
+        self.live = float(close_price)
+        self.value = self.__compute()
+
+        return self.value
+
+
+# Streaming Exponential Moving Average (adjust=False), replicating the recursion used by pandas' ewm
+class StreamingEMA:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, window=50, com=None) -> None:
+        # Initializing object's attributes
+        comass = com if com is not None else (window - 1) / 2
+        self.alpha = 1. / (1. + comass)
+        self.previous = math.nan
+        self.value = math.nan
+
+
+    # Function to apply one step of the exponential recursion
+    def __compute(self, weighted, current) -> float:
+        if math.isnan(current):
+            return weighted
+
+        if math.isnan(weighted):
+            return current
+
+        old_wt = 1. - self.alpha
+        new_wt = self.alpha
+        if weighted != current:
+            weighted = old_wt * weighted + new_wt * current
+            weighted /= (old_wt + new_wt)
+
+        return weighted
+
+
+    """ PUBLIC METHODS """
+    # Function to load a series of values (oldest first)
+    def load(self, values) -> float:
+        for value in values:
+            self.append(value)
+
+        return self.value
+
+
+    # Function to append the value of a new candle
+    def append(self, value) -> float:
+        self.previous = self.value
+        self.value = self.__compute(self.previous, float(value))
+
+        return self.value
+
+
+    # Function to revise the value of the last candle
+    def update(self, value) -> float:
+        self.value = self.__compute(self.previous, float(value))
+
+        return self.value
+
+
+# Streaming Relative Strength Index on close prices
+class StreamingRSI:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, window=14) -> None:
+        # Initializing object's attributes
+        self.ema_up = StreamingEMA(com=window - 1)
+        self.ema_down = StreamingEMA(com=window - 1)
+        self.previous_close = math.nan
+        self.live = math.nan
+        self.value = math.nan
+
+
+    # Function to compute the gain and the loss of a close price with respect to the previous one
+    def __gainLoss(self, close_price) -> tuple:
+        delta = close_price - self.previous_close
+        up = max(delta, 0.0) if not math.isnan(delta) else math.nan
+        down = -1 * min(delta, 0.0) if not math.isnan(delta) else math.nan
+
+        return up, down
+
+
+    # Function to compute the relative strength index from the smoothed values
+    def __rsi(self) -> float:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_strength = np.float64(self.ema_up.value) / np.float64(self.ema_down.value)
+            rsi = np.round(100.0 - (100.0 / (1.0 + relative_strength)), 2)
+
+        return float(rsi)
+
+
+    """ PUBLIC METHODS """
+    # Function to load a series of close prices (oldest first)
+    def load(self, close_prices) -> float:
+        for close_price in close_prices:
+            self.append(close_price)
+
+        return self.value
+
+
+    # Function to append the close price of a new candle
+    def append(self, close_price) -> float:
+        self.previous_close = self.live
+        self.live = float(close_price)
+
+        up, down = self.__gainLoss(self.live)
+        self.ema_up.append(up)
+        self.ema_down.append(down)
+        self.value = self.__rsi()
+
+        return self.value
+
+
+    # Function to revise the close price of the last candle
+    def update(self, close_price) -> float:
+        self.live = float(close_price)
+
+        up, down = self.__gainLoss(self.live)
+        self.ema_up.update(up)
+        self.ema_down.update(down)
+        self.value = self.__rsi()
+
+        return self.value
+
+
+# Streaming MACD indicator on close prices
+class StreamingMACD:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, windows=[12, 26, 9]) -> None:
+        # Initializing object's attributes
+        self.ema_fast = StreamingEMA(window=windows[0])
+        self.ema_slow = StreamingEMA(window=windows[1])
+        self.ema_signal = StreamingEMA(window=windows[2])
+        self.value = (math.nan, math.nan, math.nan)
+
+
+    # Function to compute the MACD, the signal line and their divergence
+    def __compute(self) -> tuple:
+        macd = self.ema_fast.value - self.ema_slow.value
+        return macd, self.ema_signal.value, macd - self.ema_signal.value
+
+
+    """ PUBLIC METHODS """
+    # Function to load a series of close prices (oldest first)
+    def load(self, close_prices) -> tuple:
+        for close_price in close_prices:
+            self.append(close_price)
+
+        return self.value
+
+
+    # Function to append the close price of a new candle
+    def append(self, close_price) -> tuple:
+        self.ema_fast.append(close_price)
+        self.ema_slow.append(close_price)
+        self.ema_signal.append(self.ema_fast.value - self.ema_slow.value)
+        self.value = self.__compute()
+
+        return self.value
+
+
+    # Function to revise the close price of the last candle
+    def update(self, close_price) -> tuple:
+        self.ema_fast.update(close_price)
+        self.ema_slow.update(close_price)
+        self.ema_signal.update(self.ema_fast.value - self.ema_slow.value)
+        self.value = self.__compute()
+
+        return self.value
+
+
+# Streaming Bollinger Bands on close prices.
+# The running sum and variance of the window are kept without the live (last) candle, which is added to copies of them
+# whenever the bands are computed.
+class StreamingBOLL:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, window=20, mult=2) -> None:
+        # Initializing object's attributes
+        self.window = window
+        self.mult = mult
+        self.closed = deque()
+        self.sum = RollingSum()
+        self.variance = RollingVariance()
+        self.live = math.nan
+        self.value = (math.nan, math.nan)
+
+
+    # Function to compute the bands from the closed candles and the live one
+    def __compute(self) -> tuple:
+        if math.isnan(self.live):
+            return (math.nan, math.nan)
+
+        window_sum = self.sum.copy()
+        window_sum.add(self.live)
+        window_variance = self.variance.copy()
+        window_variance.add(self.live)
+
+        # Computing the moving average and the sample standard deviation as pandas does, the negative variances being zeroed
+        sma = window_sum.mean(self.window)
+        variance = window_variance.variance(self.window)
+        std = math.sqrt(variance) if not variance < 0 else 0.0
+
+        return (sma + self.mult * std, sma - self.mult * std)
+
+
+    """ PUBLIC METHODS """
+    # Function to load a series of close prices (oldest first)
+    def load(self, close_prices) -> tuple:
+        for close_price in close_prices:
+            self.append(close_price)
+
+        return self.value
+
+
+    # Function to append the close price of a new candle
+    def append(self, close_price) -> tuple:
+        # The previous live candle becomes a closed one, and the oldest one leaves the window
+        if not math.isnan(self.live):
+            self.sum.add(self.live)
+            self.variance.add(self.live)
+            self.closed.append(self.live)
+            if len(self.closed) == self.window:
+                oldest = self.closed.popleft()
+                self.sum.remove(oldest)
+                self.variance.remove(oldest)
+
+        self.live = float(close_price)
+        self.value = self.__compute()
+
+        return self.value
+
+
+    # Function to revise the close price of the last candle
+    def update(self, close_price) -> tuple:
+        self.live = float(close_price)
+        self.value = self.__compute()
+
+        return self.value
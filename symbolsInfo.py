@@ -0,0 +1,104 @@
+import time
+import utils
+import threading
+
+
+class SymbolsInfo:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, client, symbols, ttl=3600) -> None:
+        # Initializing object's attributes
+        self.client = client
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.ttl = ttl
+        self.last_refresh = 0
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+        # Creating the table of the symbols' metadata
+        self.symbols_info = {}
+
+
+    # Function to get the number of decimal digits of a filter's size (i.e. "0.00100000" --> 3)
+    def __getDecimals(self, size) -> int:
+        decimals = 0
+        is_decimal = False
+        for c in size:
+            if is_decimal is True:
+                decimals += 1
+            if c == '1':
+                break
+            if c == '.':
+                is_decimal = True
+
+        return decimals
+
+
+    # Function to extract the metadata of a symbol from its exchange information
+    def __parseSymbolInfo(self, symbol_info) -> dict:
+        filters = {filter["filterType"]: filter for filter in symbol_info["filters"]}
+
+        # Extracting the filters of the symbol
+        lot_size = filters["LOT_SIZE"]
+        price_filter = filters["PRICE_FILTER"]
+        notional = filters.get("MIN_NOTIONAL", filters.get("NOTIONAL", {}))
+
+        return {
+            "symbol": symbol_info["symbol"],
+            "status": symbol_info["status"],
+            "step_size": float(lot_size["stepSize"]),
+            "min_quantity": float(lot_size["minQty"]),
+            "tick_size": float(price_filter["tickSize"]),
+            "min_notional": float(notional.get("minNotional", 0)),
+            "quantity_decimals": self.__getDecimals(lot_size["stepSize"]),
+            "price_decimals": self.__getDecimals(price_filter["tickSize"])
+        }
+
+
+    # Function to refresh the table in a background thread, keeping the cached metadata in the meanwhile
+    def __refreshAsync(self) -> None:
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        # Refreshing the table, logging the error on failure
+        def refresh():
+            try:
+                self.refresh()
+            except Exception as e:
+                utils.log(f'Error refreshing symbols information: {str(e)}')
+            finally:
+                self.refreshing = False
+
+        threading.Thread(target=refresh, args=[], daemon=True).start()
+
+
+    """ PUBLIC METHODS """
+    # Function to load the metadata of all the symbols with a single request to the exchange
+    def refresh(self) -> None:
+        exchange_info = self.client.get_exchange_info()
+
+        symbols_info = {}
+        for symbol_info in exchange_info["symbols"]:
+            if symbol_info["symbol"] in self.symbols:
+                symbols_info[symbol_info["symbol"]] = self.__parseSymbolInfo(symbol_info)
+
+        # Replacing the table at once, so that readers never see a partially loaded table
+        self.symbols_info = symbols_info
+        self.last_refresh = time.monotonic()
+
+
+    # Function to get the metadata of a symbol without any network I/O, so that it never blocks a trading thread nor the event loop.
+    # The table is loaded when the bot starts: an unknown symbol schedules a refresh of the table and raises an error meanwhile.
+    def getSymbolInfo(self, symbol) -> dict:
+        symbol_info = self.symbols_info.get(symbol)
+
+        # Scheduling a refresh of the table if the symbol is unknown or if the table is older than the TTL
+        if symbol_info is None or time.monotonic() - self.last_refresh >= self.ttl:
+            self.__refreshAsync()
+
+        if symbol_info is None:
+            raise Exception(f'Symbol information not available for {symbol}')
+
+        return symbol_info
@@ -0,0 +1,20 @@
+import os
+import sys
+
+# The bot's modules are flat modules at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import utils
+
+
+# Writing the logs of the tests to a temporary directory instead of the logs file of the working directory
+@pytest.fixture(autouse=True, scope="session")
+def tmpLogFile(tmp_path_factory):
+    utils.notifier.flush(timeout=5)
+    if utils.notifier.log_handle is not None:
+        utils.notifier.log_handle.close()
+        utils.notifier.log_handle = None
+
+    utils.notifier.log_file = str(tmp_path_factory.mktemp("logs") / "logs.log")
+    yield utils.notifier.log_file
@@ -0,0 +1,101 @@
+import asyncio
+import numpy as np
+import utils
+from cryptoBot import CryptoBot
+from replayEngine import ReplayEngine, SimulatedClock
+from simulatedExchange import SimulatedExchange
+from strategies import SMADivergenceStrategy
+
+
+symbols = ["BTCUSDT", "ETHUSDT"]
+start_time = 1600000020000
+
+
+# Asynchronous client of the simulated exchange, as the asynchronous Binance API Client
+class AsyncExchange:
+    def __init__(self, exchange):
+        self.exchange = exchange
+
+    def __getattr__(self, name):
+        method = getattr(self.exchange, name)
+
+        async def request(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return request
+
+
+# Function to build the kline events of random walks: three updates per candle, the last one closing it
+def makeMessages(candles=320, seed=0):
+    rng = np.random.default_rng(seed)
+    messages = []
+    prices = {symbol: 100.0 for symbol in symbols}
+    for i in range(candles):
+        open_time = start_time + i * 60000
+        for symbol in symbols:
+            open = prices[symbol]
+            close = open
+            high = open
+            low = open
+            for j, event_time in enumerate([open_time + 20000, open_time + 40000, open_time + 59999]):
+                close = close * (1 + rng.normal(0, 0.002))
+                high = max(high, close)
+                low = min(low, close)
+                kline = {"t": open_time, "T": open_time + 59999, "s": symbol, "i": "1m", "o": str(open), "h": str(high), "l": str(low), "c": str(close), "v": "1.0", "x": j == 2}
+                messages.append({"e": "kline", "E": event_time, "s": symbol, "k": kline})
+            prices[symbol] = close
+
+    return sorted(messages, key=lambda message: message["E"])
+
+
+def test_asyncio_runtime_trades_as_the_threads_runtime():
+    utils.notifier.webhook_url = None
+    messages = makeMessages()
+    bot_params = {"symbols": symbols, "minumum_profit": 1.003, "max_positions": 2, "strategy": SMADivergenceStrategy(window=20, threshold=1.002)}
+
+    # Replaying the messages to the bot run by threads
+    engine = ReplayEngine(messages, bot_params=bot_params, warmup_candles=200)
+    results = engine.run()
+    engine.bot.worker_pool.close()
+    assert len(results["trades"]) > 10
+
+    # Replaying the same messages, in lockstep, to the bot run by the asyncio runtime
+    history, events = engine._ReplayEngine__splitMessages(messages, 200)
+    clock = SimulatedClock(start=events[0]["E"] / 1000)
+    exchange = SimulatedExchange(clock=clock, history=history)
+    bot = CryptoBot(api_key=None, api_secret=None, client=exchange, async_client=AsyncExchange(exchange), offline=True, clock=clock, **bot_params)
+    data_collector = bot.data_collector
+    exchange.listener = data_collector.feed
+
+    # Function to wait until all the trading coroutines are waiting with nothing left to process
+    async def waitIdle():
+        for _ in range(10000):
+            if len(data_collector.async_waiters) >= bot.max_positions:
+                return
+            await asyncio.sleep(0)
+
+        raise TimeoutError('The trading coroutines are not waiting')
+
+    async def main():
+        bot_task = asyncio.ensure_future(bot.run())
+        try:
+            while len(data_collector.async_waiters) < bot.max_positions:
+                assert not bot_task.done()
+                await asyncio.sleep(0.01)
+
+            for message in events:
+                clock.advance(message["E"] / 1000)
+                exchange.matchKline(message)
+                data_collector.feed(message)
+                await waitIdle()
+
+        finally:
+            bot_task.cancel()
+            await asyncio.gather(bot_task, return_exceptions=True)
+
+    asyncio.run(main())
+    bot.worker_pool.close()
+
+    assert data_collector.getStatus() == "CONNECTED"
+    assert exchange.trades == results["trades"]
+    assert exchange.get_account()["balances"] == results["balances"]
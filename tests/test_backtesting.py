@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+import backtesting
+from strategies import SMADivergenceStrategy
+
+
+# Function to build the historical data of random walks, with the strategy's indicators
+def makeSymbolsData(strategy, symbols=("BTCUSDT", "ETHUSDT", "BNBUSDT"), periods=600, seed=1):
+    rng = np.random.default_rng(seed)
+    symbols_data = []
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, periods)))
+        high = close * (1 + np.abs(rng.normal(0, 0.002, periods)))
+        df = pd.DataFrame({"time": 1600000020000 + np.arange(periods) * 60000, "open": close, "high": high, "low": close * 0.999, "close": close, "volume": 1.0})
+        strategy.applyIndicators(df)
+        symbols_data.append({"symbol": symbol, "historical_data": df})
+
+    return symbols_data
+
+
+@pytest.mark.parametrize("periods", [600, 450])
+def test_vectorized_backtest_matches_the_loop(periods):
+    strategy = SMADivergenceStrategy(window=20, threshold=1.005)
+    symbols_data = makeSymbolsData(strategy)
+
+    transactions = backtesting.testStrategy(symbols_data, periods, strategy)
+    vectorized_transactions = backtesting.testStrategyVectorized(symbols_data, periods, strategy)
+
+    # Same trades, prices, holding times and balances, including the incomplete last one sold at the latest close
+    assert len(transactions) > 5
+    pd.testing.assert_frame_equal(transactions, vectorized_transactions, check_dtype=False, check_exact=True)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from candleAggregator import CandleAggregator
+
+
+# Function to build random 1m candles, starting at an open time which is not aligned to the higher intervals
+def makeCandles(count, seed=0):
+    rng = np.random.default_rng(seed)
+    times = 1600000020000 + 7 * 60000 + np.arange(count, dtype='int64') * 60000
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    open = close + rng.normal(0, 0.5, count)
+    high = np.maximum(open, close) + rng.random(count)
+    low = np.minimum(open, close) - rng.random(count)
+    volume = rng.random(count) * 10
+
+    return times, np.vstack([open, high, low, close, volume])
+
+
+# Function to aggregate the candles with pandas, as the reference
+def resample(times, values, interval):
+    df = pd.DataFrame(values.T, columns=['open', 'high', 'low', 'close', 'volume'], index=pd.to_datetime(times, unit='ms'))
+    bars = df.resample(interval).agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).dropna()
+
+    return bars.index.asi8 // 10 ** 6, bars.to_numpy().T
+
+
+@pytest.mark.parametrize("interval, rule", [("5m", "5min"), ("15m", "15min"), ("1h", "60min")])
+def test_bars_match_a_pandas_resample(interval, rule):
+    # 137 candles, so that both the first and the last bars are partial
+    times, values = makeCandles(137)
+    expected_times, expected_values = resample(times, values, rule)
+
+    # Loading the first candles, then streaming the others, each one revised once before closing
+    aggregator = CandleAggregator("1m", interval, base_capacity=200)
+    aggregator.load(times[:50], values[:, :50])
+    for i in range(50, len(times)):
+        aggregator.update(int(times[i]), tuple(values[:, i] * 1.01))
+        aggregator.update(int(times[i]), tuple(values[:, i]))
+
+    bars_times, bars_values = aggregator.store.view()
+    assert list(bars_times) == list(expected_times)
+    assert np.allclose(bars_values, expected_values, rtol=0, atol=1e-9)
+
+    # Loading all the candles at once gives the same bars, including the partial last one
+    aggregator.load(times, values)
+    bars_times, bars_values = aggregator.store.view()
+    assert list(bars_times) == list(expected_times)
+    assert np.allclose(bars_values, expected_values, rtol=0, atol=1e-9)
+
+
+def test_partial_last_bar_is_updated_by_the_live_candle():
+    times, values = makeCandles(13)
+    aggregator = CandleAggregator("1m", "5m", base_capacity=100)
+    aggregator.load(times[:-1], values[:, :-1])
+
+    # The live candle opens the second minute of the last bar, and is revised
+    aggregator.update(int(times[-1]), (1.0, 1000.0, 0.5, 2.0, 3.0))
+    aggregator.update(int(times[-1]), (1.0, 999.0, 0.5, 2.5, 4.0))
+
+    last = aggregator.store.last()
+    bar_time = int(times[-1] - times[-1] % 300000)
+    first = int(np.flatnonzero(times - times % 300000 == bar_time)[0])
+    assert last["time"] == bar_time
+    assert last["open"] == values[0, first]
+    assert last["high"] == 999.0
+    assert last["low"] == min(0.5, values[2, first:-1].min())
+    assert last["close"] == 2.5
+    assert last["volume"] == pytest.approx(values[4, first:-1].sum() + 4.0)
+
+
+def test_intervals_not_aligned_to_the_base_one_are_rejected():
+    with pytest.raises(Exception):
+        CandleAggregator("1m", "1w", base_capacity=100)
+    with pytest.raises(Exception):
+        CandleAggregator("3m", "5m", base_capacity=100)
@@ -0,0 +1,101 @@
+import pytest
+from candleStore import CandleStore
+
+
+# Function to build the OHLCV values of a candle from its index
+def candleValues(i):
+    return [i + 0.1, i + 0.4, i + 0.0, i + 0.2, 100.0 + i]
+
+
+def test_append_fills_the_store_in_order():
+    store = CandleStore(capacity=5)
+    assert len(store) == 0
+    assert store.lastTime() is None
+    assert store.last() is None
+
+    for i in range(3):
+        store.append(i * 60000, candleValues(i))
+
+    times, values = store.view()
+    assert len(store) == 3
+    assert list(times) == [0, 60000, 120000]
+    assert list(values[3]) == [0.2, 1.2, 2.2]
+    assert store.lastTime() == 120000
+    assert store.last() == {"open": 2.1, "high": 2.4, "low": 2.0, "close": 2.2, "volume": 102.0, "time": 120000}
+
+
+def test_append_wraps_around_at_capacity():
+    store = CandleStore(capacity=5)
+    for i in range(12):
+        store.append(i * 60000, candleValues(i))
+
+    # Only the latest candles are kept, as a contiguous window, oldest first
+    times, values = store.view()
+    assert len(store) == 5
+    assert list(times) == [i * 60000 for i in range(7, 12)]
+    assert list(store.column("close")) == [i + 0.2 for i in range(7, 12)]
+    assert values.shape == (5, 5) and not times.flags.writeable
+
+
+def test_update_revises_the_last_and_older_candles():
+    store = CandleStore(capacity=4)
+    for i in range(6):
+        store.append(i * 60000, candleValues(i))
+
+    # The last candle, then an older one within the window, are updated in place
+    assert store.update(5 * 60000, candleValues(50)) is True
+    assert store.last()["close"] == 50.2
+    assert store.update(3 * 60000, candleValues(30)) is True
+    assert list(store.column("close")) == [2.2, 30.2, 4.2, 50.2]
+
+    # The candles out of the window are not updated
+    assert store.update(0, candleValues(0)) is False
+    assert store.update(6 * 60000, candleValues(6)) is False
+    assert len(store) == 4
+
+
+def test_snapshot_and_view_have_the_same_ordering():
+    store = CandleStore(capacity=5)
+    store.load([i * 60000 for i in range(8)], [candleValues(i) for i in range(8)])
+    store.append(8 * 60000, candleValues(8))
+
+    times, values = store.view()
+    snapshot = store.snapshot()
+    assert list(snapshot.index) == list(times) == [i * 60000 for i in range(4, 9)]
+    assert list(snapshot.columns) == store.columns
+    assert (snapshot.values == values.T).all()
+    assert (store.toDataFrame().values == snapshot.values).all()
+
+    # The snapshot is a copy, unaffected by the following writes
+    store.append(9 * 60000, candleValues(9))
+    assert list(snapshot.index) == [i * 60000 for i in range(4, 9)]
+
+
+def test_shared_store_is_attached_by_its_descriptor():
+    store = CandleStore(capacity=5, shared=True)
+    try:
+        for i in range(7):
+            store.append(i * 60000, candleValues(i))
+
+        name, capacity = store.descriptor()
+        attached = CandleStore(capacity=capacity, name=name)
+        try:
+            # The attached store reads the window published by the owner, including the candles written after attaching
+            assert attached.snapshot().equals(store.snapshot())
+            store.append(7 * 60000, candleValues(7))
+            store.update(7 * 60000, candleValues(70))
+            assert attached.last() == store.last()
+            assert attached.read(lambda times, values: list(times)) == [i * 60000 for i in range(3, 8)]
+
+        finally:
+            attached.close()
+
+    finally:
+        store.close()
+
+    # A closed store keeps its content in private memory, and has no descriptor anymore
+    assert store.last()["close"] == 70.2
+    with pytest.raises(Exception):
+        store.descriptor()
+    with pytest.raises(Exception):
+        CandleStore(capacity=5).descriptor()
@@ -0,0 +1,101 @@
+import pytest
+import numpy as np
+import utils
+from cryptoBot import CryptoBot
+from strategies import Strategy
+from replayEngine import SimulatedClock
+from simulatedExchange import SimulatedExchange
+
+
+end_time = 1600000020000 + 400 * 60000
+
+
+# Strategy scoring all the symbols the same, so that a buying opportunity is always found
+class AlwaysBuyStrategy(Strategy):
+    def __init__(self):
+        super().__init__(name="ALWAYS_BUY", features=["close"])
+
+    def score(self, features):
+        return np.zeros(len(features))
+
+
+def makeKlines(candles):
+    first_time = end_time - candles * 60000
+    return [[first_time + i * 60000, "10.0", "10.0", "10.0", "10.0", "1.0", first_time + (i + 1) * 60000 - 1] for i in range(candles)]
+
+
+def test_pending_buy_order_is_not_counted_twice():
+    utils.notifier.webhook_url = None
+    clock = SimulatedClock(start=end_time / 1000)
+    exchange = SimulatedExchange(clock=clock, balances={"USDT": 1000.0}, history={"BTCUSDT": makeKlines(400), "ETHUSDT": makeKlines(400)})
+    bot = CryptoBot(api_key=None, api_secret=None, symbols=["BTCUSDT", "ETHUSDT"], minumum_profit=1.003, max_positions=2, client=exchange, offline=True, clock=clock, strategy=AlwaysBuyStrategy())
+    exchange.listener = bot.data_collector.feed
+    bot.symbols_info.refresh()
+    bot.data_collector.start()
+
+    # The first slot gets half of the capital and places its buying order, which stays pending
+    buy_opportunity, investment = bot._CryptoBot__openPosition(0)
+    assert investment == 500.0
+    buy_order_id = bot._CryptoBot__buyOrder(buy_opportunity["symbol"], buy_opportunity["price"], investment)
+    bot._CryptoBot__buyOrderCreated(0, buy_order_id)
+    assert bot.data_collector.getOrder(buy_order_id)["status"] == "NEW"
+    assert float(bot.data_collector.getAssetBalance("USDT")["locked"]) > 499
+
+    # The second slot gets the rest of the free balance, not what is left after subtracting the pending order again
+    buy_opportunity, investment = bot._CryptoBot__openPosition(1)
+    assert buy_opportunity["symbol"] != bot.positions[0]
+    assert investment > 499
+    bot.worker_pool.close()
+
+
+def test_reservation_is_kept_until_the_balance_reflects_the_buy_order():
+    utils.notifier.webhook_url = None
+    clock = SimulatedClock(start=end_time / 1000)
+    exchange = SimulatedExchange(clock=clock, balances={"USDT": 1000.0}, history={"BTCUSDT": makeKlines(400), "ETHUSDT": makeKlines(400)})
+    bot = CryptoBot(api_key=None, api_secret=None, symbols=["BTCUSDT", "ETHUSDT"], minumum_profit=1.003, max_positions=2, client=exchange, offline=True, clock=clock, strategy=AlwaysBuyStrategy())
+    bot.symbols_info.refresh()
+    bot.data_collector.start()
+
+    # The exchange reports the orders at once, but the balances' updates only later, as the websocket may do
+    delayed_events = []
+    exchange.listener = lambda event: delayed_events.append(event) if event["e"] == "outboundAccountPosition" else bot.data_collector.feed(event)
+
+    buy_opportunity, investment = bot._CryptoBot__openPosition(0)
+    buy_order_id = bot._CryptoBot__buyOrder(buy_opportunity["symbol"], buy_opportunity["price"], investment)
+    bot._CryptoBot__buyOrderCreated(0, buy_order_id)
+    assert bot.data_collector.getAssetBalance("USDT")["free"] == 1000.0
+
+    # While the free balance is stale, the second slot does not spend the capital of the first one again
+    _, investment = bot._CryptoBot__openPosition(1)
+    assert investment == 500.0
+    bot._CryptoBot__closePosition(1)
+
+    # Once the balance reflects the locked funds, the reservation is released and not subtracted twice
+    for event in delayed_events:
+        bot.data_collector.feed(event)
+    assert bot.data_collector.getAssetBalance("USDT")["free"] < 501
+    _, investment = bot._CryptoBot__openPosition(1)
+    assert investment > 499
+    assert 0 not in bot.reservations
+    bot.worker_pool.close()
+
+
+def test_orders_below_the_minimum_quantity_are_not_placed():
+    utils.notifier.webhook_url = None
+    clock = SimulatedClock(start=end_time / 1000)
+    filters = [{"filterType": "LOT_SIZE", "stepSize": "0.01000000", "minQty": "2.00000000"}, {"filterType": "PRICE_FILTER", "tickSize": "0.01000000"}, {"filterType": "MIN_NOTIONAL", "minNotional": "10.00000000"}]
+    exchange = SimulatedExchange(clock=clock, balances={"USDT": 1000.0, "BTC": 1.5}, history={"BTCUSDT": makeKlines(400)}, symbols_info={"BTCUSDT": {"symbol": "BTCUSDT", "status": "TRADING", "filters": filters}})
+    bot = CryptoBot(api_key=None, api_secret=None, symbols=["BTCUSDT"], minumum_profit=1.003, client=exchange, offline=True, clock=clock, strategy=AlwaysBuyStrategy())
+    exchange.listener = bot.data_collector.feed
+    bot.symbols_info.refresh()
+    bot.data_collector.start()
+
+    # 15 USDT buy 1.5 BTC at 10 USDT, above the minimum notional but below the minimum quantity
+    with pytest.raises(Exception, match="minimum quantity"):
+        bot._CryptoBot__buyOrderParams("BTCUSDT", 10.0, 15.0)
+    assert bot._CryptoBot__buyOrderParams("BTCUSDT", 10.0, 25.0)["quantity"] == 2.5
+
+    # Only 1.5 BTC are available to sell
+    with pytest.raises(Exception, match="minimum quantity"):
+        bot._CryptoBot__sellOrderParams("BTCUSDT", 10.0, 2.5)
+    bot.worker_pool.close()
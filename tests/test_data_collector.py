@@ -0,0 +1,280 @@
+import time
+import asyncio
+import threading
+import utils
+from functools import partial
+from dataCollector import DataCollector
+from simulatedExchange import SimulatedExchange
+from streamingIndicators import StreamingSMA
+
+
+end_time = 1600000020000 + 400 * 60000
+
+
+def makeKlines(candles, last_time=end_time, close=10.0):
+    first_time = last_time - candles * 60000
+    return [[first_time + i * 60000, "10.0", str(close), "10.0", str(close), "1.0", first_time + (i + 1) * 60000 - 1] for i in range(candles)]
+
+
+def klineMessage(symbol, open_time, close):
+    kline = {"t": open_time, "T": open_time + 59999, "s": symbol, "i": "1m", "o": "10.0", "h": str(close), "l": "10.0", "c": str(close), "v": "1.0", "x": False}
+    return {"e": "kline", "E": open_time + 1000, "s": symbol, "k": kline}
+
+
+def executionReport(order_id, status, symbol="BTCUSDT", filled_quantity=0.0):
+    return {"e": "executionReport", "E": end_time, "i": order_id, "s": symbol, "S": "BUY", "o": "LIMIT", "q": "1.0", "p": "10.0", "X": status, "T": end_time, "z": str(filled_quantity)}
+
+
+def test_reconnection_backfills_the_klines_missed_before_the_first_live_one():
+    utils.notifier.webhook_url = None
+    clock = lambda: end_time / 1000
+    exchange = SimulatedExchange(clock=clock, history={"BTCUSDT": makeKlines(400)})
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT"], client=exchange, offline=True, clock=clock)
+    data_collector.start()
+    store = data_collector.getSymbolStore("BTCUSDT")
+    assert store.lastTime() == end_time - 60000
+
+    # While disconnected, 5 candles are missed: the new stream delivers the latest one before the REST backfill has run
+    exchange.history["BTCUSDT"] = makeKlines(405, last_time=end_time + 4 * 60000, close=11.0)
+    data_collector._DataCollector__connect = lambda: data_collector.feed(klineMessage("BTCUSDT", end_time + 4 * 60000, 12.0))
+    data_collector._DataCollector__reconnect()
+
+    # All the missed candles are spliced, and the live kline is applied last
+    times, _ = store.view()
+    assert list(times[-6:]) == [end_time + i * 60000 for i in range(-1, 5)]
+    assert list(store.column("close")[-5:]) == [11.0, 11.0, 11.0, 11.0, 12.0]
+    assert data_collector.getSymbolSnapshot("BTCUSDT")["close"] == 12.0
+    assert data_collector.getStatus() == "CONNECTED"
+
+
+def test_listen_key_renewed_by_a_reconnection_is_kept_alive():
+    utils.notifier.webhook_url = None
+    keepalives = []
+    exchange = SimulatedExchange(clock=time.time)
+    exchange.stream_keepalive = lambda listenKey: keepalives.append(listenKey)
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT"], multiplex=True, client=exchange, offline=True)
+    data_collector.listen_key = "first"
+    data_collector.listen_key_keepalive = 0.01
+    threading.Thread(target=data_collector._DataCollector__keepAliveListenKey, args=[], daemon=True).start()
+
+    # The same keep-alive thread switches to the key obtained by the reconnection
+    data_collector.listen_key = "second"
+    deadline = time.monotonic() + 5
+    while "second" not in keepalives:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_warm_start_fetches_only_the_klines_since_the_checkpoint(tmp_path):
+    utils.notifier.webhook_url = None
+    now = {"time": end_time / 1000}
+    history = makeKlines(520, last_time=end_time + 120 * 60000)
+    exchange = SimulatedExchange(clock=lambda: now["time"], history={"BTCUSDT": history[:400]})
+    indicators = {"SMA_200": partial(StreamingSMA, window=200)}
+    makeCollector = lambda checkpoint_path: DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT"], indicators=indicators, client=exchange, offline=True, clock=lambda: now["time"], checkpoint_path=checkpoint_path)
+
+    data_collector = makeCollector(str(tmp_path / "checkpoint.bin"))
+    data_collector.start()
+    data_collector.saveCheckpoint()
+
+    # Two hours later, the restarted collector fetches only the candles since the latest one of the checkpoint
+    now["time"] += 120 * 60
+    exchange.history["BTCUSDT"] = history
+    fetches = []
+    get_historical_klines = exchange.get_historical_klines
+    exchange.get_historical_klines = lambda symbol, interval, start_str, **kwargs: fetches.append(start_str) or get_historical_klines(symbol, interval, start_str, **kwargs)
+    warm_collector = makeCollector(str(tmp_path / "checkpoint.bin"))
+    warm_collector.start()
+    assert fetches == [end_time - 60000]
+
+    # The restored data are the same as the ones of a cold start
+    cold_collector = makeCollector(None)
+    cold_collector.start()
+    warm_times, warm_values = warm_collector.getSymbolStore("BTCUSDT").view()
+    cold_times, cold_values = cold_collector.getSymbolStore("BTCUSDT").view()
+    assert list(warm_times) == list(cold_times)
+    assert (warm_values == cold_values).all()
+    assert dict(warm_collector.getSymbolSnapshot("BTCUSDT")) == dict(cold_collector.getSymbolSnapshot("BTCUSDT"))
+
+
+def test_backfill_without_symbols_does_nothing():
+    utils.notifier.webhook_url = None
+    exchange = SimulatedExchange(clock=time.time)
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=[], client=exchange, offline=True)
+    data_collector.start()
+
+    # A reconnection of a collector without symbols backfills an empty list of symbols
+    data_collector._DataCollector__backfillSymbolsData()
+    data_collector._DataCollector__backfillSymbolsData([])
+    assert data_collector.getStatus() == "CONNECTED"
+
+
+def test_concurrent_reads_of_the_symbol_data_are_never_torn():
+    utils.notifier.webhook_url = None
+    exchange = SimulatedExchange(clock=lambda: end_time / 1000, history={"BTCUSDT": makeKlines(400)})
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT"], client=exchange, offline=True, clock=lambda: end_time / 1000)
+    data_collector.start()
+    store = data_collector.getSymbolStore("BTCUSDT")
+
+    # The writer appends candles whose values all equal their index, then revises them, while the window wraps around
+    stop = threading.Event()
+    def write():
+        i = 0
+        while not stop.is_set():
+            open_time = end_time + i * 60000
+            store.append(open_time, [float(i)] * 5)
+            store.update(open_time, [i + 0.5] * 5)
+            i += 1
+
+    # A consistent window holds consecutive candles, every candle having the same values in all the columns, matching its open time
+    def consistent(times, values):
+        indexes = (times - end_time) // 60000
+        return bool((times[1:] - times[:-1] == 60000).all() and (values == values[0]).all() and (values[0][indexes >= 0] // 1 == indexes[indexes >= 0]).all())
+
+    writer = threading.Thread(target=write, args=[], daemon=True)
+    writer.start()
+    try:
+        deadline = time.monotonic() + 1
+        reads = 0
+        while time.monotonic() < deadline:
+            assert data_collector.readSymbolData("BTCUSDT", consistent)
+            reads += 1
+    finally:
+        stop.set()
+        writer.join()
+
+    assert reads > 0 and store.lastTime() > end_time
+
+
+def test_orders_are_indexed_by_symbol_and_status():
+    utils.notifier.webhook_url = None
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT", "ETHUSDT"], client=SimulatedExchange(clock=time.time), offline=True)
+    data_collector.feed(executionReport(1, "NEW"))
+    data_collector.feed(executionReport(2, "NEW"))
+    data_collector.feed(executionReport(3, "NEW", symbol="ETHUSDT"))
+
+    # An update moves the order to the index entry of its new status
+    data_collector.feed(executionReport(1, "PARTIALLY_FILLED", filled_quantity=0.5))
+    assert [order["id"] for order in data_collector.getOrders("BTCUSDT", "NEW")] == [2]
+    assert data_collector.getOrders("BTCUSDT", "PARTIALLY_FILLED") == [data_collector.getOrder(1)]
+    assert data_collector.getOrder(1)["filled_quantity"] == 0.5
+    assert [order["id"] for order in data_collector.getOrders("ETHUSDT", "NEW")] == [3]
+
+    # The deleted orders leave the index, whose empty entries are removed
+    data_collector.deleteOrder(1)
+    assert data_collector.getOrder(1) is None
+    assert data_collector.getOrders("BTCUSDT", "PARTIALLY_FILLED") == []
+    assert ("BTCUSDT", "PARTIALLY_FILLED") not in data_collector.orders_index
+
+    data_collector.cleanOrders()
+    assert data_collector.getOrders("BTCUSDT", "NEW") == [] and data_collector.orders_index == {}
+
+
+def test_oldest_terminal_orders_are_evicted_beyond_the_retention_limit():
+    utils.notifier.webhook_url = None
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT"], max_terminal_orders=3, client=SimulatedExchange(clock=time.time), offline=True)
+
+    # An open order is never evicted, and an order reaching a terminal status twice is counted once
+    data_collector.feed(executionReport(0, "NEW"))
+    for order_id in range(1, 4):
+        data_collector.feed(executionReport(order_id, "NEW"))
+        data_collector.feed(executionReport(order_id, "FILLED", filled_quantity=1.0))
+    data_collector.feed(executionReport(3, "FILLED", filled_quantity=1.0))
+    assert all(data_collector.getOrder(order_id) is not None for order_id in range(0, 4))
+
+    data_collector.feed(executionReport(4, "CANCELED"))
+    data_collector.feed(executionReport(5, "EXPIRED"))
+    assert [order_id for order_id in range(0, 6) if data_collector.getOrder(order_id) is not None] == [0, 3, 4, 5]
+    assert list(data_collector.terminal_orders) == [3, 4, 5]
+    assert sorted(order["id"] for order in data_collector.getOrders("BTCUSDT", "FILLED")) == [3]
+    assert data_collector.getOrder(0)["status"] == "NEW"
+
+
+def test_waits_are_woken_up_by_the_updates_or_time_out():
+    utils.notifier.webhook_url = None
+    exchange = SimulatedExchange(clock=lambda: end_time / 1000, history={"BTCUSDT": makeKlines(400)})
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT"], client=exchange, offline=True)
+    data_collector.start()
+    data_collector.feed(executionReport(1, "NEW"))
+
+    # A waiting thread is woken up as soon as the order reaches a final status, and another one by the next kline
+    results = {}
+    version = data_collector.getVersion()
+    waiters = [
+        threading.Thread(target=lambda: results.update(order=data_collector.waitForOrder(1, statuses=("FILLED", "CANCELED"), timeout=10)), args=[]),
+        threading.Thread(target=lambda: results.update(version=data_collector.waitForUpdate(version, timeout=10)), args=[])
+    ]
+    start = time.monotonic()
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.05)
+    data_collector.feed(executionReport(1, "PARTIALLY_FILLED", filled_quantity=0.5))
+    data_collector.feed(executionReport(1, "FILLED", filled_quantity=1.0))
+    data_collector.feed(klineMessage("BTCUSDT", end_time, 12.0))
+    for waiter in waiters:
+        waiter.join(timeout=10)
+    assert time.monotonic() - start < 5
+    assert results["order"]["status"] == "FILLED"
+    assert results["version"] == data_collector.getVersion() != version
+
+    # On timeout, the latest known order (or None if unknown) and the current version are returned
+    data_collector.feed(executionReport(2, "NEW"))
+    start = time.monotonic()
+    assert data_collector.waitForOrder(2, statuses=("FILLED",), timeout=0.1)["status"] == "NEW"
+    assert data_collector.waitForOrder(3, statuses=("FILLED",), timeout=0.1) is None
+    assert data_collector.waitForUpdate(data_collector.getVersion(), timeout=0.1) == data_collector.getVersion()
+    assert 0.3 <= time.monotonic() - start < 5
+
+
+def test_timed_waits_expire_with_the_simulated_clock():
+    utils.notifier.webhook_url = None
+    now = {"time": end_time / 1000}
+    exchange = SimulatedExchange(clock=lambda: now["time"], history={"BTCUSDT": makeKlines(400)})
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT"], client=exchange, offline=True, clock=lambda: now["time"])
+    data_collector.start()
+    data_collector.feed(executionReport(1, "NEW"))
+
+    results = {}
+    waiter = threading.Thread(target=lambda: results.update(order=data_collector.waitForOrder(1, statuses=("FILLED",), timeout=60)), args=[])
+    waiter.start()
+
+    # The wait does not expire with the wall clock, but as soon as the simulated clock is advanced past its deadline
+    waiter.join(timeout=0.2)
+    assert waiter.is_alive()
+    now["time"] += 61
+    data_collector.feed(executionReport(2, "NEW"))
+    waiter.join(timeout=5)
+    assert results["order"]["status"] == "NEW"
+
+
+def test_async_waits_are_woken_up_by_the_updates_or_time_out():
+    utils.notifier.webhook_url = None
+    exchange = SimulatedExchange(clock=lambda: end_time / 1000, history={"BTCUSDT": makeKlines(400)})
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT"], client=exchange, offline=True)
+    data_collector.start()
+    data_collector.feed(executionReport(1, "NEW"))
+
+    async def main():
+        # The messages are handled by the event loop, as done by the asyncio runtime
+        loop = asyncio.get_running_loop()
+        data_collector.loop = loop
+        version = data_collector.getVersion()
+        loop.call_later(0.05, data_collector.feed, executionReport(1, "FILLED", filled_quantity=1.0))
+        loop.call_later(0.1, data_collector.feed, klineMessage("BTCUSDT", end_time, 12.0))
+
+        start = loop.time()
+        order, new_version = await asyncio.gather(data_collector.waitForOrderAsync(1, statuses=("FILLED",), timeout=10), data_collector.waitForUpdateAsync(version, timeout=10))
+        assert loop.time() - start < 5
+        assert order["status"] == "FILLED"
+        assert new_version == data_collector.getVersion() != version
+
+        # On timeout, the latest known order (or None if unknown) and the current version are returned
+        data_collector.feed(executionReport(2, "NEW"))
+        start = loop.time()
+        assert (await data_collector.waitForOrderAsync(2, statuses=("FILLED",), timeout=0.1))["status"] == "NEW"
+        assert await data_collector.waitForOrderAsync(3, statuses=("FILLED",), timeout=0.1) is None
+        assert await data_collector.waitForUpdateAsync(data_collector.getVersion(), timeout=0.1) == data_collector.getVersion()
+        assert 0.3 <= loop.time() - start < 5
+        assert len(data_collector.async_waiters) == 0
+
+    asyncio.run(main())
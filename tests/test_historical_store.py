@@ -0,0 +1,89 @@
+import os
+import numpy as np
+from historicalStore import HistoricalStore, convertCSVFiles
+
+
+interval_ms = 60000
+first_time = 1600000020000
+
+
+# Function to build the klines of the exchange in the REST API format, the close price of each one being its index plus a given offset
+def makeKlines(indexes, offset=0.0):
+    return [[first_time + i * interval_ms, "1.0", "2.0", "0.5", str(i + offset), "10.0"] for i in indexes]
+
+
+def test_append_and_load_a_time_range(tmp_path):
+    store = HistoricalStore(root=str(tmp_path))
+    assert not store.exists("BTCUSDT", "1m")
+    assert store.rows("BTCUSDT", "1m") == 0
+    assert store.lastTime("BTCUSDT", "1m") is None
+    assert len(store.load("BTCUSDT", "1m")["time"]) == 0
+
+    store.append("BTCUSDT", "1m", makeKlines(range(0, 10)))
+    store.append("BTCUSDT", "1m", makeKlines(range(10, 25)))
+    assert store.rows("BTCUSDT", "1m") == 25
+    assert store.lastTime("BTCUSDT", "1m") == first_time + 24 * interval_ms
+
+    # The range [start, end) is located by binary search, including the bounds falling between two candles
+    columns = store.load("BTCUSDT", "1m", start=first_time + 5 * interval_ms, end=first_time + 12 * interval_ms)
+    assert list(columns["close"]) == [float(i) for i in range(5, 12)]
+    columns = store.load("BTCUSDT", "1m", start=first_time + 5 * interval_ms + 1, end=first_time + 12 * interval_ms + 1)
+    assert list(columns["close"]) == [float(i) for i in range(6, 13)]
+    assert len(store.load("BTCUSDT", "1m", start=first_time + 30 * interval_ms)["time"]) == 0
+
+    df = store.loadDataFrame("BTCUSDT", "1m", end=first_time + 3 * interval_ms)
+    assert list(df.columns) == ["time", "open", "high", "low", "close", "volume"]
+    assert list(df["time"]) == [first_time + i * interval_ms for i in range(3)]
+
+
+def test_append_drops_the_partial_rows_of_an_interrupted_append(tmp_path):
+    store = HistoricalStore(root=str(tmp_path))
+    store.append("BTCUSDT", "1m", makeKlines(range(0, 10)))
+
+    # An interrupted append wrote only the time column of the next candle
+    with open(os.path.join(str(tmp_path), "BTCUSDT_1m", "time.bin"), 'ab') as f:
+        np.array([first_time + 10 * interval_ms], dtype='int64').tofile(f)
+    assert store.rows("BTCUSDT", "1m") == 10
+
+    store.append("BTCUSDT", "1m", makeKlines(range(10, 12)))
+    columns = store.load("BTCUSDT", "1m")
+    assert list(columns["time"]) == [first_time + i * interval_ms for i in range(12)]
+    assert list(columns["close"]) == [float(i) for i in range(12)]
+
+
+def test_merge_sorts_and_deduplicates_the_candles(tmp_path):
+    store = HistoricalStore(root=str(tmp_path))
+    store.write("BTCUSDT", "1m", makeKlines([0, 1, 2, 5, 6, 9]))
+
+    # The fetched candles, in any order, fill the gaps and replace the stored copy of the duplicated ones
+    store.merge("BTCUSDT", "1m", makeKlines([8, 3, 7, 4, 5, 5], offset=0.5))
+    store.merge("BTCUSDT", "1m", [])
+
+    columns = store.load("BTCUSDT", "1m")
+    assert list(columns["time"]) == [first_time + i * interval_ms for i in range(10)]
+    assert list(columns["close"]) == [0.0, 1.0, 2.0, 3.5, 4.5, 5.5, 6.0, 7.5, 8.5, 9.0]
+
+
+def test_known_gaps_are_recorded_once(tmp_path):
+    store = HistoricalStore(root=str(tmp_path))
+    assert store.knownGaps("BTCUSDT", "1m") == []
+
+    store.addKnownGaps("BTCUSDT", "1m", [(3, 4), (1, 2)])
+    store.addKnownGaps("BTCUSDT", "1m", [[1, 2], (5, 6)])
+    assert store.knownGaps("BTCUSDT", "1m") == [(1, 2), (3, 4), (5, 6)]
+
+
+def test_csv_files_are_converted(tmp_path):
+    # CSV files written by the previous versions of the backtester, unsorted and with duplicated candles
+    rows = {"BTCUSDT": [2, 0, 1, 1], "ETHUSDT": [0, 1]}
+    for symbol, indexes in rows.items():
+        with open(os.path.join(str(tmp_path), f'{symbol}.csv'), 'w') as f:
+            for i in indexes:
+                f.write(f'{first_time + i * interval_ms};1.0;2.0;0.5;{i}.0;10.0\n')
+
+    convertCSVFiles(directory=str(tmp_path), interval="1m")
+
+    store = HistoricalStore(root=str(tmp_path))
+    assert list(store.load("BTCUSDT", "1m")["time"]) == [first_time + i * interval_ms for i in range(3)]
+    assert list(store.load("BTCUSDT", "1m")["close"]) == [0.0, 1.0, 2.0]
+    assert store.rows("ETHUSDT", "1m") == 2
@@ -0,0 +1,131 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from binance.exceptions import BinanceAPIException
+from historicalStore import HistoricalStore
+from klinesDownloader import KlinesDownloader
+from metrics import Metrics
+from restScheduler import RestScheduler, ScheduledClient
+
+
+interval_ms = 60000
+first_time = 1600000020000
+
+
+# Function to build the klines of the exchange in the REST API format, skipping the given open times
+def makeKlines(count, missing=()):
+    return [[first_time + i * interval_ms, "1.0", "2.0", "0.5", str(1.0 + i), "10.0", first_time + (i + 1) * interval_ms - 1] for i in range(count) if first_time + i * interval_ms not in missing]
+
+
+# Stub of the Binance API Client serving the klines' pages and recording the requests
+class StubClient:
+    def __init__(self, klines, failures=0):
+        self.klines = klines
+        self.failures = failures
+        self.requests = []
+
+    def get_klines(self, symbol, interval, startTime, endTime, limit):
+        self.requests.append((startTime, endTime))
+        if self.failures > 0:
+            self.failures -= 1
+            raise BinanceAPIException(StubResponse(), 429, '{"code": -1003, "msg": "Too many requests"}')
+
+        return [kline for kline in self.klines if startTime <= kline[0] <= endTime][:limit]
+
+
+class StubResponse:
+    headers = {"Retry-After": "0"}
+
+
+def end(count):
+    return first_time + count * interval_ms
+
+
+def test_download_resumes_from_last_stored_candle(tmp_path):
+    store = HistoricalStore(root=str(tmp_path))
+    client = StubClient(makeKlines(30))
+    downloader = KlinesDownloader(client=client, store=store, interval="1m", page_limit=10)
+
+    assert downloader.downloadSymbol("BTCUSDT", first_time, end(20)) == 20
+    assert store.rows("BTCUSDT", "1m") == 20
+
+    # Only the tail after the stored candles is requested again
+    client.requests.clear()
+    assert downloader.downloadSymbol("BTCUSDT", first_time, end(30)) == 10
+    assert client.requests[0][0] == end(20)
+    assert list(store.load("BTCUSDT", "1m")["time"]) == [kline[0] for kline in makeKlines(30)]
+
+
+def test_download_fills_gaps_and_records_exchange_gaps(tmp_path):
+    store = HistoricalStore(root=str(tmp_path))
+    missing = {first_time + 5 * interval_ms, first_time + 6 * interval_ms}
+
+    # The stored data misses two candles, of which one is missing on the exchange too
+    store.write("BTCUSDT", "1m", makeKlines(20, missing=missing))
+    client = StubClient(makeKlines(20, missing={first_time + 6 * interval_ms}))
+    downloader = KlinesDownloader(client=client, store=store, interval="1m")
+
+    assert downloader.downloadSymbol("BTCUSDT", first_time, end(20)) == 1
+    assert any(request[0] == first_time + 5 * interval_ms for request in client.requests)
+    assert store.knownGaps("BTCUSDT", "1m") == [(first_time + 6 * interval_ms, first_time + 7 * interval_ms)]
+
+    # The gap of the exchange is not requested again
+    client.requests.clear()
+    assert downloader.downloadSymbol("BTCUSDT", first_time, end(20)) == 0
+    assert all(request[0] != first_time + 6 * interval_ms for request in client.requests)
+
+
+def test_download_retries_when_rate_limited(tmp_path):
+    store = HistoricalStore(root=str(tmp_path))
+    client = StubClient(makeKlines(5), failures=2)
+    downloader = KlinesDownloader(client=client, store=store, interval="1m")
+
+    assert downloader.downloadSymbol("BTCUSDT", first_time, end(5)) == 5
+    assert len(client.requests) == 3
+
+
+def test_download_is_paced_by_the_scheduler_at_data_priority(tmp_path):
+    klines = makeKlines(30)
+    requests = []
+
+    # Stub of the exchange's REST API serving the klines' pages, throttling the first request
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: int(values[0]) for key, values in parse_qs(url.query).items() if key in ("startTime", "endTime", "limit")}
+            throttled = url.path.endswith("klines") and len(requests) == 0
+            if url.path.endswith("klines"):
+                requests.append(time.monotonic())
+
+            body = [] if not url.path.endswith("klines") else [kline for kline in klines if query["startTime"] <= kline[0] <= query["endTime"]][:query["limit"]]
+            body = json.dumps({"code": -1003, "msg": "Too many requests"} if throttled else body).encode()
+            self.send_response(429 if throttled else 200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if throttled:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, args=[], daemon=True).start()
+    try:
+        metrics = Metrics()
+        scheduler = RestScheduler(metrics=metrics)
+        client = ScheduledClient(scheduler=scheduler, base_url=f'http://127.0.0.1:{server.server_address[1]}')
+        downloader = KlinesDownloader(client=client, store=HistoricalStore(root=str(tmp_path)), interval="1m", page_limit=10)
+
+        assert downloader.downloadSymbol("BTCUSDT", first_time, end(30)) == 30
+
+    finally:
+        server.shutdown()
+
+    # Every page was requested through the scheduler at the "data" priority, which held back the retry as long as requested by the exchange
+    assert metrics.snapshot()["counters"]['cryptobot_rest_requests_total{priority="data"}'] == len(requests) + 1
+    assert requests[1] - requests[0] >= 0.9
+    assert scheduler.getStatus()["in_flight"] == 0
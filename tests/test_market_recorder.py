@@ -0,0 +1,93 @@
+import gzip
+import time
+import threading
+import utils
+from metrics import Metrics
+from marketRecorder import MarketRecorder, listSegments, readMessages
+
+
+def test_failed_write_closes_the_segment_and_counts_the_lost_messages(tmp_path):
+    utils.notifier.webhook_url = None
+    metrics = Metrics()
+    recorder = MarketRecorder(root=str(tmp_path), metrics=metrics)
+
+    # A message that cannot be serialized makes the writer give up the segment, losing it and the messages after it in the batch
+    recorder.record("btcusdt@kline_1m", {"e": "kline", "E": 1})
+    recorder.queue.join()
+    recorder.record("btcusdt@kline_1m", {"e": "kline", "E": object()})
+    recorder.record("btcusdt@kline_1m", {"e": "kline", "E": 2})
+    recorder.queue.join()
+    assert recorder.segment is None
+    assert recorder.lost in (1, 2)
+    assert metrics.snapshot()["counters"]['cryptobot_errors_total{source="recorder"}'] == 1
+
+    # The abandoned segment is a complete gzip file, and the writer carries on with a new one
+    with gzip.open(listSegments(str(tmp_path))[0], 'rt') as f:
+        f.read()
+
+    recorder.record("btcusdt@kline_1m", {"e": "kline", "E": 3})
+    recorder.close()
+    assert len(listSegments(str(tmp_path))) == 2
+    assert [message["data"]["E"] for message in readMessages(str(tmp_path))] == [1] + [2] * (2 - recorder.lost) + [3]
+
+
+# Segment of a full disk: the messages are accepted by the compressor, but can be neither flushed nor closed once the disk is full
+class FullDiskSegment:
+    def __init__(self, segment, full, gate):
+        self.segment = segment
+        self.full = full
+        self.gate = gate
+
+    def write(self, line):
+        # Holding the writer on the message of the gate, so that the following ones are written as a single batch
+        if '"E":2' in line:
+            self.gate.wait(timeout=10)
+        self.segment.write(line)
+
+    def flush(self):
+        if self.full.is_set():
+            raise OSError(28, "No space left on device")
+        self.segment.flush()
+
+    def close(self):
+        if self.full.is_set():
+            raise OSError(28, "No space left on device")
+        self.segment.close()
+
+
+def test_failed_flush_counts_all_the_messages_not_flushed(tmp_path):
+    utils.notifier.webhook_url = None
+    metrics = Metrics()
+    recorder = MarketRecorder(root=str(tmp_path), metrics=metrics)
+    full = threading.Event()
+    gate = threading.Event()
+
+    open_segment = recorder._MarketRecorder__openSegment
+    def openFullDiskSegment():
+        open_segment()
+        recorder.segment = FullDiskSegment(recorder.segment, full, gate)
+    recorder._MarketRecorder__openSegment = openFullDiskSegment
+
+    recorder.record("btcusdt@kline_1m", {"e": "kline", "E": 1})
+    recorder.queue.join()
+
+    # The disk fills up while a message is written, and the three following ones are written to a new segment as a batch
+    recorder.record("btcusdt@kline_1m", {"e": "kline", "E": 2})
+    while not recorder.queue.empty():
+        time.sleep(0.01)
+    for event_time in (3, 4, 5):
+        recorder.record("btcusdt@kline_1m", {"e": "kline", "E": event_time})
+    full.set()
+    gate.set()
+    recorder.queue.join()
+
+    # None of the messages written since the last flush reached a segment
+    assert recorder.lost == 4
+    assert recorder.segment is None
+    assert metrics.snapshot()["counters"]['cryptobot_errors_total{source="recorder"}'] == 2
+
+    # Once the disk is freed, the writer carries on with a new segment
+    full.clear()
+    recorder.record("btcusdt@kline_1m", {"e": "kline", "E": 6})
+    recorder.close()
+    assert [message["data"]["E"] for message in readMessages(listSegments(str(tmp_path))[-1])] == [6]
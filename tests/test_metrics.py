@@ -0,0 +1,117 @@
+import json
+import time
+import asyncio
+import urllib.request
+import pytest
+from metrics import Histogram, Metrics
+
+
+def test_histogram_counts_the_observations_by_bucket():
+    histogram = Histogram(buckets=(1.0, 0.1, 10.0))
+    assert histogram.buckets == (0.1, 1.0, 10.0)
+    assert histogram.quantile(0.5) is None
+
+    # The bounds are inclusive, and the values above the last one fall in the +Inf bucket
+    for value in (0.05, 0.1, 0.5, 1.0, 2.0, 20.0):
+        histogram.observe(value)
+
+    cumulative, count, total, maximum = histogram.state()
+    assert cumulative == [2, 4, 5, 6]
+    assert count == 6
+    assert total == pytest.approx(23.65)
+    assert maximum == 20.0
+
+    # The quantiles are the upper bounds of their buckets, or the maximum beyond the last one
+    assert histogram.quantile(0.3) == 0.1
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.8) == 10.0
+    assert histogram.quantile(0.99) == 20.0
+
+
+def test_metrics_are_exposed_as_prometheus_text():
+    metrics = Metrics()
+    metrics.inc("errors_total", labels={"source": "recorder"})
+    metrics.inc("errors_total", 2, labels={"source": "reconnection"})
+    metrics.inc("reconnections_total")
+    metrics.histogram("rest_wait_seconds", labels={"priority": "order"}, buckets=(0.1, 1.0)).observe(0.5)
+
+    lines = metrics.prometheus().splitlines()
+    assert lines == [
+        '# TYPE cryptobot_errors_total counter',
+        'cryptobot_errors_total{source="reconnection"} 2',
+        'cryptobot_errors_total{source="recorder"} 1',
+        '# TYPE cryptobot_reconnections_total counter',
+        'cryptobot_reconnections_total 1',
+        '# TYPE cryptobot_rest_wait_seconds histogram',
+        'cryptobot_rest_wait_seconds_bucket{priority="order",le="0.1"} 0',
+        'cryptobot_rest_wait_seconds_bucket{priority="order",le="1.0"} 1',
+        'cryptobot_rest_wait_seconds_bucket{priority="order",le="+Inf"} 1',
+        'cryptobot_rest_wait_seconds_sum{priority="order"} 0.5',
+        'cryptobot_rest_wait_seconds_count{priority="order"} 1'
+    ]
+
+
+def test_metrics_snapshot_is_json_serializable():
+    metrics = Metrics()
+    metrics.inc("messages_total", 3)
+    for value in (0.002, 0.004, 0.2):
+        metrics.observe("processing_seconds", value)
+    metrics.histogram("empty_seconds")
+
+    snapshot = json.loads(json.dumps(metrics.snapshot()))
+    assert snapshot["counters"] == {"cryptobot_messages_total": 3}
+    assert snapshot["histograms"]["cryptobot_processing_seconds"] == {"count": 3, "sum": pytest.approx(0.206), "mean": pytest.approx(0.206 / 3), "max": 0.2, "p50": 0.005, "p90": 0.5, "p99": 0.5}
+    assert snapshot["histograms"]["cryptobot_empty_seconds"]["mean"] is None
+    assert snapshot["uptime"] >= 0
+
+
+def test_timed_functions_and_coroutines_are_observed():
+    metrics = Metrics()
+    function = metrics.timed("call_seconds", lambda value: value * 2, labels={"kind": "sync"})
+
+    async def sleep(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    coroutine = metrics.timedAsync("call_seconds", sleep, labels={"kind": "async"})
+    assert function(2) == 4
+    assert asyncio.run(coroutine(3)) == 3
+
+    # The failed calls are observed too
+    failing = metrics.timed("call_seconds", lambda: 1 / 0, labels={"kind": "sync"})
+    with pytest.raises(ZeroDivisionError):
+        failing()
+
+    histograms = metrics.snapshot()["histograms"]
+    assert histograms['cryptobot_call_seconds{kind="sync"}']["count"] == 2
+    assert histograms['cryptobot_call_seconds{kind="async"}']["max"] >= 0.01
+
+
+def test_metrics_are_served_over_http():
+    metrics = Metrics()
+    metrics.inc("orders_total", labels={"side": "BUY"})
+    server = metrics.serve(port=0)
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with urllib.request.urlopen(url + "/metrics") as response:
+            assert 'cryptobot_orders_total{side="BUY"} 1' in response.read().decode()
+        with urllib.request.urlopen(url + "/metrics.json") as response:
+            assert json.loads(response.read())["counters"] == {'cryptobot_orders_total{side="BUY"}': 1}
+
+    finally:
+        metrics.stop()
+
+
+def test_snapshots_are_written_periodically(tmp_path):
+    metrics = Metrics()
+    metrics.inc("messages_total")
+    path = str(tmp_path / "metrics.json")
+    metrics.writeSnapshots(path=path, period=0.05)
+
+    deadline = time.monotonic() + 5
+    while not (tmp_path / "metrics.json").exists():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    with open(path, 'r') as f:
+        assert json.load(f)["counters"] == {"cryptobot_messages_total": 1}
@@ -0,0 +1,92 @@
+import time
+import threading
+from utils import Notifier
+
+
+# Stub of the HTTP session whose posts block until they are released, as a stalled webhook does
+class StalledSession:
+    def __init__(self):
+        self.released = threading.Event()
+        self.posts = 0
+
+    def post(self, url, json, timeout):
+        self.posts += 1
+        self.released.wait()
+        return StubResponse()
+
+
+class StubResponse:
+    status_code = 204
+
+
+def makeNotifier(tmp_path, max_queue_size=10000):
+    notifier = Notifier(webhook_url="http://127.0.0.1/webhook", log_file=str(tmp_path / "logs.log"), max_queue_size=max_queue_size)
+    notifier.session = StalledSession()
+    return notifier
+
+
+def test_logs_are_written_while_the_webhook_is_stalled(tmp_path):
+    notifier = makeNotifier(tmp_path)
+    notifier.notify({"title": "stalled"})
+    for i in range(100):
+        notifier.log(f'line {i}')
+
+    # The log lines are written even though the notification is still pending
+    assert notifier.flush(timeout=1) is False
+    with open(tmp_path / "logs.log") as f:
+        assert len(f.readlines()) == 100
+
+    notifier.session.released.set()
+    assert notifier.flush(timeout=1) is True
+
+
+def test_full_queues_drop_items_without_blocking(tmp_path):
+    notifier = makeNotifier(tmp_path, max_queue_size=2)
+
+    # The first notification is taken by the stalled worker, then the queue holds 2 and the others are dropped
+    start = time.monotonic()
+    for i in range(10):
+        notifier.notify({"title": str(i)})
+        if i == 0:
+            while notifier.session.posts == 0:
+                time.sleep(0.001)
+    assert time.monotonic() - start < 1
+    assert notifier.dropped_notifications == 7
+
+    # The drops are reported in the logs file
+    notifier.log("after the drops")
+    assert notifier.flush(timeout=0.5) is False
+    with open(tmp_path / "logs.log") as f:
+        assert "0 log lines and 7 notifications dropped" in f.read()
+
+    notifier.session.released.set()
+    assert notifier.flush(timeout=1) is True
+
+
+def test_flush_is_bounded(tmp_path):
+    notifier = makeNotifier(tmp_path)
+    notifier.notify({"title": "stalled"})
+
+    start = time.monotonic()
+    assert notifier.flush(timeout=0.2) is False
+    assert time.monotonic() - start < 0.5
+    notifier.session.released.set()
+
+
+def test_drops_are_counted_from_concurrent_threads(tmp_path):
+    notifier = makeNotifier(tmp_path, max_queue_size=1)
+    notifier.notify({"title": "stalled"})
+    while notifier.session.posts == 0:
+        time.sleep(0.001)
+    notifier.notify({"title": "queued"})
+
+    # Every notification beyond the full queue is counted exactly once
+    threads = [threading.Thread(target=lambda: [notifier.notify({"title": "dropped"}) for _ in range(1000)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert notifier.dropped_notifications == 8000
+
+    notifier.session.released.set()
+    assert notifier.flush(timeout=1) is True
@@ -0,0 +1,103 @@
+import time
+import asyncio
+import inspect
+import threading
+import pytest
+import utils
+from dataCollector import DataCollector
+from replayServer import ReplayServer
+from simulatedExchange import SimulatedExchange
+
+
+end_time = 1600000020000 + 400 * 60000
+
+# The streams of python-binance and the server of websockets still pass their loop to asyncio, which Python 3.10 no longer accepts
+requires_loop_argument = pytest.mark.skipif("loop" not in inspect.signature(asyncio.Queue).parameters, reason="the websockets' libraries do not support this version of Python")
+
+# Messages recorded on a combined stream: the klines of two symbols and the user's data, recorded with another listen key
+messages = [
+    {"stream": "btcusdt@kline_1m", "data": {"e": "kline", "E": end_time + 1000, "s": "BTCUSDT", "k": {"t": end_time, "T": end_time + 59999, "s": "BTCUSDT", "i": "1m", "o": "10.0", "h": "11.0", "l": "10.0", "c": "11.0", "v": "1.0", "x": False}}},
+    {"stream": "ethusdt@kline_1m", "data": {"e": "kline", "E": end_time + 1000, "s": "ETHUSDT", "k": {"t": end_time, "T": end_time + 59999, "s": "ETHUSDT", "i": "1m", "o": "10.0", "h": "12.0", "l": "10.0", "c": "12.0", "v": "1.0", "x": False}}},
+    {"stream": "recordedlistenkey", "data": {"e": "outboundAccountPosition", "E": end_time + 2000, "B": [{"a": "USDT", "f": "900.0", "l": "100.0"}]}},
+    {"stream": "recordedlistenkey", "data": {"e": "executionReport", "E": end_time + 2000, "i": 7, "s": "BTCUSDT", "S": "BUY", "o": "LIMIT", "q": "10.0", "p": "10.0", "X": "NEW", "T": end_time + 2000, "z": "0.0"}}
+]
+
+
+# Simulated exchange also serving the listen key of the user's data stream
+class ListenKeyExchange(SimulatedExchange):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.keepalives = []
+
+    def stream_get_listen_key(self):
+        return "listenkey"
+
+    def stream_keepalive(self, listenKey):
+        self.keepalives.append(listenKey)
+
+
+def makeKlines(candles):
+    first_time = end_time - candles * 60000
+    return [[first_time + i * 60000, "10.0", "10.0", "10.0", "10.0", "1.0", first_time + (i + 1) * 60000 - 1] for i in range(candles)]
+
+
+# Function to wait until a predicate holds, failing after a timeout
+def waitUntil(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+# Function to check that the klines and the user's data of the messages have reached the collector
+def assertDelivered(data_collector):
+    assert data_collector.getSymbolStore("BTCUSDT").lastTime() == end_time
+    assert data_collector.getSymbolSnapshot("BTCUSDT")["close"] == 11.0
+    assert data_collector.getSymbolSnapshot("ETHUSDT")["close"] == 12.0
+    assert data_collector.getAssetBalance("USDT")["free"] == 900.0
+    assert data_collector.getOrder(7)["status"] == "NEW"
+
+
+def test_combined_stream_messages_are_dispatched_by_stream_name():
+    utils.notifier.webhook_url = None
+    exchange = ListenKeyExchange(clock=lambda: end_time / 1000, history={"BTCUSDT": makeKlines(400), "ETHUSDT": makeKlines(400)})
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT", "ETHUSDT"], multiplex=True, client=exchange, offline=True, clock=lambda: end_time / 1000)
+    data_collector.start()
+    data_collector.listen_key = "listenkey"
+
+    # The replay server serves the recorded user's data on the listen key of the subscription
+    server = ReplayServer(messages)
+    selected, combined = server._ReplayServer__selectMessages("/stream?streams=btcusdt@kline_1m/ethusdt@kline_1m/listenkey")
+    assert combined
+    assert [message["stream"] for message in selected] == ["btcusdt@kline_1m", "ethusdt@kline_1m", "listenkey", "listenkey"]
+
+    # The messages are dispatched as the websocket manager does, wrapped by the combined stream
+    for message in selected:
+        data_collector._DataCollector__onMessage(data_collector._DataCollector__dispatchStream, message)
+    assertDelivered(data_collector)
+
+    # The error messages, which are not wrapped, report the disconnection
+    data_collector._DataCollector__onMessage(data_collector._DataCollector__dispatchStream, {"e": "error", "m": "Max reconnections reached"})
+    assert data_collector.disconnected.is_set()
+
+
+@requires_loop_argument
+def test_combined_stream_delivers_klines_and_user_data_through_the_replay_server():
+    utils.notifier.webhook_url = None
+    server = ReplayServer(messages, port=8781)
+    url = server.start()
+
+    exchange = ListenKeyExchange(clock=lambda: end_time / 1000, history={"BTCUSDT": makeKlines(400), "ETHUSDT": makeKlines(400)})
+    data_collector = DataCollector(api_key=None, api_secret=None, symbols=["BTCUSDT", "ETHUSDT"], multiplex=True, stream_url=url, client=exchange, clock=lambda: end_time / 1000)
+    threading.Thread(target=data_collector.start, args=[], daemon=True).start()
+
+    try:
+        # The klines and the user's data arrive over the single combined stream
+        waitUntil(lambda: data_collector.getStatus() == "CONNECTED")
+        waitUntil(lambda: data_collector.getOrder(7) is not None)
+        waitUntil(lambda: all(data_collector.getSymbolStore(symbol).lastTime() == end_time for symbol in ["BTCUSDT", "ETHUSDT"]))
+        assertDelivered(data_collector)
+
+    finally:
+        data_collector.twm.stop()
+        server.stop()
@@ -0,0 +1,182 @@
+import json
+import time
+import asyncio
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from binance.exceptions import BinanceAPIException
+from restScheduler import RestScheduler, ScheduledClient, ScheduledAsyncClient
+
+
+# Stub of the exchange's REST API, answering every request after a delay and reporting the weight used so far.
+# The requests are logged by method and endpoint, and the klines' requests can be throttled.
+class StubExchange:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.used_weight = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > 0:
+                    self.rfile.read(length)
+
+                endpoint = self.path.split("?")[0].split("/")[-1]
+                time.sleep(exchange.delay)
+                with exchange.lock:
+                    exchange.requests.append((self.command, endpoint))
+                    exchange.used_weight += 1
+                    throttled = endpoint == "klines" and exchange.throttled > 0
+                    exchange.throttled -= 1 if throttled else 0
+
+                if throttled:
+                    status, body = 429, {"code": -1003, "msg": "Too many requests"}
+                else:
+                    status, body = 200, {"serverTime": int(time.time() * 1000)} if endpoint == "time" else ([] if endpoint == "klines" else {})
+
+                body = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-MBX-USED-WEIGHT-1M", str(exchange.used_weight))
+                if throttled:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_DELETE = handle_request
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, args=[], daemon=True).start()
+
+    def endpoints(self):
+        with self.lock:
+            return [endpoint for _, endpoint in self.requests]
+
+
+@pytest.fixture
+def exchange():
+    exchange = StubExchange()
+    yield exchange
+    exchange.server.shutdown()
+
+
+def test_orders_are_sent_before_the_waiting_data_requests(exchange):
+    exchange.delay = 0.05
+    scheduler = RestScheduler(max_in_flight=1)
+
+    async def main():
+        client = await ScheduledAsyncClient.create(api_key="key", api_secret="secret", scheduler=scheduler, base_url=exchange.url)
+        assert abs(client.timestamp_offset) < 1000
+        try:
+            data_requests = [asyncio.ensure_future(client.get_klines(symbol="BTCUSDT", interval="1m")) for _ in range(10)]
+            await asyncio.sleep(0.01)
+            await client.order_limit_buy(symbol="BTCUSDT", quantity="1", price="1")
+            await asyncio.gather(*data_requests)
+        finally:
+            await client.close_connection()
+
+    asyncio.run(main())
+
+    # The order overtakes all the data requests still waiting when it was issued
+    endpoints = exchange.endpoints()
+    assert endpoints[:2] == ["ping", "time"]
+    assert endpoints[2:].index("order") <= 2
+    assert scheduler.getStatus()["in_flight"] == 0
+
+
+def test_data_requests_do_not_spend_the_reserve(exchange):
+    scheduler = RestScheduler(weight_per_minute=60, reserve=0.5, max_in_flight=4)
+    client = ScheduledClient(api_key="key", api_secret="secret", scheduler=scheduler, base_url=exchange.url)
+
+    # The exchange reports that half of the weight is used, so that only the reserve is left
+    exchange.used_weight = 29
+    client.get_klines(symbol="BTCUSDT", interval="1m")
+    assert scheduler.getStatus()["tokens"] < 30.5
+
+    # The data requests wait for the bucket to refill above the reserve, while an order spends it at once
+    data_request = threading.Thread(target=client.get_klines, kwargs={"symbol": "BTCUSDT", "interval": "1m"})
+    data_request.start()
+    time.sleep(0.2)
+    assert scheduler.getStatus()["waiting"] == 1
+
+    start = time.monotonic()
+    client.order_limit_buy(symbol="BTCUSDT", quantity="1", price="1")
+    assert time.monotonic() - start < 0.5
+    assert data_request.is_alive()
+
+    data_request.join(timeout=10)
+    assert not data_request.is_alive()
+
+
+def test_orders_do_not_wait_for_the_data_requests_in_flight(exchange):
+    exchange.delay = 0.5
+    scheduler = RestScheduler(max_in_flight=3, reserved_in_flight=1)
+    client = ScheduledClient(api_key="key", api_secret="secret", scheduler=scheduler, base_url=exchange.url)
+
+    # The data requests fill all the connections but the reserved one
+    data_requests = [threading.Thread(target=client.get_klines, kwargs={"symbol": "BTCUSDT", "interval": "1m"}) for _ in range(3)]
+    for data_request in data_requests:
+        data_request.start()
+    time.sleep(0.2)
+    assert scheduler.getStatus()["in_flight"] == 2
+    assert scheduler.getStatus()["waiting"] == 1
+
+    # An order is sent at once on the reserved connection
+    start = time.monotonic()
+    client.order_limit_buy(symbol="BTCUSDT", quantity="1", price="1")
+    assert time.monotonic() - start < 0.75
+
+    for data_request in data_requests:
+        data_request.join(timeout=10)
+    assert scheduler.getStatus()["in_flight"] == 0
+
+
+def test_retry_after_holds_back_all_the_requests(exchange):
+    scheduler = RestScheduler()
+    client = ScheduledClient(scheduler=scheduler, base_url=exchange.url)
+    exchange.throttled = 1
+
+    with pytest.raises(BinanceAPIException):
+        client.get_klines(symbol="BTCUSDT", interval="1m")
+
+    start = time.monotonic()
+    client.get_exchange_info()
+    assert time.monotonic() - start >= 0.9
+
+
+def test_cancelled_requests_release_their_slot(exchange):
+    exchange.delay = 0.2
+    scheduler = RestScheduler(max_in_flight=1)
+
+    async def main():
+        client = await ScheduledAsyncClient.create(scheduler=scheduler, base_url=exchange.url)
+        try:
+            # Cancelling a request in flight and a request waiting for it
+            in_flight = asyncio.ensure_future(client.get_klines(symbol="BTCUSDT", interval="1m"))
+            waiting = asyncio.ensure_future(client.get_klines(symbol="BTCUSDT", interval="1m"))
+            await asyncio.sleep(0.05)
+            assert scheduler.getStatus()["waiting"] == 1
+            waiting.cancel()
+            in_flight.cancel()
+            await asyncio.gather(in_flight, waiting, return_exceptions=True)
+            assert scheduler.getStatus()["in_flight"] == 0
+            assert scheduler.getStatus()["waiting"] == 0
+
+            # The next request is sent without waiting for the cancelled ones
+            await asyncio.wait_for(client.get_exchange_info(), timeout=1)
+        finally:
+            await client.close_connection()
+
+    asyncio.run(main())
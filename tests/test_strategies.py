@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import backtesting
+import indicators
+from strategies import SMADivergenceStrategy
+
+
+def test_symbols_are_scored_by_sma_price_ratio_from_the_threshold():
+    strategy = SMADivergenceStrategy(window=20, threshold=1.25)
+    assert strategy.features == ["close", "SMA_20"]
+
+    # Below the threshold, at the threshold, above it and without SMA yet
+    features = np.array([[1.0, 1.2], [1.0, 1.25], [2.0, 3.0], [1.0, np.nan]])
+    scores = strategy.score(features)
+    assert list(scores) == [-np.inf, 1.25, 1.5, -np.inf]
+
+    # The symbol with the highest ratio is bought at its close price
+    assert strategy.select(features) == (2, 1.5)
+    assert list(strategy.buyPrice(features)) == [1.0, 1.0, 2.0, 1.0]
+
+
+def test_no_symbol_is_selected_below_the_threshold():
+    strategy = SMADivergenceStrategy(window=20, threshold=1.25)
+    assert strategy.select(np.array([[1.0, 1.2], [1.0, np.nan]])) == (None, None)
+    assert strategy.select(np.empty((0, 2))) == (None, None)
+
+
+def test_symbols_are_ranked_in_every_period():
+    strategy = SMADivergenceStrategy(window=20, threshold=1.25)
+
+    # Features shaped (symbols x features x periods)
+    features = np.array([
+        [[1.0, 1.0, 1.0], [1.3, 1.0, np.nan]],
+        [[1.0, 2.0, 1.0], [1.25, 3.0, 1.1]]
+    ])
+    best_symbols, best_scores = strategy.rank(features)
+    assert list(best_symbols[:2]) == [0, 1]
+    assert list(best_scores) == [1.3, 1.5, -np.inf]
+
+
+def test_window_features_match_the_indicators():
+    strategy = SMADivergenceStrategy(window=20, threshold=1.01)
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 50))
+    values = np.vstack([close, close, close, close, np.ones(50)])
+
+    df = pd.DataFrame({"close": close})
+    strategy.applyIndicators(df)
+    assert df["SMA_20"].equals(indicators.SMA(df["close"], window=20))
+    assert np.allclose(strategy.windowFeatures(values), [close[-1], df["SMA_20"].iloc[-1]], rtol=1e-12)
+
+    # Without enough candles the SMA is not available, so that the symbol is not eligible
+    features = strategy.windowFeatures(values[:, :10])
+    assert features[0] == close[9] and np.isnan(features[1])
+
+
+def test_backtest_buys_at_the_close_from_the_threshold():
+    strategy = SMADivergenceStrategy(window=20, threshold=1.25)
+
+    # The SMA - price ratio reaches the threshold exactly in the third period, and the target is hit in the fifth one
+    periods = 6
+    df = pd.DataFrame({
+        "time": 1600000020000 + np.arange(periods) * 60000,
+        "open": 1.0,
+        "high": [1.0, 1.0, 1.0, 1.001, 1.01, 1.0],
+        "low": 1.0,
+        "close": 1.0,
+        "volume": 1.0,
+        "SMA_20": [1.2, np.nan, 1.25, 1.25, 1.25, 1.0]
+    })
+    transactions = backtesting.testStrategy([{"symbol": "BTCUSDT", "historical_data": df}], periods, strategy)
+
+    assert len(transactions) == 1
+    transaction = transactions.iloc[0]
+    assert transaction.buy_timestamp == df["time"][2]
+    assert transaction.buy_price == 1.0
+    assert transaction.sell_timestamp == df["time"][4]
+    assert transaction.sell_price == 1.003
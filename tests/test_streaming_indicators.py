@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+import indicators
+from streamingIndicators import StreamingSMA, StreamingEMA, StreamingRSI, StreamingMACD, StreamingBOLL
+
+
+# Close prices following a random walk, with a run of identical prices
+def makeCloses(count=600, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    closes[200:230] = closes[200]
+    return closes
+
+
+# Function to feed a streaming indicator as the collector does: every candle is appended with a provisional close price and then
+# revised to its final one, yielding the value after each revision
+def streamValues(indicator, closes):
+    for close in closes:
+        indicator.append(close * 1.01)
+        indicator.update(close)
+        yield indicator.value
+
+
+# Function to compare two floats, NaN being equal to NaN
+def same(a, b):
+    return a == b or (np.isnan(a) and np.isnan(b))
+
+
+@pytest.mark.parametrize("window", [2, 5, 20, 200])
+def test_streaming_sma_and_boll_are_identical_to_pandas(window):
+    closes = makeCloses()
+    sma = indicators.SMA(pd.Series(closes), window=window)
+    bollinger_up, bollinger_down = indicators.BOLL(pd.Series(closes), window=window)
+
+    # Every value is compared to the one computed on the prefix of the series, as the last candle is revised in place
+    for i, (sma_value, boll_value) in enumerate(zip(streamValues(StreamingSMA(window=window), closes), streamValues(StreamingBOLL(window=window), closes))):
+        assert same(sma_value, sma.iloc[i])
+        assert same(boll_value[0], bollinger_up.iloc[i]) and same(boll_value[1], bollinger_down.iloc[i])
+
+
+def test_streaming_sma_after_revisions_is_identical_to_pandas_on_the_revised_series():
+    closes = makeCloses(count=300, seed=1)
+    streaming = StreamingSMA(window=20)
+    streaming.load(closes)
+
+    # Revising the last candle several times gives the value of the series ending with the latest revision
+    for revision in (closes[-1] * 0.97, closes[-1] * 1.03, closes[-1]):
+        streaming.update(revision)
+        assert streaming.value == indicators.SMA(pd.Series(np.append(closes[:-1], revision)), window=20).iloc[-1]
+
+
+def test_streaming_exponential_indicators_are_identical_to_pandas():
+    closes = makeCloses()
+    ema = indicators.EMA(pd.Series(closes), window=50)
+    rsi = indicators.RSI(pd.Series(closes), window=14)
+    macd, macd_signal, divergence = indicators.MACD(pd.Series(closes))
+
+    assert all(same(value, ema.iloc[i]) for i, value in enumerate(streamValues(StreamingEMA(window=50), closes)))
+    assert all(same(value, rsi.iloc[i]) for i, value in enumerate(streamValues(StreamingRSI(window=14), closes)))
+    assert all(same(value[0], macd.iloc[i]) and same(value[1], macd_signal.iloc[i]) and same(value[2], divergence.iloc[i]) for i, value in enumerate(streamValues(StreamingMACD(), closes)))
@@ -0,0 +1,48 @@
+import time
+import threading
+import pytest
+import utils
+from symbolsInfo import SymbolsInfo
+from simulatedExchange import SimulatedExchange
+
+
+# Exchange whose exchange information is answered only once released
+class SlowExchange(SimulatedExchange):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.released = threading.Event()
+        self.requests = 0
+
+    def get_exchange_info(self):
+        self.requests += 1
+        self.released.wait(timeout=10)
+        return super().get_exchange_info()
+
+
+def test_unknown_symbol_schedules_a_refresh_without_blocking():
+    utils.notifier.webhook_url = None
+    exchange = SlowExchange(clock=time.time, history={"BTCUSDT": []})
+    symbols_info = SymbolsInfo(client=exchange, symbols=["BTCUSDT", "ETHUSDT"])
+    exchange.released.set()
+    symbols_info.refresh()
+    assert symbols_info.getSymbolInfo("BTCUSDT")["min_notional"] == 10.0
+
+    # The symbol listed later is unknown: the lookup fails at once, while the table is refreshed in the background
+    exchange.released.clear()
+    exchange.history["ETHUSDT"] = []
+    start = time.monotonic()
+    with pytest.raises(Exception):
+        symbols_info.getSymbolInfo("ETHUSDT")
+    with pytest.raises(Exception):
+        symbols_info.getSymbolInfo("ETHUSDT")
+    assert time.monotonic() - start < 0.5
+
+    exchange.released.set()
+    deadline = time.monotonic() + 5
+    while "ETHUSDT" not in symbols_info.symbols_info:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert symbols_info.getSymbolInfo("ETHUSDT")["symbol"] == "ETHUSDT"
+
+    # Both the lookups were served by the same refresh
+    assert exchange.requests == 2
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+import utils
+from functools import partial
+from candleStore import CandleStore
+from cryptoBot import CryptoBot
+from simulatedExchange import SimulatedExchange
+from strategies import SMADivergenceStrategy
+from workerPool import WorkerPool, storesFeatures
+
+
+modes = ["inline", "threads", "processes"]
+end_time = 1600000020000 + 400 * 60000
+
+
+# Function processing a batch of items, recording the batch sizes
+def squares(items):
+    return [(item * item, len(items)) for item in items]
+
+
+# Function to build the klines of a random walk
+def makeKlines(candles, seed):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.002, candles)))
+    first_time = end_time - candles * 60000
+    return [[first_time + i * 60000, str(close[i]), str(close[i]), str(close[i]), str(close[i]), "1.0", first_time + (i + 1) * 60000 - 1] for i in range(candles)]
+
+
+@pytest.mark.parametrize("mode", modes)
+def test_map_keeps_the_order_of_the_items(mode):
+    pool = WorkerPool(mode=mode, workers=2)
+    try:
+        results = pool.map(squares, list(range(5)))
+        assert [result for result, _ in results] == [0, 1, 4, 9, 16]
+        assert [size for _, size in results] == ([5] * 5 if mode == "inline" else [3, 3, 3, 2, 2])
+        assert pool.map(squares, []) == []
+
+    finally:
+        pool.close()
+
+
+def test_modes_compute_the_same_features_from_the_shared_stores():
+    strategy = SMADivergenceStrategy(window=20, threshold=1.01)
+    stores = []
+    for seed in range(5):
+        klines = makeKlines(50, seed)
+        store = CandleStore(capacity=40, shared=True)
+        store.load([kline[0] for kline in klines], [[float(value) for value in kline[1:6]] for kline in klines])
+        stores.append(store)
+
+    pools = [WorkerPool(mode=mode, workers=2) for mode in modes]
+    try:
+        descriptors = [store.descriptor() for store in stores]
+        expected = [store.read(lambda times, values: strategy.windowFeatures(values)) for store in stores]
+        for pool in pools:
+            assert pool.map(partial(storesFeatures, strategy), descriptors) == expected
+
+        # The workers read the candles written after they attached to the stores
+        stores[2].append(end_time, [50.0] * 5)
+        for pool in pools:
+            assert pool.map(partial(storesFeatures, strategy), descriptors)[2][0] == 50.0
+
+    finally:
+        for pool in pools:
+            pool.close()
+        for store in stores:
+            store.close()
+
+
+def test_bot_selects_the_same_symbol_in_every_mode():
+    utils.notifier.webhook_url = None
+    symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "XRPUSDT"]
+    history = {symbol: makeKlines(400, seed) for seed, symbol in enumerate(symbols)}
+
+    # The latest price of a symbol falls below its SMA
+    history["BNBUSDT"][-1][4] = str(float(history["BNBUSDT"][-1][4]) * 0.97)
+
+    features = {}
+    buy_opportunities = {}
+    for mode in modes:
+        exchange = SimulatedExchange(clock=lambda: end_time / 1000, history=history)
+        bot = CryptoBot(api_key=None, api_secret=None, symbols=symbols, minumum_profit=1.003, client=exchange, offline=True, clock=lambda: end_time / 1000, strategy=SMADivergenceStrategy(window=200, threshold=1.01), worker_mode=mode, workers=2)
+        try:
+            bot.data_collector.start()
+            features[mode] = bot._CryptoBot__symbolsData(symbols)
+            buy_opportunities[mode] = bot._CryptoBot__buyingStrategy()
+
+        finally:
+            bot.worker_pool.close()
+
+    # The processes compute the features from the candle windows, the other modes read the streaming indicators
+    assert (features["threads"] == features["inline"]).all()
+    assert np.allclose(features["processes"], features["inline"], rtol=1e-12, atol=0)
+    assert buy_opportunities["inline"]["symbol"] == "BNBUSDT"
+    assert buy_opportunities["threads"] == buy_opportunities["inline"]
+    assert buy_opportunities["processes"]["symbol"] == "BNBUSDT"
+    assert buy_opportunities["processes"]["price"] == buy_opportunities["inline"]["price"]
+    assert buy_opportunities["processes"]["score"] == pytest.approx(buy_opportunities["inline"]["score"], rel=1e-12)
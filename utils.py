@@ -1,21 +1,226 @@
 import os
+import sys
+import time
 import pytz
+import queue
+import atexit
 import dotenv
+import requests
+import threading
 import datetime as dt
-from discordwebhook import Discord
 
 
 # Loading the environmental variables
 dotenv.load_dotenv()
 
-# Instantiating the Discord object
+# Discord webhook URL
 webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
-discord = Discord(url=webhook_url)
 
 # Logs file
 log_file = "logs.log"
 
 
+# Background pipeline writing the logs and posting the Discord notifications off the trading threads.
+# The logs and the notifications have their own queue and worker, so that a slow or failing webhook never delays the logs.
+class Notifier:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, webhook_url, log_file, max_queue_size=10000, batch_size=10, max_retries=5, timeout=10) -> None:
+        # Initializing object's attributes
+        self.webhook_url = webhook_url
+        self.log_file = log_file
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.dropped_logs = 0
+        self.dropped_notifications = 0
+
+        # Lock guarding the counters of the dropped items, updated by the callers' threads and reset by the logs worker
+        self.dropped_lock = threading.Lock()
+
+        # Creating the bounded queues of the pending log lines and notifications
+        self.log_queue = queue.Queue(maxsize=max_queue_size)
+        self.webhook_queue = queue.Queue(maxsize=max_queue_size)
+
+        # Creating the persistent handle of the logs file and the HTTP session
+        self.log_handle = None
+        self.session = requests.Session()
+
+        # Starting the background workers
+        self.log_worker = threading.Thread(target=self.__workLogs, args=[], daemon=True)
+        self.log_worker.start()
+        self.webhook_worker = threading.Thread(target=self.__workWebhooks, args=[], daemon=True)
+        self.webhook_worker.start()
+
+
+    # Function to format a log line
+    def __formatLog(self, data) -> str:
+        return '%s --> %s\n' % (str(dt.datetime.now()), data)
+
+
+    # Function to get a batch of items from a queue, waiting for the first one
+    def __getBatch(self, items_queue, size) -> list:
+        items = [items_queue.get()]
+        while len(items) < size:
+            try:
+                items.append(items_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return items
+
+
+    # Function to report on the standard error a failure of a worker, which cannot be logged to the file
+    def __reportFailure(self, e) -> None:
+        try:
+            sys.stderr.write(self.__formatLog(f'Notifier error: {str(e)}'))
+        except Exception:
+            pass
+
+
+    # Function to write a batch of log lines to the logs file
+    def __writeLogs(self, lines) -> None:
+        if self.log_handle is None:
+            self.log_handle = open(self.log_file, 'a', buffering=1 << 16)
+
+        self.log_handle.writelines(lines)
+        self.log_handle.flush()
+
+
+    # Function to post a batch of embeds to the Discord channel, retrying with exponential backoff
+    def __postEmbeds(self, embeds) -> None:
+        if not self.webhook_url:
+            return
+
+        for attempt in range(self.max_retries):
+            try:
+                response = self.session.post(self.webhook_url, json={"username": "Crypto Bot", "embeds": embeds}, timeout=self.timeout)
+
+                if response.status_code < 300:
+                    return
+
+                # Waiting as long as requested by Discord when rate limited
+                if response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After") or response.json().get("retry_after", 2 ** attempt)
+                    time.sleep(float(retry_after))
+                    continue
+
+                # Client errors are not retried
+                if response.status_code < 500:
+                    raise Exception(f'HTTP {response.status_code}: {response.text}')
+
+            except requests.RequestException:
+                pass
+
+            time.sleep(2 ** attempt)
+
+        raise Exception(f'Webhook not delivered after {self.max_retries} attempts')
+
+
+    # Logs worker's loop: draining the queue of the log lines in batches
+    def __workLogs(self) -> None:
+        while True:
+            items = self.__getBatch(self.log_queue, 100)
+
+            try:
+                # Writing the log lines, truncating the logs file first when requested
+                lines = []
+                for item in items:
+                    if item[0] == "log":
+                        lines.append(item[1])
+
+                    elif item[0] == "reset":
+                        if self.log_handle is not None:
+                            self.log_handle.close()
+                        self.log_handle = open(self.log_file, 'w', buffering=1 << 16)
+                        lines = []
+
+                # Reporting the items dropped because their queue was full
+                with self.dropped_lock:
+                    dropped_logs, self.dropped_logs = self.dropped_logs, 0
+                    dropped_notifications, self.dropped_notifications = self.dropped_notifications, 0
+                if dropped_logs > 0 or dropped_notifications > 0:
+                    lines.append(self.__formatLog(f'{dropped_logs} log lines and {dropped_notifications} notifications dropped'))
+
+                if len(lines) > 0:
+                    self.__writeLogs(lines)
+
+            # The worker must survive any failure (i.e. a full disk), so that the trading threads are never affected
+            except Exception as e:
+                self.__reportFailure(e)
+
+            finally:
+                for _ in items:
+                    self.log_queue.task_done()
+
+
+    # Notifications worker's loop: posting the queued embeds in batches
+    def __workWebhooks(self) -> None:
+        while True:
+            embeds = self.__getBatch(self.webhook_queue, self.batch_size)
+
+            try:
+                self.__postEmbeds(embeds)
+            except Exception as e:
+                self.log(f'Error sending Discord notification: {str(e)}')
+
+            finally:
+                for _ in embeds:
+                    self.webhook_queue.task_done()
+
+
+    # Function to wait until all the items of a queue have been handled or a deadline expires
+    def __join(self, items_queue, deadline) -> bool:
+        with items_queue.all_tasks_done:
+            while items_queue.unfinished_tasks > 0:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+
+                items_queue.all_tasks_done.wait(remaining)
+
+        return True
+
+
+    """ PUBLIC METHODS """
+    # Function to enqueue a log line without ever blocking the caller
+    def log(self, data) -> None:
+        try:
+            self.log_queue.put_nowait(("log", self.__formatLog(data)))
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped_logs += 1
+
+
+    # Function to enqueue a Discord embed without ever blocking the caller
+    def notify(self, embed) -> None:
+        try:
+            self.webhook_queue.put_nowait(embed)
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped_notifications += 1
+
+
+    # Function to truncate the logs file
+    def reset(self) -> None:
+        self.log_queue.put(("reset", None))
+
+
+    # Function to wait, at most for the given seconds, until all the pending notifications and log lines have been handled.
+    # It returns False if some of them are still pending.
+    def flush(self, timeout=None) -> bool:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        # The log lines are flushed before and after the notifications, whose errors are logged
+        flushed = self.__join(self.log_queue, deadline) and self.__join(self.webhook_queue, deadline)
+        return self.__join(self.log_queue, deadline) and flushed
+
+
+# Instantiating the background notifier, whose pending items are flushed at exit without hanging it on a failing webhook
+notifier = Notifier(webhook_url=webhook_url, log_file=log_file)
+atexit.register(notifier.flush, timeout=5)
+
+
 # Function to get the datetime for the selected timezone.
 def getDatetime() -> dt.datetime:
     date_time = dt.datetime.now()
@@ -25,24 +230,17 @@ def getDatetime() -> dt.datetime:
 
 # Function to initialize the logging files
 def initLogFile() -> None:
-    open(log_file,'w').close()
+    notifier.reset()
 
 
 # Function to log errors
 def log(data) -> None:
-    # Creating the log file if it does not exist
-    if not os.path.exists(log_file):
-        open(log_file,'w').close()
-
-    # Appending the line to the file
-    with open(log_file, 'a') as f:
-        f.write('%s --> %s\n' % (str(dt.datetime.now()), data))
+    notifier.log(data)
 
 
 # Function to send Discord notifications
 def sendWebhook(symbol, description, side) -> None:
     embed = {
-        "username": "Crypto Bot",
         "title": f'**POSITION {"OPENED" if side == "BUY" else "CLOSED"} | {symbol}**',
         "color": 6146183 if side == "BUY" else 14898529,
         "description": description,
@@ -50,5 +248,5 @@ def sendWebhook(symbol, description, side) -> None:
         "timestamp": str(getDatetime())
     }
 
-    # Posting the message in the Discord channel
-    discord.post(embeds=[embed])
\ No newline at end of file
+    # Queueing the message for the Discord channel
+    notifier.notify(embed)
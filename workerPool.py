@@ -0,0 +1,100 @@
+import os
+import concurrent.futures
+import multiprocessing as mp
+from multiprocessing import resource_tracker
+from candleStore import CandleStore
+
+
+# Candle stores attached by a worker process, indexed by shared memory block's name
+attached_stores = {}
+
+
+# Function run by the worker processes to compute the latest features of a batch of symbols from their shared candle stores
+def storesFeatures(strategy, descriptors) -> list:
+    features = []
+    for name, capacity in descriptors:
+        # Attaching the store once per process
+        store = attached_stores.get(name)
+        if store is None:
+            store = attached_stores[name] = CandleStore(capacity=capacity, name=name)
+
+        # Computing the features on a consistent view of the current window, published by the DataCollector
+        features.append(store.read(lambda times, values: strategy.windowFeatures(values)))
+
+    return features
+
+
+# Function run by the worker processes to check that they are up
+def ping(_=None) -> int:
+    return os.getpid()
+
+
+# Long-lived pool of workers owned by the bot, splitting the per-pass work over the symbols into one batch per worker.
+# Modes:
+# - "inline": the batch is processed by the calling thread, which is the fastest when the per-symbol work is small
+# - "threads": the batches are processed by a persistent pool of threads
+# - "processes": the batches are processed by a persistent pool of processes, reading the candle stores from shared memory
+class WorkerPool:
+    """ PRIVATE METHODS """
+    # Class constructor
+    def __init__(self, mode="inline", workers=None) -> None:
+        if mode not in ("inline", "threads", "processes"):
+            raise Exception(f'Unknown worker pool mode: {mode}')
+
+        # Initializing object's attributes
+        self.mode = mode
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.executor = None
+
+        if self.mode == "threads":
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="worker")
+
+        elif self.mode == "processes":
+            # Forking the processes where possible, so that the bot's modules are not imported again by every worker
+            context = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+
+            # Sharing the tracker of the shared memory blocks with the workers, so that the blocks they attach to are released only by their owner
+            resource_tracker.ensure_running()
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+            # Starting the processes right away, before the bot starts its threads, and waiting for them to be ready
+            list(self.executor.map(ping, range(self.workers)))
+
+
+    # Function to split a list into at most a given number of contiguous batches of similar size
+    def __split(self, items, batches) -> list:
+        batches = max(min(batches, len(items)), 1)
+        size, remainder = divmod(len(items), batches)
+
+        splits = []
+        start = 0
+        for i in range(batches):
+            end = start + size + (1 if i < remainder else 0)
+            splits.append(items[start:end])
+            start = end
+
+        return splits
+
+
+    """ PUBLIC METHODS """
+    # Function to apply a function to the batches of a list of items, the function returning a list of results for each batch,
+    # and to get the results in the order of the items. In processes mode the function and the items must be picklable.
+    def map(self, function, items) -> list:
+        if len(items) == 0:
+            return []
+
+        if self.executor is None:
+            return function(items)
+
+        results = []
+        for batch_results in self.executor.map(function, self.__split(items, self.workers)):
+            results.extend(batch_results)
+
+        return results
+
+
+    # Function to stop the workers
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None